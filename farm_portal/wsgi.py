@@ -1,12 +1,20 @@
 """
 WSGI config for farm_portal project.
+
+With DJANGO_WARM_START=1 (see gunicorn.conf.py) the app is warmed up here,
+in the gunicorn master when --preload is used, before workers are forked.
 """
 
 import os
 
+from django.conf import settings
 from django.core.wsgi import get_wsgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'farm_portal.settings')
 
 application = get_wsgi_application()
 
+if settings.WARM_START:
+    from home.warmup import warm_up
+
+    warm_up()
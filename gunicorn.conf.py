@@ -0,0 +1,56 @@
+"""
+gunicorn configuration:
+
+    gunicorn farm_portal.wsgi -c gunicorn.conf.py
+
+The app is preloaded in the master with warm start enabled (home/warmup.py),
+so workers fork with imports, URL patterns, compiled templates and the LLM
+client already in memory. The master logs the per-phase startup record on
+home.perf; each worker logs how long it took from fork to ready, and its
+first request is recorded in farm_first_request_duration_seconds.
+
+Workers share data versions, sessions, cached users and rate limits through
+the default cache, so more than one worker needs a shared backend (see
+CACHES in settings); startup fails with the per-process LocMemCache.
+"""
+
+import os
+import sys
+import time
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'farm_portal.settings')
+os.environ.setdefault('DJANGO_WARM_START', '1')
+
+bind = os.environ.get('GUNICORN_BIND', '0.0.0.0:8000')
+workers = int(os.environ.get('WEB_CONCURRENCY', '3'))
+threads = int(os.environ.get('GUNICORN_THREADS', '4'))
+preload_app = True
+timeout = 60
+
+
+def on_starting(server):
+    from django.conf import settings
+    from home.caching import cache_is_shared
+
+    if server.cfg.workers > 1 and not cache_is_shared():
+        server.log.error(
+            'CACHES uses %s, which each worker keeps to itself; with %s workers they would serve '
+            'stale pages and split rate limits. Configure a shared cache or set WEB_CONCURRENCY=1.',
+            settings.CACHES['default']['BACKEND'], server.cfg.workers,
+        )
+        sys.exit(1)
+
+
+def post_fork(server, worker):
+    worker.forked_at = time.perf_counter()
+
+
+def child_exit(server, worker):
+    # Keep the exited worker's counters in the archive so totals never go backwards
+    from home.metrics import archive_processes
+
+    archive_processes([worker.pid])
+
+
+def post_worker_init(worker):
+    worker.log.info('Worker %s ready %.1f ms after fork', worker.pid, (time.perf_counter() - worker.forked_at) * 1000)
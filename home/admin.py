@@ -1,50 +1,338 @@
-from django.contrib import admin
-from .models import Farm, TodoList, Expense, Income, Budget, CropStage, CropCalendar
+from datetime import date, datetime, timedelta
+
+from django.contrib import admin, messages
+from django.contrib.admin.views.main import PAGE_VAR
+from django.core.paginator import EmptyPage, PageNotAnInteger, Paginator
+from django.db import connection
+from django.db.models import QuerySet
+from django.utils.functional import cached_property
+from .models import (
+    Farm, TodoList, Expense, Income, Budget, CropStage, CropCalendar,
+    ScheduleTemplate, ScheduleTemplateStage, ScheduleTemplateEvent, SlowQuery,
+    Conversation, ChatMessage, Job,
+)
+
+# Unfiltered tables estimated below this size are counted exactly
+ESTIMATE_MIN_ROWS = 10000
+# Filtered changelists count at most this many rows, or this many pages past the one shown
+MAX_EXACT_COUNT = 10000
+PAGES_AHEAD = 10
+# dates() probes at most this many periods before falling back to DISTINCT
+MAX_DATE_PROBES = 400
+
+
+def estimate_row_count(model):
+    """Cheap row-count estimate for a whole table, or None if the backend has none"""
+    table = connection.ops.quote_name(model._meta.db_table)
+    with connection.cursor() as cursor:
+        if connection.vendor == 'postgresql':
+            cursor.execute('SELECT reltuples::bigint FROM pg_class WHERE oid = %s::regclass', [model._meta.db_table])
+        elif connection.vendor == 'sqlite':
+            # Upper bound from the rowid b-tree; ignores deleted rows
+            cursor.execute(f'SELECT MAX({connection.ops.quote_name(model._meta.pk.column)}) FROM {table}')
+        else:
+            return None
+        row = cursor.fetchone()
+    if row is None or row[0] is None or row[0] < 0:
+        return None
+    return int(row[0])
+
+
+class EstimatedCountPaginator(Paginator):
+    """
+    Paginator that never runs COUNT(*) over a whole large table: unfiltered
+    changelists use the database's estimate, filtered ones stop counting
+    PAGES_AHEAD pages past the requested page (at least MAX_EXACT_COUNT rows).
+
+    A count that stopped early reports one row more than the limit, so the
+    page links always reach past the current page, and any page can be
+    opened: pages are not checked against an inexact count, only found empty.
+    """
+
+    def __init__(self, *args, page_hint=1, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.page_hint = page_hint
+        self.count_is_exact = True
+
+    @cached_property
+    def count(self):
+        queryset = self.object_list
+        # Unfiltered means no filter beyond the default manager's own (Farm hides deleted farms)
+        if queryset.query.where == queryset.model._default_manager.all().query.where:
+            estimate = estimate_row_count(queryset.model)
+            if estimate is not None and estimate >= ESTIMATE_MIN_ROWS:
+                self.count_is_exact = False
+                return estimate
+        limit = max(MAX_EXACT_COUNT, (self.page_hint + PAGES_AHEAD) * self.per_page)
+        count = queryset.order_by()[:limit + 1].count()
+        self.count_is_exact = count <= limit
+        return count
+
+    def validate_number(self, number):
+        self.count
+        if self.count_is_exact:
+            return super().validate_number(number)
+        try:
+            number = int(number)
+        except (TypeError, ValueError):
+            raise PageNotAnInteger('That page number is not an integer')
+        if number < 1:
+            raise EmptyPage('That page number is less than 1')
+        return number
+
+    def page(self, number):
+        number = self.validate_number(number)
+        if self.count_is_exact:
+            return super().page(number)
+        bottom = (number - 1) * self.per_page
+        objects = self.object_list[bottom:bottom + self.per_page]
+        # An estimate (SQLite's MAX(id) counts deleted ids too) can promise pages that turn out empty
+        if number > self.num_pages and not objects:
+            raise EmptyPage('That page contains no results')
+        return self._get_page(objects, number, self)
+
+
+def _date_periods(first, last, kind):
+    """(start, end) half-open ranges of every year/month/day from first to last"""
+    if kind == 'year':
+        for year in range(first.year, last.year + 1):
+            yield date(year, 1, 1), date(year + 1, 1, 1)
+    elif kind == 'month':
+        current = first.replace(day=1)
+        while current <= last:
+            following = (current + timedelta(days=32)).replace(day=1)
+            yield current, following
+            current = following
+    else:
+        current = first
+        while current <= last:
+            yield current, current + timedelta(days=1)
+            current += timedelta(days=1)
+
+
+class IndexedDatesQuerySet(QuerySet):
+    """
+    QuerySet whose dates() (used by the admin date_hierarchy) probes each
+    year, month or day with an indexed range EXISTS instead of truncating
+    every row with SELECT DISTINCT.
+    """
+
+    def dates(self, field_name, kind, order='ASC'):
+        # Two ORDER BY ... LIMIT 1 queries are index seeks; MIN() and MAX() together scan the index
+        dated = self.exclude(**{f'{field_name}__isnull': True}).values_list(field_name, flat=True)
+        first = dated.order_by(field_name).first()
+        if first is None:
+            return []
+        last = dated.order_by(f'-{field_name}').first()
+        if isinstance(first, datetime) or kind not in ('year', 'month', 'day'):
+            return super().dates(field_name, kind, order)
+
+        periods = list(_date_periods(first, last, kind))
+        if len(periods) > MAX_DATE_PROBES:
+            return super().dates(field_name, kind, order)
+        found = [
+            start for start, end in periods
+            if self.filter(**{f'{field_name}__gte': start, f'{field_name}__lt': end}).exists()
+        ]
+        return found if order == 'ASC' else found[::-1]
+
+
+class FarmFilter(admin.SimpleListFilter):
+    """Filter by a farm id or name typed into a box instead of listing every farm"""
+    title = 'farm'
+    parameter_name = 'farm'
+    template = 'admin/home/input_filter.html'
+
+    def lookups(self, request, model_admin):
+        # Only the active value is offered; the template renders a search box
+        value = self.value()
+        return [(value, value)] if value else [('', '')]
+
+    def queryset(self, request, queryset):
+        value = (self.value() or '').strip()
+        if not value:
+            return queryset
+        if value.isdigit():
+            return queryset.filter(farm_id=int(value))
+        return queryset.filter(farm__farm_name__icontains=value)
+
+    def choices(self, changelist):
+        all_choice = next(super().choices(changelist))
+        all_choice['query_parts'] = [
+            (key, value) for key, value in changelist.params.items() if key != self.parameter_name
+        ]
+        yield all_choice
+
+
+class LargeTableAdmin(admin.ModelAdmin):
+    """Changelist settings for tables that grow per user: no full-table counts or scans"""
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+    list_select_related = ['farm', 'user']
+    autocomplete_fields = ['farm', 'user']
+
+    def get_paginator(self, request, queryset, per_page, orphans=0, allow_empty_first_page=True):
+        try:
+            page_hint = max(1, int(request.GET.get(PAGE_VAR, 1)))
+        except ValueError:
+            page_hint = 1
+        return self.paginator(queryset, per_page, orphans, allow_empty_first_page, page_hint=page_hint)
+
+    def get_queryset(self, request):
+        queryset = super().get_queryset(request)
+        return IndexedDatesQuerySet(model=queryset.model, query=queryset.query, using=queryset._db, hints=queryset._hints)
+
 
 @admin.register(Farm)
-class FarmAdmin(admin.ModelAdmin):
+class FarmAdmin(LargeTableAdmin):
     list_display = ['farm_name', 'crop_type', 'location', 'area', 'start_date', 'user']
     list_filter = ['crop_type', 'area_unit', 'created_at']
     search_fields = ['farm_name', 'location', 'crop_type']
+    list_select_related = ['user']
+    autocomplete_fields = ['user']
+    actions = ['apply_matching_schedule']
+
+    @admin.action(description='Apply matching schedule template to selected farms')
+    def apply_matching_schedule(self, request, queryset):
+        from .schedules import apply_template, templates_for_crop
+
+        farms_by_crop = {}
+        for farm in queryset:
+            farms_by_crop.setdefault(farm.crop_type.strip().lower(), []).append(farm)
+
+        for crop_type, farms in farms_by_crop.items():
+            template = templates_for_crop(crop_type).first()
+            if template is None:
+                self.message_user(request, f'No schedule template for crop type "{crop_type}".', messages.WARNING)
+                continue
+            stages_created, events_created = apply_template(template, farms)
+            self.message_user(
+                request,
+                f'"{template.name}" applied to {len(farms)} farm(s): '
+                f'{stages_created} stages and {events_created} events created.'
+            )
 
 @admin.register(TodoList)
-class TodoListAdmin(admin.ModelAdmin):
+class TodoListAdmin(LargeTableAdmin):
     list_display = ['task', 'farm', 'user', 'priority', 'completed', 'due_date', 'created_at']
-    list_filter = ['completed', 'priority', 'created_at', 'farm']
+    list_filter = ['completed', 'priority', 'created_at', FarmFilter]
     search_fields = ['task', 'description', 'farm__farm_name']
 
 @admin.register(Expense)
-class ExpenseAdmin(admin.ModelAdmin):
+class ExpenseAdmin(LargeTableAdmin):
     list_display = ['farm', 'category', 'amount', 'date', 'user', 'created_at']
-    list_filter = ['category', 'date', 'created_at', 'farm']
+    list_filter = ['category', 'date', 'created_at', FarmFilter]
     search_fields = ['description', 'farm__farm_name']
     date_hierarchy = 'date'
 
 @admin.register(Income)
-class IncomeAdmin(admin.ModelAdmin):
+class IncomeAdmin(LargeTableAdmin):
     list_display = ['farm', 'category', 'amount', 'date', 'user', 'created_at']
-    list_filter = ['category', 'date', 'created_at', 'farm']
+    list_filter = ['category', 'date', 'created_at', FarmFilter]
     search_fields = ['description', 'farm__farm_name']
     date_hierarchy = 'date'
 
 @admin.register(Budget)
-class BudgetAdmin(admin.ModelAdmin):
+class BudgetAdmin(LargeTableAdmin):
     list_display = ['farm', 'category', 'allocated_amount', 'period', 'start_date', 'end_date', 'user']
-    list_filter = ['category', 'period', 'start_date', 'farm']
+    list_filter = ['category', 'period', 'start_date', FarmFilter]
     search_fields = ['description', 'farm__farm_name']
     date_hierarchy = 'start_date'
 
 @admin.register(CropStage)
-class CropStageAdmin(admin.ModelAdmin):
+class CropStageAdmin(LargeTableAdmin):
     list_display = ['farm', 'stage_name', 'start_date', 'end_date', 'completed', 'user', 'created_at']
-    list_filter = ['stage_name', 'completed', 'start_date', 'farm']
+    list_filter = ['stage_name', 'completed', 'start_date', FarmFilter]
     search_fields = ['notes', 'farm__farm_name']
     date_hierarchy = 'start_date'
 
 @admin.register(CropCalendar)
-class CropCalendarAdmin(admin.ModelAdmin):
+class CropCalendarAdmin(LargeTableAdmin):
     list_display = ['farm', 'event_type', 'date', 'reminder_days', 'completed', 'user', 'created_at']
-    list_filter = ['event_type', 'completed', 'date', 'farm']
+    list_filter = ['event_type', 'completed', 'date', FarmFilter]
     search_fields = ['description', 'farm__farm_name']
     date_hierarchy = 'date'
 
+class ScheduleTemplateStageInline(admin.TabularInline):
+    model = ScheduleTemplateStage
+    extra = 1
+
+class ScheduleTemplateEventInline(admin.TabularInline):
+    model = ScheduleTemplateEvent
+    extra = 1
+
+@admin.register(ScheduleTemplate)
+class ScheduleTemplateAdmin(admin.ModelAdmin):
+    list_display = ['name', 'crop_type', 'created_at']
+    list_filter = ['crop_type']
+    search_fields = ['name', 'crop_type']
+    inlines = [ScheduleTemplateStageInline, ScheduleTemplateEventInline]
+
+
+@admin.register(SlowQuery)
+class SlowQueryAdmin(admin.ModelAdmin):
+    list_display = ['recorded_at', 'view_name', 'duration_ms', 'short_sql', 'has_plan']
+    list_filter = ['view_name', 'recorded_at']
+    search_fields = ['sql', 'view_name', 'path', 'fingerprint']
+    readonly_fields = ['recorded_at', 'view_name', 'path', 'duration_ms', 'fingerprint', 'sql', 'params', 'plan']
+    fields = readonly_fields
+
+    @admin.display(description='SQL')
+    def short_sql(self, obj):
+        return obj.sql if len(obj.sql) <= 120 else obj.sql[:117] + '...'
+
+    @admin.display(description='Plan', boolean=True)
+    def has_plan(self, obj):
+        return bool(obj.plan)
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+
+class ChatMessageInline(admin.TabularInline):
+    model = ChatMessage
+    fields = ['created_at', 'role', 'content', 'tokens']
+    readonly_fields = fields
+    extra = 0
+    can_delete = False
+
+
+@admin.register(Conversation)
+class ConversationAdmin(admin.ModelAdmin):
+    list_display = ['id', 'user', 'created_at', 'updated_at']
+    list_select_related = ['user']
+    search_fields = ['user__username']
+    readonly_fields = ['user', 'summary', 'summarized_through', 'created_at', 'updated_at']
+    fields = readonly_fields
+    inlines = [ChatMessageInline]
+
+    def has_add_permission(self, request):
+        return False
+
+
+@admin.register(Job)
+class JobAdmin(admin.ModelAdmin):
+    list_display = ['id', 'kind', 'status', 'priority', 'attempts', 'user', 'created_at', 'finished_at']
+    list_filter = ['status', 'kind']
+    list_select_related = ['user']
+    readonly_fields = [
+        'kind', 'user', 'params', 'status', 'priority', 'attempts', 'max_attempts', 'run_after',
+        'locked_by', 'locked_at', 'result', 'error', 'created_at', 'finished_at',
+    ]
+    fields = readonly_fields
+    actions = ['retry_jobs']
+
+    @admin.action(description='Retry selected failed jobs now')
+    def retry_jobs(self, request, queryset):
+        from django.utils import timezone
+
+        count = queryset.filter(status=Job.STATUS_FAILED).update(
+            status=Job.STATUS_QUEUED, attempts=0, run_after=timezone.now(), finished_at=None,
+        )
+        self.message_user(request, f'{count} job(s) queued again.', messages.SUCCESS)
+
+    def has_add_permission(self, request):
+        return False
@@ -5,3 +5,6 @@ class HomeConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'home'
 
+    def ready(self):
+        from .signals import connect_signals
+        connect_signals()
@@ -0,0 +1,112 @@
+"""
+"What needs attention" digest: overdue todos, calendar events due soon and
+stalled crop stages, found with indexed range queries and cached per user
+per day.
+"""
+
+from datetime import timedelta
+
+from django.core.cache import cache
+from django.db.models import BooleanField, Case, Q, Value, When
+from django.utils import timezone
+
+from .caching import user_cache_key
+from .farms import FarmRegistry
+from .models import CropCalendar, CropStage, TodoList
+from .perf import record_cache
+
+DUE_SOON_DAYS = 7
+DIGEST_ITEM_LIMIT = 20
+DIGEST_CACHE_TIMEOUT = 60 * 60 * 24
+
+
+def due_soon_q(today=None, days=DUE_SOON_DAYS):
+    """Q matching open calendar events dated within the next `days` days"""
+    today = today or timezone.localdate()
+    return Q(completed=False, date__gte=today, date__lte=today + timedelta(days=days))
+
+
+def annotate_due_soon(events, today=None, days=DUE_SOON_DAYS):
+    """Annotate a CropCalendar queryset with a `due_soon` flag computed in SQL"""
+    return events.annotate(
+        due_soon=Case(
+            When(due_soon_q(today, days), then=Value(True)),
+            default=Value(False),
+            output_field=BooleanField(),
+        )
+    )
+
+
+def _live(user):
+    return FarmRegistry(user.id).live_records()
+
+
+def overdue_todos(user, today):
+    return TodoList.objects.filter(_live(user), user=user, completed=False, due_date__lt=today).order_by('due_date')
+
+
+def due_soon_events(user, today):
+    return CropCalendar.objects.filter(due_soon_q(today), _live(user), user=user).order_by('date')
+
+
+def stalled_stages(user, today):
+    """Open crop stages whose planned end date has already passed"""
+    return CropStage.objects.filter(_live(user), user=user, completed=False, end_date__lt=today).order_by('end_date')
+
+
+def build_digest(user, today):
+    """Build the digest as plain data (cacheable and JSON-serialisable)"""
+    todos = overdue_todos(user, today)
+    events = due_soon_events(user, today)
+    stages = stalled_stages(user, today)
+
+    return {
+        'date': today.isoformat(),
+        'overdue_todos': [
+            {
+                'id': todo['id'],
+                'task': todo['task'],
+                'farm': todo['farm__farm_name'],
+                'due_date': todo['due_date'].isoformat(),
+                'days_overdue': (today - todo['due_date']).days,
+            }
+            for todo in todos.values('id', 'task', 'farm__farm_name', 'due_date')[:DIGEST_ITEM_LIMIT]
+        ],
+        'due_soon_events': [
+            {
+                'id': event['id'],
+                'event_type': dict(CropCalendar.EVENT_TYPE_CHOICES).get(event['event_type'], event['event_type']),
+                'farm': event['farm__farm_name'],
+                'date': event['date'].isoformat(),
+                'days_until': (event['date'] - today).days,
+            }
+            for event in events.values('id', 'event_type', 'farm__farm_name', 'date')[:DIGEST_ITEM_LIMIT]
+        ],
+        'stalled_stages': [
+            {
+                'id': stage['id'],
+                'stage_name': dict(CropStage.STAGE_CHOICES).get(stage['stage_name'], stage['stage_name']),
+                'farm': stage['farm__farm_name'],
+                'end_date': stage['end_date'].isoformat(),
+                'days_late': (today - stage['end_date']).days,
+            }
+            for stage in stages.values('id', 'stage_name', 'farm__farm_name', 'end_date')[:DIGEST_ITEM_LIMIT]
+        ],
+        'counts': {
+            'overdue_todos': todos.count(),
+            'due_soon_events': events.count(),
+            'stalled_stages': stages.count(),
+        },
+    }
+
+
+def get_attention_digest(user, today=None):
+    """Return the user's digest, cached until their data changes or the day rolls over"""
+    today = today or timezone.localdate()
+    key = user_cache_key('attention', user.id, today.isoformat())
+    digest = cache.get(key)
+    record_cache(digest is not None)
+    if digest is None:
+        digest = build_digest(user, today)
+        cache.set(key, digest, DIGEST_CACHE_TIMEOUT)
+    return digest
@@ -0,0 +1,36 @@
+"""
+Authentication backend that serves request.user from the cache.
+
+ModelBackend.get_user() loads the User row on every request. CachedModelBackend
+keeps it, with its UserProfile joined in, in the default cache for
+AUTH_USER_CACHE_TTL seconds. Saving or deleting either model drops the entry
+(see home/signals.py); changes made with queryset.update() must call
+forget_user() or show up once the entry expires. The entry is only dropped
+for every worker when the cache is shared between them (see CACHES in
+settings).
+"""
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.auth.backends import ModelBackend
+from django.core.cache import cache
+
+AUTH_USER_KEY = 'home:auth-user:{user_id}'
+
+
+def forget_user(user_id):
+    """Drop a cached user so the next request reloads it"""
+    cache.delete(AUTH_USER_KEY.format(user_id=user_id))
+
+
+class CachedModelBackend(ModelBackend):
+
+    def get_user(self, user_id):
+        key = AUTH_USER_KEY.format(user_id=user_id)
+        user = cache.get(key)
+        if user is None:
+            user = get_user_model()._default_manager.select_related('profile').filter(pk=user_id).first()
+            if user is None:
+                return None
+            cache.set(key, user, settings.AUTH_USER_CACHE_TTL)
+        return user if self.user_can_authenticate(user) else None
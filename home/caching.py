@@ -0,0 +1,67 @@
+"""
+Per-user cache versioning.
+
+Every change to a user's farm data bumps that user's version marker (see
+home/signals.py). Cached results are keyed by the marker, so they go stale
+on their own instead of having to be deleted key by key.
+"""
+
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+
+USER_VERSION_KEY = 'home:user-version:{user_id}'
+PER_PROCESS_BACKENDS = ('django.core.cache.backends.locmem.LocMemCache',)
+
+# Benchmarks run against throwaway test databases whose ids repeat from run to
+# run; they get a private cache so they neither read nor clear the site's one
+BENCHMARK_CACHES = {
+    'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'farm-portal-benchmark'},
+}
+
+
+def cache_is_shared():
+    """False when each process has its own cache, so one worker cannot see another's writes"""
+    return settings.CACHES['default']['BACKEND'] not in PER_PROCESS_BACKENDS
+
+
+def get_user_version(user_id):
+    """Current data version for a user (a nanosecond timestamp of the last change)"""
+    key = USER_VERSION_KEY.format(user_id=user_id)
+    version = cache.get(key)
+    if version is None:
+        # Unknown (first use or evicted): start a fresh version so nothing stale is served
+        version = time.time_ns()
+        if not cache.add(key, version, None):
+            version = cache.get(key, version)
+    return version
+
+
+_last_bump = threading.local()
+
+
+def bump_user_version(*user_ids):
+    """Mark one or more users' data as changed; returns the new version"""
+    keys = {USER_VERSION_KEY.format(user_id=user_id): user_id for user_id in set(user_ids)}
+    previous = cache.get_many(keys)
+    version = time.time_ns()
+    cache.set_many(dict.fromkeys(keys, version), None)
+    _last_bump.versions = {user_id: (previous.get(key), version) for key, user_id in keys.items()}
+    return version
+
+
+def last_bump(user_id):
+    """
+    (version before, version after) of this thread's most recent bump if it
+    covered the user, else (None, None). Lets a process tell its own change
+    apart from one made by another process in the meantime.
+    """
+    return getattr(_last_bump, 'versions', {}).get(user_id, (None, None))
+
+
+def user_cache_key(prefix, user_id, *parts):
+    """Cache key that changes whenever the user's data changes"""
+    suffix = ':'.join(str(part) for part in parts)
+    return f'home:{prefix}:{user_id}:{get_user_version(user_id)}:{suffix}'
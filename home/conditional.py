@@ -0,0 +1,70 @@
+"""
+Conditional GET for per-user read-only pages.
+
+Validators come from the user's data version (home.caching), so a
+revalidation costs one cache read and the view is not run at all when
+nothing changed:
+
+* ETag: path and query, user id, data version, today's date (pages show "last 30 days",
+  "this month", "due soon") and the CSRF secret (the page embeds tokens
+  for it).
+* Last-Modified: the later of the last data change and midnight today.
+
+No validators are sent while flash messages are pending, so the page that
+shows them is always rendered, nor when the cache is per-process: a worker
+that never saw a write would still hold the old version and answer 304.
+"""
+
+import hashlib
+from datetime import datetime, time as dt_time, timezone as dt_timezone
+from functools import wraps
+
+from django.contrib.messages.storage.cookie import CookieStorage
+from django.utils import timezone
+from django.utils.cache import patch_cache_control
+from django.views.decorators.http import condition
+
+from .caching import cache_is_shared, get_user_version
+
+
+def _has_pending_messages(request):
+    return bool(request.COOKIES.get(CookieStorage.cookie_name))
+
+
+def _validates(request):
+    return request.user.is_authenticated and not _has_pending_messages(request) and cache_is_shared()
+
+
+def user_etag(request, *args, **kwargs):
+    if not _validates(request):
+        return None
+    parts = [
+        request.get_full_path(),
+        request.user.id,
+        get_user_version(request.user.id),
+        timezone.localdate().isoformat(),
+        request.META.get('CSRF_COOKIE', ''),
+    ]
+    return hashlib.blake2b(':'.join(str(part) for part in parts).encode(), digest_size=12).hexdigest()
+
+
+def user_last_modified(request, *args, **kwargs):
+    if not _validates(request):
+        return None
+    changed = datetime.fromtimestamp(get_user_version(request.user.id) / 1e9, tz=dt_timezone.utc)
+    midnight = timezone.make_aware(datetime.combine(timezone.localdate(), dt_time.min))
+    return max(changed, midnight)
+
+
+def conditional_page(view):
+    """condition() with the per-user validators; responses must be revalidated on every use"""
+    conditional_view = condition(etag_func=user_etag, last_modified_func=user_last_modified)(view)
+
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        response = conditional_view(request, *args, **kwargs)
+        if response.has_header('ETag'):
+            patch_cache_control(response, private=True, no_cache=True)
+        return response
+
+    return wrapper
@@ -0,0 +1,136 @@
+"""
+Chatbot conversation history with a bounded prompt size.
+
+Each conversation keeps its messages plus a rolling summary. A prompt
+replays the summary (at most CHATBOT_SUMMARY_TOKENS) and then the newest
+messages after the summary boundary that fit in CHATBOT_HISTORY_TOKENS.
+So the prompt stays the same size however long the chat gets. Both are
+loaded by load_history() in one query on the (conversation, -id) index.
+
+Each turn is written inside the request that produced it (one INSERT for
+both messages and one UPDATE), so the next question, on whichever worker,
+always sees it, and a failed write surfaces as an error instead of a lost
+turn. Once the unsummarised messages exceed the history budget, the same
+transaction folds the oldest ones into the summary until half the budget is
+left. The summary is extractive (the opening sentence of each folded
+message), so folding costs no extra LLM call. Older lines drop off its
+front as it grows.
+"""
+
+import re
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F
+
+from .models import ChatMessage, Conversation
+
+CHARS_PER_TOKEN = 4  # rough average for English text
+DIGEST_CHARS = 160
+SENTENCE_RE = re.compile(r'(?<=[.!?])\s')
+ROLE_LABELS = {'user': 'User', 'assistant': 'Assistant'}
+
+
+def estimate_tokens(text):
+    return max(1, -(-len(text) // CHARS_PER_TOKEN))
+
+
+def load_history(user_id, conversation_id):
+    """
+    (conversation, unsummarised messages oldest first) for one of the user's
+    conversations, or (None, []) if it is not theirs or does not exist.
+    """
+    messages = list(
+        ChatMessage.objects
+        .filter(conversation_id=conversation_id, conversation__user_id=user_id, id__gt=F('conversation__summarized_through'))
+        .select_related('conversation')
+        .order_by('-id')[:settings.CHATBOT_HISTORY_MAX_MESSAGES]
+    )
+    if messages:
+        return messages[0].conversation, messages[::-1]
+    # New conversation, or everything already summarised
+    return Conversation.objects.filter(pk=conversation_id, user_id=user_id).first(), []
+
+
+def get_or_start(user, conversation_id):
+    """load_history() for a conversation id sent by the client, starting a new conversation if it is unusable"""
+    try:
+        conversation_id = int(conversation_id)
+    except (TypeError, ValueError):
+        conversation_id = None
+    if conversation_id is not None:
+        conversation, messages = load_history(user.id, conversation_id)
+        if conversation is not None:
+            return conversation, messages
+    return Conversation.objects.create(user=user), []
+
+
+def fit_to_budget(messages, budget):
+    """The newest messages whose tokens add up to at most `budget`, oldest first"""
+    kept = []
+    used = 0
+    for message in reversed(messages):
+        if used + message.tokens > budget:
+            break
+        kept.append(message)
+        used += message.tokens
+    return kept[::-1]
+
+
+def history_prompt(conversation, messages):
+    """Summary and recent turns as prompt text ('' for a new conversation)"""
+    lines = []
+    if conversation.summary:
+        lines.append(f'Summary of the earlier conversation:\n{conversation.summary}')
+    recent = fit_to_budget(messages, settings.CHATBOT_HISTORY_TOKENS)
+    if recent:
+        lines.append('Recent messages:')
+        lines.extend(f'{ROLE_LABELS[message.role]}: {message.content}' for message in recent)
+    return '\n'.join(lines)
+
+
+def digest(message):
+    """One summary line: the opening sentence of a message, shortened"""
+    text = ' '.join(message.content.split())
+    text = SENTENCE_RE.split(text, 1)[0]
+    if len(text) > DIGEST_CHARS:
+        text = text[:DIGEST_CHARS - 3].rstrip() + '...'
+    return f'{ROLE_LABELS[message.role]}: {text}'
+
+
+def fold(conversation):
+    """Fold the oldest unsummarised messages into the summary once they exceed the history budget"""
+    pending = list(
+        conversation.messages.filter(id__gt=conversation.summarized_through)
+        .order_by('id').only('id', 'role', 'content', 'tokens')
+    )
+    total = sum(message.tokens for message in pending)
+    if total <= settings.CHATBOT_HISTORY_TOKENS:
+        return False
+
+    lines = conversation.summary.splitlines()
+    for message in pending:
+        if total <= settings.CHATBOT_HISTORY_TOKENS // 2:
+            break
+        lines.append(digest(message))
+        total -= message.tokens
+        conversation.summarized_through = message.id
+
+    limit = settings.CHATBOT_SUMMARY_TOKENS * CHARS_PER_TOKEN
+    while len(lines) > 1 and sum(len(line) + 1 for line in lines) > limit:
+        lines.pop(0)
+    conversation.summary = '\n'.join(lines)
+    return True
+
+
+@transaction.atomic
+def record_turn(conversation_id, question, answer):
+    """Store one question and answer, then fold the history if it has outgrown its budget"""
+    ChatMessage.objects.bulk_create([
+        ChatMessage(conversation_id=conversation_id, role='user', content=question, tokens=estimate_tokens(question)),
+        ChatMessage(conversation_id=conversation_id, role='assistant', content=answer, tokens=estimate_tokens(answer)),
+    ])
+    conversation = Conversation.objects.select_for_update().get(pk=conversation_id)
+    fold(conversation)
+    # Saved even when nothing was folded: updated_at orders the user's conversations
+    conversation.save(update_fields=['summary', 'summarized_through', 'updated_at'])
@@ -0,0 +1,156 @@
+"""
+Data exports and reports, written as files to JOB_OUTPUT_DIR.
+
+export_database() is the JSON dump behind export_database.py, and
+financial_report() the per-user CSV offered on the financial overview. Both
+can take a while on large tables, so the views queue them as background
+jobs (home/jobs.py); export_database.py still runs the export inline by
+default.
+"""
+
+import csv
+import json
+import os
+from datetime import date, datetime
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.db.models import Count, Sum
+from django.db.models.functions import TruncMonth
+
+from .farms import FarmRegistry
+from .models import Expense, Farm, Income, TodoList
+
+EXPORT_CHUNK_SIZE = 2000
+
+
+def serialize_datetime(obj):
+    if isinstance(obj, datetime):
+        return obj.strftime('%Y-%m-%d %H:%M:%S')
+    return str(obj)
+
+
+def export_users():
+    return [
+        {
+            'id': user.id,
+            'username': user.username,
+            'email': user.email,
+            'first_name': user.first_name,
+            'last_name': user.last_name,
+            'is_staff': user.is_staff,
+            'is_superuser': user.is_superuser,
+            'is_active': user.is_active,
+            'date_joined': serialize_datetime(user.date_joined),
+            'last_login': serialize_datetime(user.last_login) if user.last_login else None,
+        }
+        for user in User.objects.order_by('id').iterator(chunk_size=EXPORT_CHUNK_SIZE)
+    ]
+
+
+def export_farms():
+    return [
+        {
+            'id': farm.id,
+            'farm_name': farm.farm_name,
+            'owner_username': farm.user.username,
+            'owner_id': farm.user_id,
+            'location': farm.location,
+            'crop_type': farm.crop_type,
+            'area': str(farm.area),
+            'area_unit': farm.area_unit,
+            'start_date': str(farm.start_date),
+            'end_date': farm.end_date,
+            'created_at': serialize_datetime(farm.created_at),
+            'updated_at': serialize_datetime(farm.updated_at),
+        }
+        for farm in Farm.objects.select_related('user').order_by('id').iterator(chunk_size=EXPORT_CHUNK_SIZE)
+    ]
+
+
+def export_todos():
+    return [
+        {
+            'id': todo.id,
+            'farm_name': todo.farm.farm_name,
+            'farm_id': todo.farm_id,
+            'owner_username': todo.user.username,
+            'owner_id': todo.user_id,
+            'task': todo.task,
+            'description': todo.description,
+            'completed': todo.completed,
+            'priority': todo.priority_slug,
+            'due_date': str(todo.due_date) if todo.due_date else None,
+            'created_at': serialize_datetime(todo.created_at),
+            'updated_at': serialize_datetime(todo.updated_at),
+        }
+        for todo in (
+            TodoList.objects.filter(farm__deleted_at__isnull=True)
+            .select_related('farm', 'user').order_by('id').iterator(chunk_size=EXPORT_CHUNK_SIZE)
+        )
+    ]
+
+
+def output_path(filename):
+    os.makedirs(settings.JOB_OUTPUT_DIR, exist_ok=True)
+    return os.path.join(settings.JOB_OUTPUT_DIR, filename)
+
+
+def export_database(directory=None):
+    """Write every user, farm and todo to a timestamped JSON file; returns (path, counts)"""
+    now = datetime.now()
+    data = {
+        'export_date': now.strftime('%Y-%m-%d %H:%M:%S'),
+        'database': str(settings.DATABASES['default']['NAME']),
+        'users': export_users(),
+        'farms': export_farms(),
+        'todos': export_todos(),
+    }
+    filename = f'database_export_{now.strftime("%Y%m%d_%H%M%S")}.json'
+    path = os.path.join(directory, filename) if directory else output_path(filename)
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(data, f, indent=2, ensure_ascii=False)
+    return path, {name: len(data[name]) for name in ('users', 'farms', 'todos')}
+
+
+def financial_report(user, start=None, end=None, filename=None):
+    """
+    Write the user's income and expenses as CSV, one row per month, farm and
+    category, from two grouped queries; returns (path, rows).
+    """
+    farm_names = dict(Farm.objects.filter(user=user).values_list('id', 'farm_name'))
+    rows = []
+    for model, side, categories in (
+        (Income, 'income', Income.INCOME_CATEGORIES),
+        (Expense, 'expense', Expense.EXPENSE_CATEGORIES),
+    ):
+        records = model.objects.filter(FarmRegistry(user.id).live_records(), user=user)
+        if start:
+            records = records.filter(date__gte=start)
+        if end:
+            records = records.filter(date__lte=end)
+        labels = dict(categories)
+        for month, farm_id, category, total, entries in (
+            records.annotate(month=TruncMonth('date'))
+            .values_list('month', 'farm_id', 'category')
+            .annotate(total=Sum('amount'), entries=Count('id'))
+            .order_by()
+        ):
+            rows.append((month, farm_names.get(farm_id, farm_id), side, labels.get(category, category), entries, total))
+    rows.sort(key=lambda row: (row[0], str(row[1]), row[2], row[3]))
+
+    filename = filename or f'financial_report_{user.username}_{datetime.now():%Y%m%d_%H%M%S}.csv'
+    path = output_path(filename)
+    with open(path, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.writer(f)
+        writer.writerow(['month', 'farm', 'type', 'category', 'entries', 'total'])
+        for month, farm, side, category, entries, total in rows:
+            writer.writerow([f'{month:%Y-%m}', farm, side, category, entries, f'{total:.2f}'])
+        income = sum(row[5] for row in rows if row[2] == 'income')
+        expenses = sum(row[5] for row in rows if row[2] == 'expense')
+        writer.writerow([])
+        writer.writerow(['period', f'{start or "start"} to {end or date.today()}'])
+        writer.writerow(['total income', f'{income:.2f}'])
+        writer.writerow(['total expenses', f'{expenses:.2f}'])
+        writer.writerow(['net', f'{income - expenses:.2f}'])
+    return path, len(rows)
@@ -0,0 +1,113 @@
+"""
+Request-scoped registry of the requesting user's farms.
+
+Most views need the user's farms twice: as <select> options and to check that
+a submitted farm id belongs to the user. get_farm_registry() loads them once
+per request from a per-user cache snapshot, and serves both from memory. The
+snapshot is dropped whenever one of the user's farms is created, edited or
+deleted (see home/signals.py). A farm id missing from the snapshot is looked
+up in the database before it is rejected, and a hit there reloads the
+snapshot, so a stale one (a cache that missed the write) cannot hide a new farm.
+
+The snapshot also remembers the user's deleted farms that are still waiting
+for their purge job (home/purge.py). Their records are still in the tables
+until then; queries that list or total a user's records add
+live_records() to leave them out. While nothing awaits purge, which is
+nearly always, that filter is empty and the query is unchanged.
+"""
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Q
+
+from .models import Farm
+
+FARMS_KEY = 'home:farms:{user_id}'
+
+
+def forget_farms(user_id):
+    """Drop a user's farm snapshot so the next request reloads it"""
+    cache.delete(FARMS_KEY.format(user_id=user_id))
+
+
+class FarmRegistry:
+    """The user's farms in Farm.Meta.ordering order; iterable, sized and looked up by id"""
+
+    def __init__(self, user_id):
+        self.user_id = user_id
+        self._farms = None
+        self._by_id = None
+        self._deleted_ids = None
+
+    @property
+    def farms(self):
+        if self._farms is None:
+            key = FARMS_KEY.format(user_id=self.user_id)
+            farms = cache.get(key)
+            if farms is None:
+                farms = list(Farm.all_objects.filter(user_id=self.user_id))
+                cache.set(key, farms, settings.FARM_REGISTRY_TTL)
+            self._farms = [farm for farm in farms if farm.deleted_at is None]
+            self._by_id = {farm.id: farm for farm in self._farms}
+            self._deleted_ids = sorted(farm.id for farm in farms if farm.deleted_at is not None)
+        return self._farms
+
+    @property
+    def deleted_ids(self):
+        """Ids of the user's deleted farms whose records have not been purged yet"""
+        self.farms
+        return self._deleted_ids
+
+    def live_records(self):
+        """Filter for the user's farm records that leaves out those of deleted farms"""
+        return ~Q(farm_id__in=self.deleted_ids) if self.deleted_ids else Q()
+
+    def _reload_if_missing(self, farm_ids):
+        """Reload a snapshot that lacks any of these ids but the database has; returns whether it did"""
+        if not Farm.objects.filter(user_id=self.user_id, pk__in=farm_ids).exists():
+            return False
+        forget_farms(self.user_id)
+        self._farms = None
+        self.farms
+        return True
+
+    def __iter__(self):
+        return iter(self.farms)
+
+    def __len__(self):
+        return len(self.farms)
+
+    def __bool__(self):
+        return bool(self.farms)
+
+    def get(self, farm_id):
+        """The user's farm with this id (any int-like value); raises Farm.DoesNotExist otherwise"""
+        self.farms
+        try:
+            farm_id = int(farm_id)
+        except (TypeError, ValueError):
+            raise Farm.DoesNotExist(f'User {self.user_id} has no farm {farm_id!r}')
+        if farm_id not in self._by_id and not self._reload_if_missing([farm_id]):
+            raise Farm.DoesNotExist(f'User {self.user_id} has no farm {farm_id!r}')
+        return self._by_id[farm_id]
+
+    def filter(self, farm_ids):
+        """The user's farms among farm_ids, in registry order; ids of other users' farms are dropped"""
+        wanted = set()
+        for farm_id in farm_ids:
+            try:
+                wanted.add(int(farm_id))
+            except (TypeError, ValueError):
+                continue
+        missing = wanted.difference(farm.id for farm in self.farms)
+        if missing:
+            self._reload_if_missing(missing)
+        return [farm for farm in self.farms if farm.id in wanted]
+
+
+def get_farm_registry(request):
+    """The registry for request.user, created on first use and reused for the rest of the request"""
+    registry = getattr(request, '_farm_registry', None)
+    if registry is None or registry.user_id != request.user.id:
+        registry = request._farm_registry = FarmRegistry(request.user.id)
+    return registry
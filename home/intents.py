@@ -0,0 +1,283 @@
+"""
+Local answers for chatbot questions that are really lookups in the user's
+own records ("how much did I spend on fertilizer this month?", "what's due
+this week?").
+
+route() tries each entry of ROUTES in order. A route applies when all of
+its patterns match the lower-cased question, and its handler answers from
+the ORM in a query or two. A handler may also return None, meaning "not
+mine after all", in which case the next route is tried. Questions that no
+route answers go to the LLM. The patterns are deliberately narrow: a
+question about the user's data that slips through still gets an LLM answer,
+but an agronomy question caught by a route would get a wrong one.
+"""
+
+import re
+from collections import namedtuple
+from datetime import date, timedelta
+
+from django.db.models import Sum
+from django.utils import timezone
+
+from .farms import FarmRegistry
+from .models import CropCalendar, CropStage, Expense, Income, TodoList
+
+ANSWER_ITEM_LIMIT = 8
+
+Period = namedtuple('Period', ['start', 'end', 'label'])  # inclusive dates
+Route = namedtuple('Route', ['name', 'patterns', 'handler'])
+
+
+def _month_start(day, months_back=0):
+    month = day.year * 12 + day.month - 1 - months_back
+    return date(month // 12, month % 12 + 1, 1)
+
+
+def parse_period(text, today, default):
+    """The date range a question refers to ('this week', 'last month', ...), else `default`"""
+    week_start = today - timedelta(days=today.weekday())
+    if 'yesterday' in text:
+        day = today - timedelta(days=1)
+        return Period(day, day, 'yesterday')
+    if 'tomorrow' in text:
+        day = today + timedelta(days=1)
+        return Period(day, day, 'tomorrow')
+    if 'today' in text:
+        return Period(today, today, 'today')
+    if 'last week' in text:
+        return Period(week_start - timedelta(days=7), week_start - timedelta(days=1), 'last week')
+    if 'next week' in text:
+        return Period(week_start + timedelta(days=7), week_start + timedelta(days=13), 'next week')
+    if 'this week' in text:
+        return Period(week_start, week_start + timedelta(days=6), 'this week')
+    if 'last month' in text:
+        return Period(_month_start(today, 1), _month_start(today) - timedelta(days=1), 'last month')
+    if 'this month' in text:
+        return Period(_month_start(today), _month_start(today, -1) - timedelta(days=1), 'this month')
+    if 'last year' in text:
+        return Period(date(today.year - 1, 1, 1), date(today.year - 1, 12, 31), 'last year')
+    if 'this year' in text:
+        return Period(date(today.year, 1, 1), date(today.year, 12, 31), 'this year')
+    return default
+
+
+def _this_month(today):
+    return Period(_month_start(today), _month_start(today, -1) - timedelta(days=1), 'this month')
+
+
+def _next_days(today, days=7):
+    return Period(today, today + timedelta(days=days - 1), f'in the next {days} days')
+
+
+def _mentioned(text, choices):
+    """Values of `choices` whose label or value appears in the question (plurals allowed)"""
+    found = []
+    for value, label in choices:
+        words = {label.lower(), value.replace('_', ' ')}
+        if any(re.search(r'\b' + re.escape(word) + r'(s|es)?\b', text) for word in words):
+            found.append(value)
+    return found
+
+
+def _named_farms(user, text):
+    """The user's farms named in the question"""
+    return [farm for farm in FarmRegistry(user.id) if farm.farm_name.lower() in text]
+
+
+def _for_farms(queryset, farms, user):
+    """Rows of the named farms, else of all the user's farms that are not awaiting purge"""
+    if farms:
+        return queryset.filter(farm__in=farms)
+    return queryset.filter(FarmRegistry(user.id).live_records())
+
+
+def _money(amount):
+    return f'₹{amount or 0:,.2f}'
+
+
+def _scope(farms):
+    return f' on {", ".join(farm.farm_name for farm in farms)}' if farms else ''
+
+
+def _first(queryset):
+    """The first ANSWER_ITEM_LIMIT rows and the total, counted only when there are more"""
+    rows = list(queryset[:ANSWER_ITEM_LIMIT])
+    total = queryset.count() if len(rows) == ANSWER_ITEM_LIMIT else len(rows)
+    return rows, total
+
+
+def _bullets(lines, total=None):
+    text = '\n'.join(f'- {line}' for line in lines[:ANSWER_ITEM_LIMIT])
+    total = len(lines) if total is None else total
+    if total > ANSWER_ITEM_LIMIT:
+        text += f'\n...and {total - ANSWER_ITEM_LIMIT} more.'
+    return text
+
+
+def _totals(model, categories, user, text, today):
+    period = parse_period(text, today, _this_month(today))
+    farms = _named_farms(user, text)
+    wanted = _mentioned(text, categories)
+    rows = _for_farms(model.objects.filter(user=user, date__range=(period.start, period.end)), farms, user)
+    if wanted:
+        rows = rows.filter(category__in=wanted)
+    by_category = dict(rows.values_list('category').annotate(total=Sum('amount')).order_by())
+    return period, farms, wanted, by_category
+
+
+def answer_spending(user, text, today):
+    period, farms, wanted, by_category = _totals(Expense, Expense.EXPENSE_CATEGORIES, user, text, today)
+    labels = dict(Expense.EXPENSE_CATEGORIES)
+    what = f' on {" and ".join(labels[value].lower() for value in wanted)}' if wanted else ' in total'
+    answer = f'You spent {_money(sum(by_category.values()))}{what}{_scope(farms)} {period.label}.'
+    if len(by_category) > 1:
+        answer += '\n' + _bullets([
+            f'{labels.get(category, category)}: {_money(total)}'
+            for category, total in sorted(by_category.items(), key=lambda item: -item[1])
+        ])
+    return answer
+
+
+def answer_income(user, text, today):
+    period, farms, wanted, by_category = _totals(Income, Income.INCOME_CATEGORIES, user, text, today)
+    labels = dict(Income.INCOME_CATEGORIES)
+    source = f' from {" and ".join(labels[value].lower() for value in wanted)}' if wanted else ''
+    answer = f'You earned {_money(sum(by_category.values()))}{source}{_scope(farms)} {period.label}.'
+    if len(by_category) > 1:
+        answer += '\n' + _bullets([
+            f'{labels.get(category, category)}: {_money(total)}'
+            for category, total in sorted(by_category.items(), key=lambda item: -item[1])
+        ])
+    return answer
+
+
+def answer_profit(user, text, today):
+    period = parse_period(text, today, _this_month(today))
+    farms = _named_farms(user, text)
+    totals = []
+    for model in (Income, Expense):
+        rows = _for_farms(model.objects.filter(user=user, date__range=(period.start, period.end)), farms, user)
+        totals.append(rows.aggregate(total=Sum('amount'))['total'] or 0)
+    income, expenses = totals
+    net = income - expenses
+    outcome = 'profit' if net >= 0 else 'loss'
+    return (
+        f'Net {outcome}{_scope(farms)} {period.label}: {_money(abs(net))} '
+        f'(income {_money(income)}, expenses {_money(expenses)}).'
+    )
+
+
+def answer_tasks(user, text, today):
+    farms = _named_farms(user, text)
+    todos = _for_farms(TodoList.objects.filter(user=user, completed=False), farms, user).select_related('farm')
+    if OVERDUE.search(text):
+        todos = todos.filter(due_date__lt=today).order_by('due_date')
+        heading = 'overdue'
+    else:
+        period = parse_period(text, today, _next_days(today))
+        todos = todos.filter(due_date__range=(period.start, period.end)).order_by('due_date', '-priority')
+        heading = f'due {period.label}'
+    todos, total = _first(todos)
+    if not todos:
+        return f'You have no open tasks {heading}{_scope(farms)}.'
+    return f'Open tasks {heading}{_scope(farms)}:\n' + _bullets([
+        f'{todo.task} ({todo.farm.farm_name}, due {todo.due_date:%d %b})' for todo in todos
+    ], total)
+
+
+def answer_events(user, text, today):
+    period = parse_period(text, today, _next_days(today))
+    farms = _named_farms(user, text)
+    wanted = _mentioned(text, CropCalendar.EVENT_TYPE_CHOICES)
+    events = _for_farms(
+        CropCalendar.objects.filter(user=user, completed=False, date__range=(period.start, period.end)), farms, user,
+    ).select_related('farm').order_by('date')
+    if wanted:
+        events = events.filter(event_type__in=wanted)
+    events, total = _first(events)
+    labels = dict(CropCalendar.EVENT_TYPE_CHOICES)
+    what = ' or '.join(labels[value].lower() for value in wanted) if wanted else 'events'
+    if not events:
+        return f'No {what} scheduled{_scope(farms)} {period.label}.'
+    return f'Scheduled {what}{_scope(farms)} {period.label}:\n' + _bullets([
+        f'{event.get_event_type_display()} on {event.farm.farm_name}, {event.date:%a %d %b}' for event in events
+    ], total)
+
+
+def answer_stages(user, text, today):
+    farms = _named_farms(user, text)
+    if not farms:
+        # "What stage is my rice in?": narrow by crop instead, else every farm
+        farms = list(FarmRegistry(user.id))
+        farms = [farm for farm in farms if farm.crop_type and farm.crop_type.lower() in text] or farms
+    stages = {}
+    for stage in (
+        CropStage.objects.filter(user=user, farm__in=farms, start_date__lte=today)
+        .order_by('farm_id', 'completed', '-start_date')
+    ):
+        stages.setdefault(stage.farm_id, stage)
+    if not stages:
+        return None  # Nothing recorded: let the LLM answer the general question
+    lines = []
+    for farm in farms:
+        stage = stages.get(farm.id)
+        if stage is None:
+            continue
+        status = 'completed' if stage.completed else f'since {stage.start_date:%d %b}'
+        lines.append(f'{farm.farm_name} ({farm.crop_type}): {stage.get_stage_name_display()}, {status}')
+    return 'Current crop stages:\n' + _bullets(lines)
+
+
+def answer_farms(user, text, today):
+    farms = list(FarmRegistry(user.id))
+    if not farms:
+        return 'You have no farms yet.'
+    return f'You have {len(farms)} farm{"s" if len(farms) != 1 else ""}:\n' + _bullets([
+        f'{farm.farm_name}: {farm.crop_type}, {farm.area} {farm.area_unit}, {farm.location}' for farm in farms
+    ])
+
+
+PERSONAL = re.compile(r"\b(i|i'm|me|my|we|our|us)\b")
+PERSONAL_OR_DATED = re.compile(
+    r"\b(i|i'm|me|my|we|our|us|today|tomorrow|yesterday|upcoming|overdue|(this|next|last) (week|month|year))\b"
+)
+LOOKUP = re.compile(r"\b(what|which|show|list|any|how many)\b|^(is|are|do i have|have i got)\b")
+OVERDUE = re.compile(r'\b(overdue|late)\b')
+# Requests for advice, which the LLM answers even when they mention the user's records
+ADVICE = re.compile(r'^(how do|how can|how to|how should|why)\b|\b(should|could|would|best|recommend\w*|advice|tips?)\b')
+
+ROUTES = [
+    Route('profit', [
+        PERSONAL,
+        re.compile(r'\b(my|our) (net )?(profit|loss)\b|\bnet income\b|\b(make|made|turn|turned) a (profit|loss)\b'
+                   r'|\bhow much (profit|loss)\b|\b(in|at a) (profit|loss)\b'),
+    ], answer_profit),
+    Route('spending', [
+        PERSONAL,
+        re.compile(r'\b(how much|total|sum)\b.*\b(spen[dt]|spending|expenses?|costs?|paid|pay)\b|\b(my|show|list)\b.*\bexpenses\b'),
+    ], answer_spending),
+    Route('income', [
+        PERSONAL,
+        re.compile(r'\b(how much|total|sum)\b.*\b(earn|earned|income|made|make|revenue|sales?|received)\b|\bmy income\b'),
+    ], answer_income),
+    Route('tasks', [LOOKUP, PERSONAL_OR_DATED, re.compile(r'\b(due|overdue|to-?dos?|tasks?)\b')], answer_tasks),
+    Route('events', [
+        LOOKUP, PERSONAL_OR_DATED, re.compile(r'\b(scheduled|upcoming|calendar|events?)\b'),
+    ], answer_events),
+    Route('stages', [PERSONAL, LOOKUP, re.compile(r'\bstages?\b')], answer_stages),
+    Route('farms', [re.compile(r'\b(how many farms|(list|show|what are) my farms)\b')], answer_farms),
+]
+
+
+def route(user, question, today=None):
+    """(route name, answer) for a question answered locally, or (None, None) to ask the LLM"""
+    text = ' '.join(question.lower().split())
+    if not text or ADVICE.search(text):
+        return None, None
+    today = today or timezone.localdate()
+    for name, patterns, handler in ROUTES:
+        if all(pattern.search(text) for pattern in patterns):
+            answer = handler(user, text, today)
+            if answer is not None:
+                return name, answer
+    return None, None
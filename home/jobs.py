@@ -0,0 +1,214 @@
+"""
+Background jobs stored in the project database; no broker required.
+
+enqueue() inserts a Job row, and the run_jobs management command runs a
+pool of workers. Each worker repeatedly does the following:
+- claim(): pick the highest-priority due job and take it with a
+  conditional UPDATE (WHERE status = 'queued'). Two workers can race for
+  the same row, but only one of them updates it.
+- execute(): call the job's handler, then record the result.
+
+A failed job is retried up to max_attempts times, waiting
+JOB_RETRY_BASE_DELAY * 2^(attempt - 1) seconds between tries (capped at
+JOB_RETRY_MAX_DELAY, plus jitter). While a job runs, its worker refreshes
+the lock every third of JOB_LOCK_TIMEOUT. A job whose worker died stays
+'running' until requeue_stale() sees that its lock is older than
+JOB_LOCK_TIMEOUT.
+
+Handlers are listed in HANDLERS by dotted path. Each takes the Job and
+returns a JSON-serialisable result. Results that name a file in
+JOB_OUTPUT_DIR can be downloaded through the job_download view.
+"""
+
+import logging
+import os
+import random
+import socket
+import threading
+import time
+from contextlib import contextmanager
+from datetime import date, timedelta
+
+from django.conf import settings
+from django.db import close_old_connections, connections
+from django.db.models import F
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+from . import metrics
+from .models import Job
+
+logger = logging.getLogger(__name__)
+
+CLAIM_CANDIDATES = 5  # due jobs tried per claim before giving up to a faster worker
+ERROR_MAX_LENGTH = 2000
+
+
+class PermanentJobError(Exception):
+    """Raised by a handler for failures that retrying cannot fix"""
+
+
+def export_database_job(job):
+    from .exports import export_database
+
+    path, counts = export_database()
+    return {'file': os.path.basename(path), **counts}
+
+
+def financial_report_job(job):
+    from .exports import financial_report
+
+    try:
+        start, end = (date.fromisoformat(job.params[key]) if job.params.get(key) else None for key in ('start', 'end'))
+    except ValueError as e:
+        raise PermanentJobError(e)
+    path, rows = financial_report(
+        job.user,
+        start=start,
+        end=end,
+        filename=f'financial_report_{job.user.username}_{job.pk}.csv',
+    )
+    return {'file': os.path.basename(path), 'rows': rows}
+
+
+def purge_farms_job(job):
+    from .purge import purge_farms
+
+    return purge_farms(job.params['farm_ids'])
+
+
+def purge_account_job(job):
+    from .purge import purge_account
+
+    return purge_account(job.params['user_id'])
+
+
+HANDLERS = {
+    'export_database': 'home.jobs.export_database_job',
+    'financial_report': 'home.jobs.financial_report_job',
+    'purge_farms': 'home.jobs.purge_farms_job',
+    'purge_account': 'home.jobs.purge_account_job',
+}
+
+
+def enqueue(kind, params=None, user=None, priority=Job.PRIORITY_NORMAL, max_attempts=None, delay=0):
+    """Queue a job; returns the Job. Nothing runs until a run_jobs worker claims it."""
+    if kind not in HANDLERS:
+        raise ValueError(f'Unknown job kind {kind!r}')
+    return Job.objects.create(
+        kind=kind,
+        params=params or {},
+        user=user,
+        priority=priority,
+        max_attempts=max_attempts or settings.JOB_MAX_ATTEMPTS,
+        run_after=timezone.now() + timedelta(seconds=delay),
+    )
+
+
+def worker_name(suffix=''):
+    return f'{socket.gethostname()}:{os.getpid()}{suffix}'
+
+
+def claim(worker, kinds=None):
+    """Take the highest-priority due job for this worker, or None when there is none"""
+    now = timezone.now()
+    due = Job.objects.filter(status=Job.STATUS_QUEUED, run_after__lte=now)
+    if kinds:
+        due = due.filter(kind__in=kinds)
+    for job_id in due.order_by('-priority', 'run_after', 'id').values_list('id', flat=True)[:CLAIM_CANDIDATES]:
+        claimed = Job.objects.filter(pk=job_id, status=Job.STATUS_QUEUED).update(
+            status=Job.STATUS_RUNNING, locked_by=worker, locked_at=now, attempts=F('attempts') + 1,
+        )
+        if claimed:
+            return Job.objects.select_related('user').get(pk=job_id)
+    return None
+
+
+def retry_delay(attempts):
+    delay = min(settings.JOB_RETRY_MAX_DELAY, settings.JOB_RETRY_BASE_DELAY * 2 ** (attempts - 1))
+    return delay * random.uniform(1.0, 1.25)
+
+
+@contextmanager
+def _heartbeat(job):
+    """Keep refreshing the job's lock from a side thread while the handler runs"""
+    done = threading.Event()
+
+    def beat():
+        try:
+            while not done.wait(settings.JOB_LOCK_TIMEOUT / 3):
+                Job.objects.filter(pk=job.pk, locked_by=job.locked_by).update(locked_at=timezone.now())
+        finally:
+            connections.close_all()
+
+    thread = threading.Thread(target=beat, name=f'job-heartbeat-{job.pk}', daemon=True)
+    thread.start()
+    try:
+        yield
+    finally:
+        done.set()
+        thread.join()
+
+
+def execute(job):
+    """Run a claimed job's handler and record success, a retry or the final failure"""
+    start = time.perf_counter()
+    # Only the worker holding the lock may record the outcome; a requeued job belongs to someone else now
+    mine = Job.objects.filter(pk=job.pk, status=Job.STATUS_RUNNING, locked_by=job.locked_by)
+    try:
+        handler = import_string(HANDLERS[job.kind])
+        with _heartbeat(job):
+            result = handler(job)
+    except Exception as e:
+        permanent = isinstance(e, PermanentJobError) or job.kind not in HANDLERS
+        error = f'{type(e).__name__}: {e}'[:ERROR_MAX_LENGTH]
+        if permanent or job.attempts >= job.max_attempts:
+            outcome = 'failed'
+            mine.update(status=Job.STATUS_FAILED, error=error, finished_at=timezone.now())
+            logger.exception('Job %s (%s) failed after %s attempt(s)', job.pk, job.kind, job.attempts)
+        else:
+            outcome = 'retried'
+            mine.update(
+                status=Job.STATUS_QUEUED, error=error, locked_by='', locked_at=None,
+                run_after=timezone.now() + timedelta(seconds=retry_delay(job.attempts)),
+            )
+            logger.warning('Job %s (%s) attempt %s failed, will retry: %s', job.pk, job.kind, job.attempts, error)
+    else:
+        outcome = 'succeeded'
+        mine.update(status=Job.STATUS_SUCCEEDED, result=result, error='', finished_at=timezone.now())
+    metrics.jobs_total.inc(job.kind, outcome)
+    metrics.job_duration.observe(time.perf_counter() - start, job.kind)
+    return outcome
+
+
+def requeue_stale():
+    """Release jobs locked longer than JOB_LOCK_TIMEOUT (their worker died); returns how many"""
+    cutoff = timezone.now() - timedelta(seconds=settings.JOB_LOCK_TIMEOUT)
+    stale = Job.objects.filter(status=Job.STATUS_RUNNING, locked_at__lt=cutoff)
+    failed = stale.filter(attempts__gte=F('max_attempts')).update(
+        status=Job.STATUS_FAILED, error='Worker lost', finished_at=timezone.now(),
+    )
+    requeued = stale.update(
+        status=Job.STATUS_QUEUED, error='Worker lost', locked_by='', locked_at=None, run_after=timezone.now(),
+    )
+    return failed + requeued
+
+
+def work(worker, stop, kinds=None, poll_interval=1.0, burst=False):
+    """
+    Claim and run jobs until `stop` (a threading or multiprocessing Event) is
+    set; with `burst`, return as soon as no job is due.
+    """
+    try:
+        while not stop.is_set():
+            job = claim(worker, kinds)
+            if job is None:
+                if burst:
+                    return
+                close_old_connections()  # honours CONN_MAX_AGE while idle
+                stop.wait(poll_interval)
+                continue
+            execute(job)
+    finally:
+        connections.close_all()
+
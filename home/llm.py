@@ -0,0 +1,78 @@
+"""
+LLM clients for the chatbot.
+
+chatbot_query talks to whichever client get_client() returns, selected by
+the CHATBOT_LLM_BACKEND setting:
+
+    'gemini'  Google Gemini through google-generativeai (the default)
+    'fake'    canned local answers after CHATBOT_FAKE_LATENCY_MS, for load
+              tests and development without an API key
+"""
+
+import threading
+import time
+
+from django.conf import settings
+
+GEMINI_MODEL = 'models/gemini-2.0-flash'
+
+
+class LLMNotConfigured(Exception):
+    """The selected backend is missing its credentials"""
+
+
+class GeminiClient:
+
+    def __init__(self, api_key, model_name=GEMINI_MODEL):
+        import google.generativeai as genai
+
+        genai.configure(api_key=api_key)
+        self.model = genai.GenerativeModel(model_name)
+
+    def generate(self, prompt):
+        return self.model.generate_content(prompt).text
+
+
+class FakeClient:
+    """Answers locally after a fixed delay, mimicking an upstream call that blocks the worker"""
+
+    def __init__(self, latency_ms=0):
+        self.latency = latency_ms / 1000
+
+    def generate(self, prompt):
+        if self.latency:
+            time.sleep(self.latency)
+        question = prompt.rsplit('User question:', 1)[-1].split('Response:', 1)[0].strip()
+        return f'(offline assistant) You asked: "{question[:200]}". Check soil moisture and local advisories.'
+
+
+_client = None
+_client_lock = threading.Lock()
+
+
+def get_client():
+    """The process-wide client for CHATBOT_LLM_BACKEND, created on first use"""
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                _client = create_client(settings.CHATBOT_LLM_BACKEND)
+    return _client
+
+
+def create_client(backend):
+    if backend == 'fake':
+        return FakeClient(settings.CHATBOT_FAKE_LATENCY_MS)
+    if backend == 'gemini':
+        api_key = getattr(settings, 'GOOGLE_API_KEY', None)
+        if not api_key:
+            raise LLMNotConfigured('GOOGLE_API_KEY is not set')
+        return GeminiClient(api_key)
+    raise ValueError(f'Unknown CHATBOT_LLM_BACKEND {backend!r}')
+
+
+def reset_client():
+    """Forget the cached client (after changing CHATBOT_LLM_BACKEND at runtime)"""
+    global _client
+    with _client_lock:
+        _client = None
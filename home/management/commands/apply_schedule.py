@@ -0,0 +1,57 @@
+"""
+Apply a crop schedule template to many farms at once.
+
+Examples:
+    python manage.py apply_schedule 3 --crop-type Wheat
+    python manage.py apply_schedule 3 --user alice --farm 10 --farm 11
+"""
+
+from django.core.management.base import BaseCommand, CommandError
+
+from home.models import Farm, ScheduleTemplate
+from home.schedules import apply_template
+
+
+class Command(BaseCommand):
+    help = 'Generate crop stages and calendar events for farms from a schedule template'
+
+    def add_arguments(self, parser):
+        parser.add_argument('template_id', type=int, help='ScheduleTemplate id')
+        parser.add_argument('--crop-type', help='Only farms with this crop type (defaults to the template crop type)')
+        parser.add_argument('--user', help='Only farms owned by this username')
+        parser.add_argument('--farm', type=int, action='append', dest='farm_ids', help='Farm id (repeatable)')
+        parser.add_argument('--batch-size', type=int, default=1000)
+        parser.add_argument('--dry-run', action='store_true', help='Report what would be created without writing')
+
+    def handle(self, *args, **options):
+        try:
+            template = ScheduleTemplate.objects.get(id=options['template_id'])
+        except ScheduleTemplate.DoesNotExist:
+            raise CommandError(f"Schedule template {options['template_id']} does not exist")
+
+        farms = Farm.objects.all()
+        if options['farm_ids']:
+            farms = farms.filter(id__in=options['farm_ids'])
+        else:
+            farms = farms.filter(crop_type__iexact=options['crop_type'] or template.crop_type)
+        if options['user']:
+            farms = farms.filter(user__username=options['user'])
+
+        farms = list(farms.only('id', 'user_id', 'start_date'))
+        if not farms:
+            raise CommandError('No farms matched')
+
+        if options['dry_run']:
+            stages = template.stages.count()
+            events = sum(len(event.get_offsets()) for event in template.events.all())
+            self.stdout.write(
+                f'Would create {stages * len(farms)} stages and {events * len(farms)} events '
+                f'for {len(farms)} farm(s)'
+            )
+            return
+
+        stages_created, events_created = apply_template(template, farms, batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(
+            f'Applied "{template.name}" to {len(farms)} farm(s): '
+            f'{stages_created} stages and {events_created} events created'
+        ))
@@ -0,0 +1,144 @@
+"""
+Benchmark admin changelists on a large expense table.
+
+Creates a throwaway test database, bulk-loads --rows expenses (one million by
+default) spread over --farms farms, and times the Expense changelist as a
+superuser: first page, a deep page, date-hierarchy drill-downs, the farm
+filter and a search. With --compare the same requests are repeated with
+Django's default changelist settings (full COUNT(*), no select_related,
+a farm filter listing every farm, SELECT DISTINCT date hierarchy) for a
+before/after view.
+
+    python manage.py bench_admin --rows 1000000 --compare
+"""
+
+import random
+import statistics
+import time
+from contextlib import ExitStack
+from functools import partial
+from datetime import date, timedelta
+from decimal import Decimal
+
+from django.contrib import admin
+from django.contrib.auth.models import User
+from django.core.paginator import Paginator
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test import Client
+from django.test.utils import override_settings, setup_test_environment, teardown_test_environment
+
+from home.admin import FarmFilter
+from home.caching import BENCHMARK_CACHES
+from home.models import Expense, Farm
+
+from .benchmark_views import QueryCounter
+
+
+class Command(BaseCommand):
+    help = 'Time the Expense admin changelist with a large table'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=1000000)
+        parser.add_argument('--farms', type=int, default=200)
+        parser.add_argument('--years', type=int, default=5)
+        parser.add_argument('--repeat', type=int, default=3)
+        parser.add_argument('--batch-size', type=int, default=5000)
+        parser.add_argument('--compare', action='store_true', help='Also time Django\'s default changelist settings')
+
+    def handle(self, *args, **options):
+        setup_test_environment(debug=False)
+        old_config = connection.creation.create_test_db(verbosity=0, autoclobber=True)
+        stack = ExitStack()
+        try:
+            stack.enter_context(override_settings(CACHES=BENCHMARK_CACHES))
+            farm_id, year, month = self.load(options)
+            superuser = User.objects.create_superuser('bench-admin', 'bench@example.com', 'bench')
+            # No perf logging or slow-query writes while measuring
+            stack.enter_context(override_settings(SLOW_QUERY_THRESHOLD_MS=0, PERF_SAMPLE_RATE=0.0))
+            client = Client()
+            client.force_login(superuser)
+
+            model_admin = admin.site._registry[Expense]
+            self.run(client, model_admin, 'optimised', farm_id, year, month, options['repeat'], f'farm={farm_id}')
+            if options['compare']:
+                saved = {
+                    name: getattr(model_admin, name)
+                    for name in ('paginator', 'show_full_result_count', 'list_select_related', 'list_filter')
+                }
+                model_admin.paginator = Paginator
+                model_admin.show_full_result_count = True
+                model_admin.list_select_related = False
+                model_admin.list_filter = ['farm' if f is FarmFilter else f for f in model_admin.list_filter]
+                # Plain QuerySet, so date_hierarchy falls back to SELECT DISTINCT over every row
+                model_admin.get_queryset = partial(admin.ModelAdmin.get_queryset, model_admin)
+                try:
+                    self.run(
+                        client, model_admin, 'django defaults', farm_id, year, month, options['repeat'],
+                        f'farm__id__exact={farm_id}',
+                    )
+                finally:
+                    for name, value in saved.items():
+                        setattr(model_admin, name, value)
+                    del model_admin.get_queryset
+        finally:
+            stack.close()
+            connection.creation.destroy_test_db(old_config, verbosity=0)
+            teardown_test_environment()
+
+    def load(self, options):
+        rng = random.Random(0)
+        start = time.perf_counter()
+        user = User.objects.create_user('bench-owner', password='bench')
+        today = date.today()
+        first_day = today - timedelta(days=365 * options['years'])
+        farms = Farm.objects.bulk_create([
+            Farm(user=user, farm_name=f'Bench Farm {n}', location='Bench', crop_type='Wheat',
+                 area=Decimal('10.00'), start_date=first_day, end_date=today.isoformat())
+            for n in range(options['farms'])
+        ])
+        categories = [value for value, _ in Expense.EXPENSE_CATEGORIES]
+        span = (today - first_day).days
+
+        remaining = options['rows']
+        while remaining:
+            size = min(options['batch_size'], remaining)
+            Expense.objects.bulk_create([
+                Expense(
+                    user=user, farm=rng.choice(farms), category=rng.choice(categories),
+                    amount=Decimal(rng.randint(100, 2000000)) / 100, description='fuel and repairs',
+                    date=first_day + timedelta(days=rng.randint(0, span)),
+                )
+                for _ in range(size)
+            ])
+            remaining -= size
+        with connection.cursor() as cursor:
+            cursor.execute('ANALYZE')
+        self.stdout.write(f'Loaded {options["rows"]:,} expenses in {time.perf_counter() - start:.1f}s')
+        middle = first_day + timedelta(days=span // 2)
+        return farms[0].id, middle.year, middle.month
+
+    def run(self, client, model_admin, label, farm_id, year, month, repeat, farm_query):
+        base = '/admin/home/expense/'
+        cases = [
+            ('first page', base),
+            ('page 50', f'{base}?p=50'),
+            ('year drill-down', f'{base}?date__year={year}'),
+            ('month drill-down', f'{base}?date__year={year}&date__month={month}'),
+            ('farm filter', f'{base}?{farm_query}'),
+            ('search', f'{base}?q=repairs'),
+        ]
+        self.stdout.write(f'\n[{label}]')
+        for name, url in cases:
+            client.get(url)  # warm-up
+            timings = []
+            for _ in range(repeat):
+                counter = QueryCounter()
+                with connection.execute_wrapper(counter):
+                    start = time.perf_counter()
+                    response = client.get(url)
+                    timings.append((time.perf_counter() - start) * 1000)
+            self.stdout.write(
+                f'  {name:<18} {response.status_code}  {statistics.median(timings):>10.1f} ms  '
+                f'{counter.count:>4} queries  {len(response.content) // 1024:>6} KiB'
+            )
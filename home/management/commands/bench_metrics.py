@@ -0,0 +1,66 @@
+"""
+Micro-benchmark for the metrics registry hot path.
+
+    python manage.py bench_metrics --iterations 200000 --threads 4
+"""
+
+import threading
+import time
+
+from django.core.management.base import BaseCommand
+
+from home.metrics import Registry
+
+
+class Command(BaseCommand):
+    help = 'Measure the per-call overhead of metric counters and histograms'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--iterations', type=int, default=200000)
+        parser.add_argument('--threads', type=int, default=4)
+
+    def handle(self, *args, **options):
+        iterations = options['iterations']
+        registry = Registry()
+        counter = registry.counter('bench_total', 'Benchmark counter', ['view'])
+        histogram = registry.histogram('bench_seconds', 'Benchmark histogram', ['view', 'method'])
+
+        def baseline():
+            for i in range(iterations):
+                pass
+
+        def count():
+            for i in range(iterations):
+                counter.inc('dashboard')
+
+        def observe():
+            for i in range(iterations):
+                histogram.observe(0.042, 'dashboard', 'GET')
+
+        loop_ns = self.time_ns(baseline)
+        for label, func in [('counter.inc', count), ('histogram.observe', observe)]:
+            elapsed = self.time_ns(func) - loop_ns
+            self.stdout.write(f'{label:<20} {elapsed / iterations:8.1f} ns/call (1 thread)')
+
+            threads = [threading.Thread(target=func) for _ in range(options['threads'])]
+            start = time.perf_counter_ns()
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+            elapsed = time.perf_counter_ns() - start
+            total_calls = iterations * options['threads']
+            self.stdout.write(
+                f'{label:<20} {elapsed / total_calls:8.1f} ns/call wall ({options["threads"]} threads, '
+                f'{total_calls / (elapsed / 1e9):,.0f} calls/s)'
+            )
+
+        start = time.perf_counter_ns()
+        registry.render()
+        self.stdout.write(f'{"render":<20} {(time.perf_counter_ns() - start) / 1e6:8.2f} ms')
+
+    @staticmethod
+    def time_ns(func):
+        start = time.perf_counter_ns()
+        func()
+        return time.perf_counter_ns() - start
@@ -0,0 +1,93 @@
+"""
+Benchmark the chatbot's retrieval index (home/retrieval.py).
+
+Creates a throwaway test database holding one synthetic user at --scale, then
+times a full index build, retrieval for a set of typical questions, and the
+incremental update made when a task is saved.
+
+    python manage.py bench_retrieval --scale large --repeat 200
+"""
+
+import time
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test.utils import override_settings, setup_test_environment, teardown_test_environment
+
+from home import retrieval
+from home.caching import BENCHMARK_CACHES
+from home.models import TodoList
+from home.synthetic import SCALES, generate
+
+from .loadtest import percentile
+
+QUESTIONS = [
+    'When should I harvest the wheat?',
+    'Which tasks are overdue on Guntur Plot 1?',
+    'How much did I spend on fertilizer last month?',
+    'Is irrigation scheduled this week?',
+    'What stage is my rice crop in?',
+    'pest control for tomato',
+]
+
+
+def _ms(seconds):
+    return seconds * 1000
+
+
+class Command(BaseCommand):
+    help = 'Time retrieval index builds, top-k queries and incremental updates'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--scale', choices=SCALES, default='medium')
+        parser.add_argument('--repeat', type=int, default=100, help='Queries per question')
+
+    def handle(self, *args, **options):
+        setup_test_environment(debug=False)
+        old_config = connection.creation.create_test_db(verbosity=0, autoclobber=True)
+        try:
+            with override_settings(CACHES=BENCHMARK_CACHES):
+                scale = dict(SCALES[options['scale']], users=1)
+                generate(**scale, seed=0)
+                user = User.objects.get(username__startswith='synth')
+                with override_settings(SLOW_QUERY_THRESHOLD_MS=0, PERF_SAMPLE_RATE=0.0):
+                    self.run(user, options['repeat'])
+        finally:
+            connection.creation.destroy_test_db(old_config, verbosity=0)
+            teardown_test_environment()
+
+    def run(self, user, repeat):
+        start = time.perf_counter()
+        index = retrieval.get_index(user.id)
+        built = time.perf_counter() - start
+        self.stdout.write(
+            f'\nIndex for {user.username}: {len(index)} snippets, {index.postings} postings, '
+            f'{len(index.vocabulary)} terms, built in {_ms(built):.1f} ms'
+        )
+
+        self.stdout.write(f'\n{"question":<48} {"p50 ms":>8} {"p95 ms":>8}  top snippet')
+        for question in QUESTIONS:
+            timings = []
+            for _ in range(repeat):
+                start = time.perf_counter()
+                snippets = retrieval.relevant_snippets(user.id, question)
+                timings.append(time.perf_counter() - start)
+            timings.sort()
+            top = snippets[0][:60] if snippets else '-'
+            self.stdout.write(
+                f'{question:<48} {_ms(percentile(timings, 0.5)):>8.3f} {_ms(percentile(timings, 0.95)):>8.3f}  {top}'
+            )
+
+        todo = TodoList.objects.filter(user=user).select_related('farm').first()
+        timings = []
+        for number in range(repeat):
+            todo.description = f'Benchmark note {number}'
+            start = time.perf_counter()
+            todo.save(update_fields=['description', 'updated_at'])
+            timings.append(time.perf_counter() - start)
+        timings.sort()
+        self.stdout.write(
+            f'\nTask save incl. incremental index update: p50 {_ms(percentile(timings, 0.5)):.2f} ms, '
+            f'p95 {_ms(percentile(timings, 0.95)):.2f} ms; index now {len(retrieval.get_index(user.id))} snippets'
+        )
@@ -0,0 +1,140 @@
+"""
+Compare session and authentication configurations under concurrent load.
+
+Creates a throwaway SQLite file database (so threads use separate connections
+and contend on SQLite's lock, as workers do), fills it with synthetic users,
+then for each configuration lets --clients threads, each with its own logged-in
+test client, request the dashboard --requests times. Every statement is
+classified as session (django_session), auth (auth_user, home_userprofile)
+or other, and the per-request averages are reported with throughput and
+latency percentiles.
+
+    python manage.py bench_sessions --clients 8 --requests 50
+"""
+
+import os
+import re
+import statistics
+import tempfile
+import threading
+import time
+from collections import Counter
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test import Client
+from django.test.utils import override_settings, setup_test_environment, teardown_test_environment
+
+from home.caching import BENCHMARK_CACHES
+from home.synthetic import SYNTHETIC_PASSWORD, generate
+
+from .loadtest import percentile
+
+CONFIGURATIONS = [
+    ('db sessions, ModelBackend', 'django.contrib.sessions.backends.db', 'django.contrib.auth.backends.ModelBackend'),
+    ('cached_db, cached user', 'django.contrib.sessions.backends.cached_db', 'home.auth.CachedModelBackend'),
+    ('signed cookies, cached user', 'django.contrib.sessions.backends.signed_cookies', 'home.auth.CachedModelBackend'),
+]
+
+TABLE_CATEGORIES = [
+    ('session', re.compile(r'\bdjango_session\b')),
+    ('auth', re.compile(r'\b(auth_user|home_userprofile)\b')),
+]
+
+
+class QueryClassifier:
+    """connection.execute_wrapper() hook counting statements by the tables they touch"""
+
+    def __init__(self):
+        self.counts = Counter()
+
+    def __call__(self, execute, sql, params, many, context):
+        for category, pattern in TABLE_CATEGORIES:
+            if pattern.search(sql):
+                self.counts[category] += 1
+                break
+        else:
+            self.counts['other'] += 1
+        return execute(sql, params, many, context)
+
+
+class Command(BaseCommand):
+    help = 'Measure session/auth queries per request for each session and auth configuration'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--clients', type=int, default=8, help='Concurrent threads')
+        parser.add_argument('--requests', type=int, default=50, help='Dashboard requests per thread')
+        parser.add_argument('--users', type=int, default=4)
+        parser.add_argument('--path', default='/dashboard/')
+
+    def handle(self, *args, **options):
+        fd, test_db_file = tempfile.mkstemp(prefix='bench-sessions-', suffix='.sqlite3')
+        os.close(fd)
+        connection.settings_dict['TEST']['NAME'] = test_db_file
+        setup_test_environment(debug=False)
+        old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True)
+        try:
+            generate(users=options['users'], farms_per_user=3, years=1, seed=0)
+            usernames = list(User.objects.filter(username__startswith='synth').values_list('username', flat=True))
+            connection.close()
+
+            self.stdout.write(
+                f'\n{"configuration":<30} {"session/req":>11} {"auth/req":>9} {"other/req":>10} '
+                f'{"req/s":>8} {"p50 ms":>8} {"p95 ms":>8}'
+            )
+            for label, engine, backend in CONFIGURATIONS:
+                with override_settings(
+                    SESSION_ENGINE=engine, AUTHENTICATION_BACKENDS=[backend],
+                    SLOW_QUERY_THRESHOLD_MS=0, PERF_SAMPLE_RATE=0.0, CACHES=BENCHMARK_CACHES,
+                ):
+                    cache.clear()
+                    self.run(label, usernames, options)
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+            teardown_test_environment()
+            if os.path.exists(test_db_file):
+                os.remove(test_db_file)
+
+    def run(self, label, usernames, options):
+        counts = Counter()
+        timings = []
+        lock = threading.Lock()
+        ready = threading.Barrier(options['clients'] + 1)
+
+        def worker(number):
+            client = Client()
+            try:
+                client.login(username=usernames[number % len(usernames)], password=SYNTHETIC_PASSWORD)
+                client.get(options['path'])  # warm-up: session and user caches, templates
+            finally:
+                ready.wait()
+            classifier = QueryClassifier()
+            local_timings = []
+            with connection.execute_wrapper(classifier):
+                for _ in range(options['requests']):
+                    start = time.perf_counter()
+                    client.get(options['path'])
+                    local_timings.append(time.perf_counter() - start)
+            connection.close()
+            with lock:
+                counts.update(classifier.counts)
+                timings.extend(local_timings)
+
+        threads = [threading.Thread(target=worker, args=(n,)) for n in range(options['clients'])]
+        for thread in threads:
+            thread.start()
+        ready.wait()
+        started = time.perf_counter()
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - started
+
+        total = len(timings)
+        timings.sort()
+        self.stdout.write(
+            f'{label:<30} {counts["session"] / total:>11.2f} {counts["auth"] / total:>9.2f} '
+            f'{counts["other"] / total:>10.2f} {total / elapsed:>8.1f} '
+            f'{percentile(timings, 0.5) * 1000:>8.1f} {percentile(timings, 0.95) * 1000:>8.1f}'
+        )
@@ -0,0 +1,195 @@
+"""
+Benchmark every GET view in home/urls.py at several data scales.
+
+Runs against a throwaway test database (the real one is never touched):
+for each scale it generates synthetic data, logs in as one of the generated
+users and requests every read-only URL through the test client, recording
+the median latency and the query count.
+
+Examples:
+    python manage.py benchmark_views --save                  # write the baseline
+    python manage.py benchmark_views                         # compare against it
+    python manage.py benchmark_views --scales small,large --threshold 0.5
+
+Exits with an error when a view is slower than the baseline by more than
+--threshold (and --min-delta-ms), or issues more queries than it did.
+"""
+
+import json
+import statistics
+import time
+from pathlib import Path
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import Client
+from django.test.utils import override_settings, setup_test_environment, teardown_test_environment
+from django.urls import URLPattern, reverse
+
+from home import urls as home_urls
+from home.caching import BENCHMARK_CACHES
+from home.models import Budget, CropCalendar, CropStage, Expense, Farm, Income, TodoList
+from home.synthetic import SCALES, generate
+
+DEFAULT_BASELINE = Path(settings.BASE_DIR) / 'benchmarks' / 'views.json'
+
+# URL names that change data on GET, leave the session, or call external services
+SKIPPED_URLS = {
+    'logout', 'chatbot_query', 'bulk_todo_action', 'apply_schedule_template',
+    'toggle_todo', 'toggle_calendar_event', 'profile_download',
+}
+SKIPPED_PREFIXES = ('delete_',)
+
+# URL keyword argument -> model whose id (owned by the benchmark user) fills it
+URL_ARGUMENT_MODELS = {
+    'farm_id': Farm,
+    'todo_id': TodoList,
+    'expense_id': Expense,
+    'income_id': Income,
+    'budget_id': Budget,
+    'stage_id': CropStage,
+    'event_id': CropCalendar,
+}
+
+
+class QueryCounter:
+    """connection.execute_wrapper() hook counting statements (no debug query log cap)"""
+
+    def __init__(self):
+        self.count = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        self.count += 1
+        return execute(sql, params, many, context)
+
+
+class Command(BaseCommand):
+    help = 'Measure latency and query counts of every read-only view at several data scales'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--scales', default='small,medium', help=f'Comma-separated, from: {", ".join(SCALES)}')
+        parser.add_argument('--repeat', type=int, default=5, help='Timed requests per view (after one warm-up)')
+        parser.add_argument('--baseline', default=str(DEFAULT_BASELINE))
+        parser.add_argument('--save', action='store_true', help='Write the results as the new baseline')
+        parser.add_argument('--threshold', type=float, default=0.25, help='Allowed relative latency increase')
+        parser.add_argument('--min-delta-ms', type=float, default=5.0, help='Ignore latency increases smaller than this')
+        parser.add_argument('--seed', type=int, default=0)
+
+    def handle(self, *args, **options):
+        scales = [scale.strip() for scale in options['scales'].split(',') if scale.strip()]
+        unknown = [scale for scale in scales if scale not in SCALES]
+        if unknown:
+            raise CommandError(f'Unknown scale(s): {", ".join(unknown)}')
+
+        results = self.run(scales, options['repeat'], options['seed'])
+        baseline_path = Path(options['baseline'])
+
+        if options['save']:
+            baseline_path.parent.mkdir(parents=True, exist_ok=True)
+            baseline_path.write_text(json.dumps(results, indent=2, sort_keys=True) + '\n')
+            self.stdout.write(self.style.SUCCESS(f'Baseline written to {baseline_path}'))
+            return
+
+        if not baseline_path.exists():
+            self.stdout.write(self.style.WARNING(f'No baseline at {baseline_path}; run with --save to create one'))
+            return
+
+        baseline = json.loads(baseline_path.read_text())
+        regressions = self.compare(baseline, results, options['threshold'], options['min_delta_ms'])
+        if regressions:
+            for line in regressions:
+                self.stderr.write(line)
+            raise CommandError(f'{len(regressions)} view regression(s) against {baseline_path}')
+        self.stdout.write(self.style.SUCCESS('No regressions against the baseline'))
+
+    def run(self, scales, repeat, seed):
+        results = {'repeat': repeat, 'scales': {}}
+        setup_test_environment(debug=False)
+        old_config = connection.creation.create_test_db(verbosity=0, autoclobber=True)
+        try:
+            # No slow-query or profiler writes while measuring
+            with override_settings(SLOW_QUERY_THRESHOLD_MS=0, PERF_SAMPLE_RATE=0.0, CACHES=BENCHMARK_CACHES):
+                for scale in scales:
+                    call_command('flush', interactive=False, verbosity=0)
+                    cache.clear()
+                    start = time.perf_counter()
+                    generate(seed=seed, **SCALES[scale])
+                    self.stdout.write(f'\n[{scale}] data generated in {time.perf_counter() - start:.1f}s')
+                    results['scales'][scale] = self.run_scale(repeat)
+        finally:
+            connection.creation.destroy_test_db(old_config, verbosity=0)
+            teardown_test_environment()
+        return results
+
+    def run_scale(self, repeat):
+        from django.contrib.auth.models import User
+
+        user = User.objects.filter(username__startswith='synth').order_by('id').first()
+        client = Client()
+        client.force_login(user)
+
+        scale_results = {}
+        for name, url in self.urls(user):
+            client.get(url)  # warm-up: template compilation, cache fill
+            timings = []
+            for _ in range(repeat):
+                counter = QueryCounter()
+                with connection.execute_wrapper(counter):
+                    start = time.perf_counter()
+                    response = client.get(url)
+                    timings.append((time.perf_counter() - start) * 1000)
+            scale_results[name] = {
+                'url': url,
+                'status': response.status_code,
+                'median_ms': round(statistics.median(timings), 2),
+                'queries': counter.count,
+            }
+            self.stdout.write(
+                f'  {name:<28} {response.status_code}  {scale_results[name]["median_ms"]:>9.2f} ms  '
+                f'{counter.count:>5} queries'
+            )
+        return scale_results
+
+    def urls(self, user):
+        """(url name, path) for every benchmarkable pattern in home/urls.py"""
+        for pattern in home_urls.urlpatterns:
+            if not isinstance(pattern, URLPattern) or not pattern.name:
+                continue
+            if pattern.name in SKIPPED_URLS or pattern.name.startswith(SKIPPED_PREFIXES):
+                continue
+
+            kwargs = {}
+            for argument in pattern.pattern.converters:
+                model = URL_ARGUMENT_MODELS.get(argument)
+                obj_id = model.objects.filter(user=user).values_list('id', flat=True).first() if model else None
+                if obj_id is None:
+                    break
+                kwargs[argument] = obj_id
+            else:
+                yield pattern.name, reverse(pattern.name, kwargs=kwargs)
+
+    def compare(self, baseline, results, threshold, min_delta_ms):
+        regressions = []
+        for scale, views in results['scales'].items():
+            baseline_views = baseline.get('scales', {}).get(scale, {})
+            for name, result in views.items():
+                previous = baseline_views.get(name)
+                if previous is None:
+                    continue
+                delta = result['median_ms'] - previous['median_ms']
+                if delta > min_delta_ms and result['median_ms'] > previous['median_ms'] * (1 + threshold):
+                    regressions.append(
+                        f'[{scale}] {name}: {previous["median_ms"]:.2f} ms -> {result["median_ms"]:.2f} ms'
+                    )
+                if result['queries'] > previous['queries']:
+                    regressions.append(
+                        f'[{scale}] {name}: {previous["queries"]} -> {result["queries"]} queries'
+                    )
+                if result['status'] != previous['status']:
+                    regressions.append(
+                        f'[{scale}] {name}: status {previous["status"]} -> {result["status"]}'
+                    )
+        return regressions
@@ -0,0 +1,62 @@
+"""
+Build STATIC_ROOT for production: collectstatic through
+home.storage.CompressedManifestStaticFilesStorage, then a size report.
+
+    DJANGO_DEBUG=0 python manage.py build_static [--clear]
+
+The result is content-hashed files, their .gz/.br copies and the AVIF/WebP
+variants of STATIC_IMAGE_VARIANTS, ready for StaticFilesMiddleware.
+"""
+
+import os
+
+from django.conf import settings
+from django.contrib.staticfiles.storage import staticfiles_storage
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+
+from home.storage import CompressedManifestStaticFilesStorage, brotli, variant_name
+
+
+def _size(path):
+    return os.path.getsize(path) if os.path.exists(path) else None
+
+
+class Command(BaseCommand):
+    help = 'Collect, hash, precompress and resize static files into STATIC_ROOT'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--clear', action='store_true', help='Empty STATIC_ROOT first')
+
+    def handle(self, *args, **options):
+        if not isinstance(staticfiles_storage, CompressedManifestStaticFilesStorage):
+            raise CommandError(
+                'The staticfiles storage is not CompressedManifestStaticFilesStorage '
+                '(it is only enabled outside DEBUG); run with DJANGO_DEBUG=0'
+            )
+        if brotli is None:
+            self.stdout.write(self.style.WARNING('brotli is not installed; writing gzip copies only'))
+
+        call_command('collectstatic', interactive=False, clear=options['clear'], verbosity=0)
+        self.report()
+
+    def report(self):
+        root = settings.STATIC_ROOT
+        self.stdout.write(f'\n{"file":<44} {"bytes":>10} {"gzip":>10} {"brotli":>10}')
+        for name, hashed in sorted(staticfiles_storage.hashed_files.items()):
+            path = os.path.join(root, hashed)
+            gz, br = _size(path + '.gz'), _size(path + '.br')
+            if gz is None and br is None:
+                continue
+            gz, br = (f'{size:,}' if size else '-' for size in (gz, br))
+            self.stdout.write(f'{hashed:<44} {_size(path):>10,} {gz:>10} {br:>10}')
+
+        for name, widths in settings.STATIC_IMAGE_VARIANTS.items():
+            self.stdout.write(f'\n{name}: {_size(os.path.join(root, name)):,} bytes')
+            for width in sorted(widths):
+                for image_format in settings.STATIC_IMAGE_FORMATS:
+                    variant = variant_name(name, width, image_format)
+                    hashed = staticfiles_storage.hashed_files.get(variant)
+                    if hashed:
+                        self.stdout.write(f'  {hashed:<42} {_size(os.path.join(root, hashed)):>10,}')
+        self.stdout.write(self.style.SUCCESS(f'\nStatic files built in {root}'))
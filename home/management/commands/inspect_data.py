@@ -0,0 +1,257 @@
+"""
+Browse the portal's data from the command line without loading whole tables.
+
+Rows are read with keyset pagination (WHERE id > --after ORDER BY id LIMIT
+--limit) as plain value rows, with related names fetched in the same query,
+so a page costs the same on ten rows or ten million. --all streams the whole
+(filtered) table page by page. --stats aggregates in SQL with GROUP BY.
+
+Examples:
+    python manage.py inspect_data                       # list the models
+    python manage.py inspect_data expenses --user alice --since 2024-01-01
+    python manage.py inspect_data expenses --after 5000 --limit 50
+    python manage.py inspect_data todos --open --farm 12 --all
+    python manage.py inspect_data --stats [--user alice]
+"""
+
+from datetime import date
+from decimal import Decimal
+
+from django.apps import apps
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Count, Q, Sum
+
+from home.models import (
+    Budget, ChatMessage, Conversation, CropCalendar, CropStage, Expense, Farm, Income, Job, ScheduleTemplate,
+    ScheduleTemplateEvent, ScheduleTemplateStage, SearchEntry, SlowQuery, TodoList, UserProfile,
+)
+
+
+class Table:
+    """How one model is listed: value columns (lookup, width) and its filter lookups"""
+
+    def __init__(self, model, columns, user='user__username', farm='farm_id', date_field=None, completed=False):
+        self.model = model
+        self.columns = columns
+        self.user = user
+        self.farm = farm
+        self.date_field = date_field
+        self.completed = completed
+
+
+TABLES = {
+    'users': Table(User, [
+        ('id', 7), ('username', 20), ('email', 28), ('is_staff', 8), ('is_active', 9), ('date_joined', 19), ('last_login', 19),
+    ], user='username', farm=None, date_field='date_joined'),
+    'profiles': Table(UserProfile, [
+        ('id', 7), ('user__username', 20), ('phone_number', 16), ('address', 40), ('updated_at', 19),
+    ], farm=None),
+    'farms': Table(Farm, [
+        ('id', 7), ('user__username', 16), ('farm_name', 28), ('crop_type', 14), ('area', 10), ('area_unit', 9), ('start_date', 10),
+    ], farm='id', date_field='start_date'),
+    'todos': Table(TodoList, [
+        ('id', 7), ('user__username', 16), ('farm__farm_name', 24), ('task', 32), ('priority', 8), ('completed', 9), ('due_date', 10),
+    ], date_field='due_date', completed=True),
+    'expenses': Table(Expense, [
+        ('id', 8), ('user__username', 16), ('farm__farm_name', 24), ('category', 12), ('amount', 12), ('date', 10), ('description', 30),
+    ], date_field='date'),
+    'incomes': Table(Income, [
+        ('id', 8), ('user__username', 16), ('farm__farm_name', 24), ('category', 18), ('amount', 12), ('date', 10), ('description', 30),
+    ], date_field='date'),
+    'budgets': Table(Budget, [
+        ('id', 7), ('user__username', 16), ('farm__farm_name', 24), ('category', 12), ('allocated_amount', 16), ('period', 9),
+        ('start_date', 10), ('end_date', 10),
+    ], date_field='start_date'),
+    'stages': Table(CropStage, [
+        ('id', 7), ('user__username', 16), ('farm__farm_name', 24), ('stage_name', 16), ('start_date', 10), ('end_date', 10),
+        ('completed', 9),
+    ], date_field='start_date', completed=True),
+    'events': Table(CropCalendar, [
+        ('id', 7), ('user__username', 16), ('farm__farm_name', 24), ('event_type', 16), ('date', 10), ('reminder_days', 13),
+        ('completed', 9),
+    ], date_field='date', completed=True),
+    'schedule-templates': Table(ScheduleTemplate, [
+        ('id', 5), ('name', 30), ('crop_type', 16), ('created_at', 19),
+    ], user=None, farm=None),
+    'schedule-stages': Table(ScheduleTemplateStage, [
+        ('id', 6), ('template__name', 30), ('stage_name', 16), ('offset_days', 11), ('duration_days', 13),
+    ], user=None, farm=None),
+    'schedule-events': Table(ScheduleTemplateEvent, [
+        ('id', 6), ('template__name', 30), ('event_type', 16), ('offset_days', 11), ('repeat_every_days', 17), ('occurrences', 11),
+    ], user=None, farm=None),
+    'search-entries': Table(SearchEntry, [
+        ('id', 8), ('user__username', 16), ('kind', 8), ('object_id', 9), ('title', 40), ('updated_at', 19),
+    ], farm=None),
+    'slow-queries': Table(SlowQuery, [
+        ('id', 7), ('recorded_at', 19), ('view_name', 24), ('duration_ms', 11), ('sql', 60),
+    ], user=None, farm=None, date_field='recorded_at'),
+    'conversations': Table(Conversation, [
+        ('id', 7), ('user__username', 16), ('summarized_through', 18), ('created_at', 19), ('updated_at', 19), ('summary', 40),
+    ], farm=None, date_field='updated_at'),
+    'chat-messages': Table(ChatMessage, [
+        ('id', 8), ('conversation_id', 12), ('conversation__user__username', 16), ('role', 9), ('tokens', 6),
+        ('created_at', 19), ('content', 40),
+    ], user='conversation__user__username', farm=None, date_field='created_at'),
+    'jobs': Table(Job, [
+        ('id', 7), ('kind', 16), ('user__username', 16), ('status', 9), ('priority', 8), ('attempts', 8),
+        ('created_at', 19), ('finished_at', 19), ('error', 30),
+    ], farm=None, date_field='created_at'),
+}
+
+
+def _add_unlisted_models():
+    """Models added later still get a plain listing: their first few columns, no filters"""
+    listed = {table.model for table in TABLES.values()}
+    for model in apps.get_app_config('home').get_models():
+        if model not in listed:
+            fields = [field for field in model._meta.concrete_fields if not field.is_relation][:7]
+            columns = [(field.attname, 19 if field.get_internal_type() == 'DateTimeField' else 16) for field in fields]
+            TABLES[model._meta.model_name] = Table(model, columns, user=None, farm=None)
+
+
+_add_unlisted_models()
+
+
+def _date(value):
+    try:
+        return date.fromisoformat(value)
+    except ValueError:
+        raise CommandError(f'Invalid date "{value}" (expected YYYY-MM-DD)')
+
+
+def _cell(value, width):
+    if value is None:
+        text = '-'
+    elif hasattr(value, 'strftime') and hasattr(value, 'hour'):
+        text = value.strftime('%Y-%m-%d %H:%M:%S')
+    elif isinstance(value, Decimal):
+        text = f'{value:.2f}'
+    else:
+        text = ' '.join(str(value).split())
+    return text if len(text) <= width else text[:width - 1] + '~'
+
+
+class Command(BaseCommand):
+    help = 'List any portal model page by page, with filters, or show aggregate statistics'
+
+    def add_arguments(self, parser):
+        parser.add_argument('table', nargs='?', choices=sorted(TABLES), help='What to list (omit to see the choices)')
+        parser.add_argument('--limit', type=int, default=25, help='Rows per page')
+        parser.add_argument('--after', type=int, default=0, help='Start after this id (keyset pagination)')
+        parser.add_argument('--all', action='store_true', help='Stream every matching row, page by page')
+        parser.add_argument('--user', help='Only rows owned by this username')
+        parser.add_argument('--farm', type=int, help='Only rows of this farm id')
+        parser.add_argument('--since', type=_date, help='Date field on or after (YYYY-MM-DD)')
+        parser.add_argument('--until', type=_date, help='Date field on or before (YYYY-MM-DD)')
+        status = parser.add_mutually_exclusive_group()
+        status.add_argument('--open', action='store_true', help='Only rows not completed')
+        status.add_argument('--completed', action='store_true', help='Only completed rows')
+        parser.add_argument('--stats', action='store_true', help='Aggregate statistics instead of rows')
+        parser.add_argument('--top', type=int, default=10, help='Groups shown per statistic')
+
+    def handle(self, *args, **options):
+        if options['stats']:
+            return self.stats(options)
+        if not options['table']:
+            self.stdout.write('Tables: ' + ', '.join(sorted(TABLES)))
+            self.stdout.write('Run with a table name to list rows, or --stats for aggregates.')
+            return
+        self.list_rows(TABLES[options['table']], options)
+
+    def filtered(self, table, options):
+        queryset = table.model.objects.all()
+        for option, lookup in [('user', table.user), ('farm', table.farm)]:
+            if options[option] is not None:
+                if lookup is None:
+                    raise CommandError(f'--{option} does not apply to {options["table"]}')
+                queryset = queryset.filter(**{lookup: options[option]})
+        for option, suffix in [('since', 'gte'), ('until', 'lte')]:
+            if options[option] is not None:
+                if table.date_field is None:
+                    raise CommandError(f'--{option} does not apply to {options["table"]}')
+                queryset = queryset.filter(**{f'{table.date_field}__{suffix}': options[option]})
+        if options['open'] or options['completed']:
+            if not table.completed:
+                raise CommandError(f'--open/--completed do not apply to {options["table"]}')
+            queryset = queryset.filter(completed=options['completed'])
+        return queryset
+
+    def list_rows(self, table, options):
+        lookups = [lookup for lookup, _ in table.columns]
+        widths = [width for _, width in table.columns]
+        queryset = self.filtered(table, options).order_by('id').values_list(*lookups)
+
+        header = '  '.join(lookup.split('__')[-1].upper()[:width].ljust(width) for lookup, width in table.columns)
+        self.stdout.write(header)
+        self.stdout.write('-' * len(header))
+
+        after = options['after']
+        shown = 0
+        while True:
+            page = list(queryset.filter(id__gt=after)[:options['limit']])
+            for row in page:
+                self.stdout.write('  '.join(_cell(value, width).ljust(width) for value, width in zip(row, widths)).rstrip())
+            shown += len(page)
+            if page:
+                after = page[-1][0]
+            if not options['all'] or len(page) < options['limit']:
+                break
+
+        if len(page) == options['limit'] and not options['all']:
+            self.stdout.write(f'\n{shown} row(s). Next page: --after {after}')
+        else:
+            self.stdout.write(f'\n{shown} row(s), end of results.')
+
+    def stats(self, options):
+        top = options['top']
+        username = options['user']
+
+        def scoped(model, lookup='user__username'):
+            queryset = model.objects.all()
+            return queryset.filter(**{lookup: username}) if username else queryset
+
+        self.section('Row counts' + (f' for {username}' if username else ''))
+        for name, table in TABLES.items():
+            if username and table.user is None:
+                continue
+            queryset = scoped(table.model, table.user) if table.user else table.model.objects.all()
+            self.stdout.write(f'  {name:<20} {queryset.count():>12,}')
+
+        if not username:
+            self.group('Farms per user', Farm.objects.values_list('user__username').annotate(n=Count('id')).order_by('-n'), top)
+        self.group('Farms by crop type', scoped(Farm).values_list('crop_type').annotate(n=Count('id')).order_by('-n'), top)
+        self.group('Todos by status', scoped(TodoList).values_list('completed').annotate(n=Count('id')).order_by('completed'), top)
+        self.group('Todos by priority', scoped(TodoList).values_list('priority').annotate(n=Count('id')).order_by('-priority'), top)
+        self.group(
+            'Expenses by category (count, total)',
+            scoped(Expense).values_list('category').annotate(n=Count('id'), total=Sum('amount')).order_by('-total'), top,
+        )
+        self.group(
+            'Incomes by category (count, total)',
+            scoped(Income).values_list('category').annotate(n=Count('id'), total=Sum('amount')).order_by('-total'), top,
+        )
+        self.group(
+            'Budgets by period (count, allocated)',
+            scoped(Budget).values_list('period').annotate(n=Count('id'), total=Sum('allocated_amount')).order_by('-total'), top,
+        )
+        self.group(
+            'Crop stages by stage (count, completed)',
+            scoped(CropStage).values_list('stage_name').annotate(n=Count('id'), done=Count('id', filter=Q(completed=True))).order_by('-n'),
+            top,
+        )
+        self.group(
+            'Calendar events by type (count, completed)',
+            scoped(CropCalendar).values_list('event_type').annotate(n=Count('id'), done=Count('id', filter=Q(completed=True))).order_by('-n'),
+            top,
+        )
+
+    def section(self, title):
+        self.stdout.write(f'\n{title}')
+        self.stdout.write('-' * len(title))
+
+    def group(self, title, rows, top):
+        self.section(title)
+        for key, *values in rows[:top]:
+            self.stdout.write(f'  {_cell(key, 24):<24} ' + ' '.join(f'{_cell(value, 16):>16}' for value in values))
+
@@ -0,0 +1,344 @@
+"""
+Concurrent load test against a locally started server.
+
+Creates a throwaway test database (a file for SQLite, so connections lock
+each other as they would in production), fills it with synthetic users,
+starts a threaded WSGI server with a bounded number of worker threads and
+lets --clients virtual users log in and replay a weighted traffic mix for
+--duration seconds. The chatbot is backed by the fake LLM (home/llm.py)
+so upstream latency is simulated without calling Gemini.
+
+Examples:
+    python manage.py loadtest --clients 20 --duration 30
+    python manage.py loadtest --server-threads 4 --llm-latency-ms 2000 --mix dashboard=60,chatbot=40
+    python manage.py loadtest --json loadtest.json
+
+Reports throughput, p50/p95/p99 latency and error rate per endpoint. Chatbot
+429s from the rate limits (home/ratelimit.py) are counted separately, not as
+errors.
+"""
+
+import json
+import logging
+import math
+import os
+import random
+import tempfile
+import threading
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+from collections import defaultdict
+from datetime import date
+from http.cookiejar import CookieJar
+
+from django.core.cache import cache
+from django.core.management.base import BaseCommand, CommandError
+from django.core.servers.basehttp import ThreadedWSGIServer, WSGIRequestHandler
+from django.core.wsgi import get_wsgi_application
+from django.db import connection
+from django.test.utils import override_settings
+
+from home import llm
+from home.caching import BENCHMARK_CACHES
+from home.models import Farm, TodoList
+from home.synthetic import SYNTHETIC_PASSWORD, generate
+
+# Endpoint -> relative weight of the default traffic mix
+DEFAULT_MIX = {
+    'dashboard': 40,
+    'financial_overview': 10,
+    'crop_calendar': 10,
+    'add_expense': 15,
+    'toggle_todo': 15,
+    'chatbot': 10,
+}
+
+CHAT_QUESTIONS = [
+    'When should I irrigate wheat?',
+    'How do I improve soil organic matter?',
+    'What fertilizer schedule suits tomato?',
+    'How can I control aphids organically?',
+]
+
+
+class BoundedThreadedWSGIServer(ThreadedWSGIServer):
+    """ThreadedWSGIServer that serves at most `max_threads` requests at a time, like a fixed worker pool"""
+
+    def __init__(self, *args, max_threads=8, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.slots = threading.BoundedSemaphore(max_threads)
+
+    def process_request(self, request, client_address):
+        self.slots.acquire()
+        super().process_request(request, client_address)
+
+    def process_request_thread(self, request, client_address):
+        try:
+            super().process_request_thread(request, client_address)
+        finally:
+            self.slots.release()
+
+
+class QuietRequestHandler(WSGIRequestHandler):
+
+    def log_message(self, format, *args):
+        pass
+
+
+class NoRedirect(urllib.request.HTTPRedirectHandler):
+
+    def redirect_request(self, req, fp, code, msg, headers, newurl):
+        return None
+
+
+class VirtualUser:
+    """One logged-in browser session replaying the traffic mix"""
+
+    def __init__(self, base_url, username, farm_ids, todo_ids, rng):
+        self.base_url = base_url
+        self.username = username
+        self.farm_ids = farm_ids
+        self.todo_ids = todo_ids
+        self.rng = rng
+        self.cookies = CookieJar()
+        self.opener = urllib.request.build_opener(urllib.request.HTTPCookieProcessor(self.cookies), NoRedirect)
+
+    def csrf_token(self):
+        for cookie in self.cookies:
+            if cookie.name == 'csrftoken':
+                return cookie.value
+        return ''
+
+    def request(self, path, data=None, headers=None):
+        """Return the HTTP status; redirects are returned, not followed"""
+        request = urllib.request.Request(self.base_url + path, data=data, headers=headers or {})
+        try:
+            with self.opener.open(request, timeout=60) as response:
+                response.read()
+                return response.status
+        except urllib.error.HTTPError as e:
+            e.read()
+            return e.code
+
+    def post_form(self, path, fields):
+        fields = dict(fields, csrfmiddlewaretoken=self.csrf_token())
+        return self.request(path, urllib.parse.urlencode(fields).encode(), {'Referer': self.base_url + path})
+
+    def login(self):
+        self.request('/login/')
+        status = self.post_form('/login/', {'username': self.username, 'password': SYNTHETIC_PASSWORD})
+        if status != 302:
+            raise CommandError(f'Login failed for {self.username} (HTTP {status})')
+
+    def perform(self, endpoint):
+        if endpoint == 'dashboard':
+            return self.request('/dashboard/')
+        if endpoint == 'financial_overview':
+            return self.request('/financial/')
+        if endpoint == 'crop_calendar':
+            return self.request('/crop-calendar/')
+        if endpoint == 'add_expense':
+            return self.post_form('/expenses/add/', {
+                'farm': self.rng.choice(self.farm_ids),
+                'category': 'fuel',
+                'amount': f'{self.rng.randint(100, 5000)}.00',
+                'description': 'Load test expense',
+                'date': date.today().isoformat(),
+            })
+        if endpoint == 'toggle_todo':
+            return self.request(f'/todo/toggle/{self.rng.choice(self.todo_ids)}/')
+        if endpoint == 'chatbot':
+            body = json.dumps({'message': self.rng.choice(CHAT_QUESTIONS)}).encode()
+            return self.request('/chatbot/query/', body, {
+                'Content-Type': 'application/json',
+                'X-CSRFToken': self.csrf_token(),
+            })
+        raise ValueError(endpoint)
+
+
+def percentile(sorted_values, fraction):
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return 0.0
+    rank = math.ceil(fraction * len(sorted_values))
+    return sorted_values[max(rank, 1) - 1]
+
+
+def parse_mix(value):
+    mix = {}
+    for part in value.split(','):
+        name, _, weight = part.partition('=')
+        name = name.strip()
+        if name not in DEFAULT_MIX:
+            raise CommandError(f'Unknown endpoint "{name}" in --mix (known: {", ".join(DEFAULT_MIX)})')
+        try:
+            mix[name] = float(weight)
+        except ValueError:
+            raise CommandError(f'Invalid weight for "{name}" in --mix')
+    return mix
+
+
+class Command(BaseCommand):
+    help = 'Replay a concurrent traffic mix against a local server and report latency percentiles'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--clients', type=int, default=20, help='Concurrent virtual users')
+        parser.add_argument('--duration', type=float, default=30.0, help='Seconds of load after login')
+        parser.add_argument('--server-threads', type=int, default=8, help='Requests the server handles at once')
+        parser.add_argument('--users', type=int, default=10, help='Synthetic accounts shared by the clients')
+        parser.add_argument('--farms-per-user', type=int, default=5)
+        parser.add_argument('--years', type=int, default=1)
+        parser.add_argument('--llm-latency-ms', type=int, default=800, help='Delay of the fake LLM')
+        parser.add_argument('--think-ms', type=int, default=0, help='Pause between a client\'s requests')
+        parser.add_argument('--mix', type=parse_mix, default=DEFAULT_MIX, help='e.g. dashboard=40,chatbot=10')
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--json', help='Also write the report to this file')
+
+    def handle(self, *args, **options):
+        test_db_file = None
+        if connection.vendor == 'sqlite':
+            # A real file so server threads use separate connections and SQLite's locking
+            fd, test_db_file = tempfile.mkstemp(prefix='loadtest-', suffix='.sqlite3')
+            os.close(fd)
+            connection.settings_dict['TEST']['NAME'] = test_db_file
+
+        old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True)
+        try:
+            with override_settings(CACHES=BENCHMARK_CACHES, CHATBOT_LLM_BACKEND='fake', CHATBOT_FAKE_LATENCY_MS=options['llm_latency_ms']):
+                llm.reset_client()
+                cache.clear()
+                self.stdout.write('Generating synthetic data...')
+                generate(
+                    users=options['users'], farms_per_user=options['farms_per_user'],
+                    years=options['years'], seed=options['seed'], index=True,
+                )
+                report = self.run_load(options)
+        finally:
+            llm.reset_client()
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+            if test_db_file and os.path.exists(test_db_file):
+                os.remove(test_db_file)
+
+        self.print_report(report)
+        if options['json']:
+            with open(options['json'], 'w') as f:
+                json.dump(report, f, indent=2)
+            self.stdout.write(f'Report written to {options["json"]}')
+
+    def run_load(self, options):
+        from django.contrib.auth.models import User
+
+        accounts = []
+        for user in User.objects.filter(username__startswith='synth').order_by('id'):
+            farm_ids = list(Farm.objects.filter(user=user).values_list('id', flat=True))
+            todo_ids = list(TodoList.objects.filter(user=user).values_list('id', flat=True))
+            accounts.append((user.username, farm_ids, todo_ids))
+        connection.close()
+
+        server = BoundedThreadedWSGIServer(
+            ('127.0.0.1', 0), QuietRequestHandler, allow_reuse_address=False,
+            max_threads=options['server_threads'],
+        )
+        server.set_app(get_wsgi_application())
+        # get_wsgi_application() re-runs logging setup; per-request perf lines would drown the report
+        logging.getLogger('home.perf').setLevel(logging.ERROR)
+        server_thread = threading.Thread(target=server.serve_forever, daemon=True)
+        server_thread.start()
+        base_url = f'http://127.0.0.1:{server.server_address[1]}'
+        self.stdout.write(
+            f'Server on {base_url} with {options["server_threads"]} worker threads; '
+            f'{options["clients"]} clients for {options["duration"]:.0f}s'
+        )
+
+        endpoints = list(options['mix'])
+        weights = [options['mix'][name] for name in endpoints]
+        latencies = defaultdict(list)
+        errors = defaultdict(int)
+        limited = defaultdict(int)
+        lock = threading.Lock()
+        ready = threading.Barrier(options['clients'] + 1)
+        think = options['think_ms'] / 1000
+        window = {}
+
+        def client(number):
+            username, farm_ids, todo_ids = accounts[number % len(accounts)]
+            user = VirtualUser(base_url, username, farm_ids, todo_ids, random.Random(options['seed'] + number))
+            try:
+                user.login()
+            finally:
+                ready.wait()
+            while time.perf_counter() < window['end']:
+                endpoint = user.rng.choices(endpoints, weights)[0]
+                start = time.perf_counter()
+                try:
+                    status = user.perform(endpoint)
+                    failed = status >= 400 and status != 429
+                except OSError:
+                    status, failed = None, True
+                elapsed = time.perf_counter() - start
+                with lock:
+                    latencies[endpoint].append(elapsed)
+                    if failed:
+                        errors[endpoint] += 1
+                    if status == 429:
+                        limited[endpoint] += 1
+                if think:
+                    time.sleep(think)
+
+        window['end'] = float('inf')
+        threads = [threading.Thread(target=client, args=(n,), daemon=True) for n in range(options['clients'])]
+        for thread in threads:
+            thread.start()
+        ready.wait()
+        started = time.perf_counter()
+        window['end'] = started + options['duration']
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - started
+
+        server.shutdown()
+        server.server_close()
+        return self.build_report(latencies, errors, limited, elapsed, options)
+
+    def build_report(self, latencies, errors, limited, elapsed, options):
+        report = {
+            'clients': options['clients'],
+            'server_threads': options['server_threads'],
+            'llm_latency_ms': options['llm_latency_ms'],
+            'duration_s': round(elapsed, 2),
+            'endpoints': {},
+        }
+        all_latencies = []
+        for endpoint, values in sorted(latencies.items()):
+            values.sort()
+            all_latencies.extend(values)
+            report['endpoints'][endpoint] = self.summarise(values, errors[endpoint], limited[endpoint], elapsed)
+        all_latencies.sort()
+        report['total'] = self.summarise(all_latencies, sum(errors.values()), sum(limited.values()), elapsed)
+        return report
+
+    def summarise(self, values, error_count, limited_count, elapsed):
+        return {
+            'requests': len(values),
+            'errors': error_count,
+            'error_rate': round(error_count / len(values), 4) if values else 0.0,
+            'rate_limited': limited_count,
+            'throughput_rps': round(len(values) / elapsed, 2) if elapsed else 0.0,
+            'p50_ms': round(percentile(values, 0.50) * 1000, 1),
+            'p95_ms': round(percentile(values, 0.95) * 1000, 1),
+            'p99_ms': round(percentile(values, 0.99) * 1000, 1),
+            'max_ms': round(values[-1] * 1000, 1) if values else 0.0,
+        }
+
+    def print_report(self, report):
+        header = f'{"endpoint":<20} {"reqs":>7} {"err%":>6} {"429s":>6} {"req/s":>8} {"p50 ms":>9} {"p95 ms":>9} {"p99 ms":>9} {"max ms":>9}'
+        self.stdout.write('\n' + header)
+        self.stdout.write('-' * len(header))
+        rows = list(report['endpoints'].items()) + [('TOTAL', report['total'])]
+        for name, row in rows:
+            self.stdout.write(
+                f'{name:<20} {row["requests"]:>7} {row["error_rate"] * 100:>5.1f}% {row["rate_limited"]:>6} {row["throughput_rps"]:>8.1f} '
+                f'{row["p50_ms"]:>9.1f} {row["p95_ms"]:>9.1f} {row["p99_ms"]:>9.1f} {row["max_ms"]:>9.1f}'
+            )
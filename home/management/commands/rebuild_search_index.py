@@ -0,0 +1,22 @@
+"""
+Rebuild the full-text search index from scratch.
+
+The index is kept up to date on save and delete; run this after bulk
+imports that bypass model signals, or once after migrating an existing
+database.
+"""
+
+from django.core.management.base import BaseCommand
+
+from home.search import REBUILD_BATCH_SIZE, rebuild_index
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the search index for farms, tasks, transactions and crop notes'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=REBUILD_BATCH_SIZE)
+
+    def handle(self, *args, **options):
+        rebuild_index(batch_size=options['batch_size'], stdout=self.stdout)
+        self.stdout.write(self.style.SUCCESS('Search index rebuilt'))
@@ -0,0 +1,82 @@
+"""
+Run background jobs from the database queue (home/jobs.py).
+
+    python manage.py run_jobs                              # JOB_WORKER_POOL x JOB_WORKER_CONCURRENCY
+    python manage.py run_jobs --pool process --concurrency 4
+    python manage.py run_jobs --kind financial_report --burst
+
+Threads suit jobs that mostly wait on the database or disk. Processes
+sidestep the GIL for CPU-heavy report building. Either way, SIGTERM or
+Ctrl-C lets running jobs finish before the worker exits. While waiting, the
+main process also requeues jobs whose worker died.
+"""
+
+import multiprocessing
+import signal
+import threading
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import connections
+
+from home.jobs import HANDLERS, requeue_stale, work, worker_name
+
+
+def _process_main(number, stop, kinds, poll_interval, burst):
+    # The parent turns Ctrl-C into `stop`; do not abort a job half-way
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    work(worker_name(f':p{number}'), stop, kinds, poll_interval, burst)
+
+
+class Command(BaseCommand):
+    help = 'Run queued background jobs with a thread or process pool'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--pool', choices=['thread', 'process'], default=None)
+        parser.add_argument('--concurrency', type=int, default=None, help='Worker threads or processes')
+        parser.add_argument('--kind', action='append', dest='kinds', choices=sorted(HANDLERS), help='Only these kinds (repeatable)')
+        parser.add_argument('--poll-interval', type=float, default=None, help='Seconds between polls of an empty queue')
+        parser.add_argument('--burst', action='store_true', help='Exit once no job is due')
+
+    def handle(self, *args, **options):
+        pool = options['pool'] or settings.JOB_WORKER_POOL
+        concurrency = options['concurrency'] or settings.JOB_WORKER_CONCURRENCY
+        poll_interval = options['poll_interval'] or settings.JOB_POLL_INTERVAL
+        worker_args = (options['kinds'], poll_interval, options['burst'])
+
+        requeued = requeue_stale()
+        if requeued:
+            self.stdout.write(f'Requeued {requeued} job(s) left running by a lost worker')
+
+        if pool == 'process':
+            # Forked children must not share the parent's database connections
+            connections.close_all()
+            context = multiprocessing.get_context('fork')
+            stop = context.Event()
+            workers = [
+                context.Process(target=_process_main, args=(number, stop) + worker_args, name=f'job-worker-{number}')
+                for number in range(concurrency)
+            ]
+        else:
+            stop = threading.Event()
+            workers = [
+                threading.Thread(target=work, args=(worker_name(f':t{number}'), stop) + worker_args, name=f'job-worker-{number}')
+                for number in range(concurrency)
+            ]
+
+        def shut_down(signum, frame):
+            self.stdout.write('Stopping after the running jobs finish...')
+            stop.set()
+
+        signal.signal(signal.SIGTERM, shut_down)
+        signal.signal(signal.SIGINT, shut_down)
+        self.stdout.write(f'Running jobs with {concurrency} {pool} worker(s)')
+        for worker in workers:
+            worker.start()
+
+        while any(worker.is_alive() for worker in workers):
+            for worker in workers:
+                worker.join(timeout=settings.JOB_LOCK_TIMEOUT / 4 / len(workers))
+            if not stop.is_set():
+                requeue_stale()
+        connections.close_all()
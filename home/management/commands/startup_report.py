@@ -0,0 +1,90 @@
+"""
+Measure cold versus warm start in fresh processes.
+
+Each mode runs in its own subprocess, so nothing is imported or compiled
+beforehand. The subprocess first runs django.setup(), as the WSGI handler
+does. In "warm" mode it then runs home.warmup.warm_up() and reports its
+phases. Both modes then time the first request to each --path (anonymous,
+through the test client) and the creation of the chatbot's LLM client.
+
+    python manage.py startup_report                 # cold and warm side by side
+    python manage.py startup_report --path /login/ --path /
+"""
+
+import json
+import os
+import subprocess
+import sys
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+DEFAULT_PATHS = ['/', '/login/']
+
+
+class Command(BaseCommand):
+    help = 'Report warm-start phase timings and first-request latency, cold versus warm'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--path', action='append', dest='paths', help='URL to time (repeatable)')
+        parser.add_argument('--mode', choices=['cold', 'warm'], help='Measure this process only and print JSON')
+
+    def handle(self, *args, **options):
+        paths = options['paths'] or DEFAULT_PATHS
+        if options['mode']:
+            self.stdout.write(json.dumps(self.measure(options['mode'], paths)))
+            return
+
+        results = {mode: self.spawn(mode, paths) for mode in ('cold', 'warm')}
+        warm_phases = results['warm']['phases']
+        self.stdout.write('\nWarm-start phases')
+        for name, phase in warm_phases.items():
+            self.stdout.write(f'  {name:<12} {phase["ms"]:>9.1f} ms  {phase["detail"]}')
+        self.stdout.write(f'  {"total":<12} {sum(p["ms"] for p in warm_phases.values()):>9.1f} ms')
+
+        self.stdout.write(f'\n{"first request":<30} {"cold ms":>9} {"warm ms":>9}')
+        for name in results['cold']['first']:
+            self.stdout.write(
+                f'  {name:<28} {results["cold"]["first"][name]:>9.1f} {results["warm"]["first"][name]:>9.1f}'
+            )
+
+    def spawn(self, mode, paths):
+        command = [sys.executable, os.path.join(settings.BASE_DIR, 'manage.py'), 'startup_report', '--mode', mode]
+        for path in paths:
+            command += ['--path', path]
+        env = dict(os.environ, PERF_LOG_LEVEL='WARNING')
+        completed = subprocess.run(command, capture_output=True, text=True, env=env)
+        if completed.returncode:
+            raise CommandError(f'{mode} run failed:\n{completed.stderr}')
+        return json.loads(completed.stdout.strip().splitlines()[-1])
+
+    def measure(self, mode, paths):
+        from django.test import Client
+        from django.test.utils import setup_test_environment
+
+        from home import llm
+        from home.warmup import warm_up
+
+        setup_test_environment(debug=False)
+        phases = {}
+        if mode == 'warm':
+            phases = {
+                name: {'ms': round(seconds * 1000, 1), 'detail': detail}
+                for name, seconds, detail in warm_up()
+            }
+
+        first = {}
+        client = Client()
+        for path in paths:
+            start = time.perf_counter()
+            client.get(path)
+            first[f'GET {path}'] = round((time.perf_counter() - start) * 1000, 1)
+
+        start = time.perf_counter()
+        try:
+            llm.get_client()
+        except (llm.LLMNotConfigured, ImportError):
+            pass
+        first['chatbot LLM client'] = round((time.perf_counter() - start) * 1000, 1)
+        return {'phases': phases, 'first': first}
@@ -0,0 +1,392 @@
+"""
+In-process metrics registry with a Prometheus text exposition.
+
+Hot-path updates are lock-free: every thread writes into its own shard and
+shards are only merged when metrics are scraped or flushed. The shards of
+threads that have finished are folded into one retired total whenever a new
+thread registers its shard or a snapshot is taken, so servers that start a
+thread per request do not accumulate shards. When
+METRICS_MULTIPROC_DIR is set (e.g. several gunicorn workers), each process
+periodically writes its merged snapshot to its own file in that directory
+with an atomic rename, and the /metrics/ endpoint sums every process file.
+
+Process files are named by pid and start time, so a reused pid never
+overwrites an older process's totals. When a process exits, its file is
+added into metrics-archived.json and removed: gunicorn's child_exit hook does
+this for workers (gunicorn.conf.py), and collect() does it for any other
+process that is no longer running. Counters therefore never go backwards and
+no process is counted twice.
+"""
+
+import atexit
+import bisect
+import json
+import os
+import re
+import threading
+import time
+from contextlib import contextmanager
+
+from django.conf import settings
+
+DEFAULT_LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+ARCHIVE_FILENAME = 'metrics-archived.json'
+PROCESS_FILE_RE = re.compile(r'metrics-(\d+)-\d+\.json')
+
+
+class _Shard:
+    """Per-thread metric values: counters[key] -> float, histograms[key] -> [bucket counts..., sum]"""
+
+    def __init__(self):
+        self.counters = {}
+        self.histograms = {}
+
+
+class Registry:
+
+    def __init__(self):
+        self._local = threading.local()
+        self._shards = {}
+        self._retired = _Shard()
+        self._shards_lock = threading.Lock()
+        self._metrics = {}
+        self._last_flush = time.monotonic()
+        self._filename = None
+        self._filename_pid = None
+
+    # -- definitions -------------------------------------------------------
+
+    def counter(self, name, documentation, labelnames=()):
+        return self._define(Counter, name, documentation, labelnames)
+
+    def histogram(self, name, documentation, labelnames=(), buckets=DEFAULT_LATENCY_BUCKETS):
+        return self._define(Histogram, name, documentation, labelnames, buckets)
+
+    def _define(self, cls, name, documentation, labelnames, *args):
+        if name not in self._metrics:
+            self._metrics[name] = cls(self, name, documentation, tuple(labelnames), *args)
+        return self._metrics[name]
+
+    # -- hot path ----------------------------------------------------------
+
+    def shard(self):
+        shard = getattr(self._local, 'shard', None)
+        if shard is None:
+            shard = self._local.shard = _Shard()
+            with self._shards_lock:
+                self._retire_finished_threads()
+                self._shards[threading.current_thread()] = shard
+        return shard
+
+    def _retire_finished_threads(self):
+        """Fold the shards of threads that have exited into _retired; call with _shards_lock held"""
+        for thread in [thread for thread in self._shards if not thread.is_alive()]:
+            shard = self._shards.pop(thread)
+            _add_shard(self._retired.counters, self._retired.histograms, shard)
+
+    def maybe_flush(self):
+        directory = multiproc_dir()
+        if directory and time.monotonic() - self._last_flush >= settings.METRICS_FLUSH_INTERVAL:
+            self.flush(directory)
+
+    # -- aggregation -------------------------------------------------------
+
+    def snapshot(self):
+        """Merge all thread shards of this process into plain dicts"""
+        counters = {}
+        histograms = {}
+        # Under the lock, so no shard is retired (and counted twice) while it is being read
+        with self._shards_lock:
+            self._retire_finished_threads()
+            for shard in [self._retired, *self._shards.values()]:
+                _add_shard(counters, histograms, shard)
+        return {'counters': counters, 'histograms': histograms}
+
+    def reset(self):
+        """Forget every value; a forked child starts from zero instead of recounting its parent's"""
+        self._local = threading.local()
+        with self._shards_lock:
+            self._shards = {}
+            self._retired = _Shard()
+
+    def process_filename(self):
+        if self._filename_pid != os.getpid():
+            self._filename_pid = os.getpid()
+            self._filename = f'metrics-{self._filename_pid}-{time.time_ns()}.json'
+        return self._filename
+
+    def flush(self, directory):
+        """Write this process's snapshot to its file in the multi-process directory"""
+        self._last_flush = time.monotonic()
+        _write(os.path.join(directory, self.process_filename()), _serialise(self.snapshot()))
+
+    def collect(self):
+        """Snapshot of all processes (or just this one when not multi-process)"""
+        directory = multiproc_dir()
+        if not directory:
+            return self.snapshot()
+
+        self.flush(directory)
+        dead = {
+            int(match.group(1))
+            for match in map(PROCESS_FILE_RE.fullmatch, os.listdir(directory))
+            if match and not _pid_alive(int(match.group(1)))
+        }
+        if dead:
+            archive_processes(dead, directory)
+        totals = {'counters': {}, 'histograms': {}}
+        for filename in os.listdir(directory):
+            if filename == ARCHIVE_FILENAME or PROCESS_FILE_RE.fullmatch(filename):
+                _add(totals, _read(os.path.join(directory, filename)))
+        return totals
+
+    def render(self):
+        """Prometheus text exposition format (version 0.0.4)"""
+        snapshot = self.collect()
+        lines = []
+        for name, metric in sorted(self._metrics.items()):
+            lines.append(f'# HELP {name} {metric.documentation}')
+            lines.append(f'# TYPE {name} {metric.kind}')
+            lines.extend(metric.render(snapshot))
+        return '\n'.join(lines) + '\n'
+
+
+def _format_labels(labelnames, labels, extra=()):
+    pairs = list(zip(labelnames, labels)) + list(extra)
+    if not pairs:
+        return ''
+    escaped = (
+        '{}="{}"'.format(k, str(v).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n'))
+        for k, v in pairs
+    )
+    return '{' + ','.join(escaped) + '}'
+
+
+def _format_value(value):
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+class Counter:
+    kind = 'counter'
+
+    def __init__(self, registry, name, documentation, labelnames):
+        self.registry = registry
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = labelnames
+
+    def inc(self, *labels, amount=1):
+        counters = self.registry.shard().counters
+        key = (self.name, labels)
+        counters[key] = counters.get(key, 0.0) + amount
+        self.registry.maybe_flush()
+
+    def render(self, snapshot):
+        for (name, labels), value in sorted(snapshot['counters'].items()):
+            if name == self.name:
+                yield f'{name}{_format_labels(self.labelnames, labels)} {_format_value(value)}'
+
+
+class Histogram:
+    kind = 'histogram'
+
+    def __init__(self, registry, name, documentation, labelnames, buckets):
+        self.registry = registry
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = labelnames
+        self.buckets = tuple(buckets)
+
+    def observe(self, value, *labels):
+        histograms = self.registry.shard().histograms
+        key = (self.name, labels)
+        values = histograms.get(key)
+        if values is None:
+            # One slot per bucket, one for +Inf, then the running sum
+            values = histograms[key] = [0.0] * (len(self.buckets) + 2)
+        values[bisect.bisect_left(self.buckets, value)] += 1
+        values[-1] += value
+        self.registry.maybe_flush()
+
+    def render(self, snapshot):
+        bounds = list(self.buckets) + [float('inf')]
+        for (name, labels), values in sorted(snapshot['histograms'].items()):
+            if name != self.name:
+                continue
+            cumulative = 0
+            for bound, count in zip(bounds, values):
+                cumulative += count
+                le = _format_labels(self.labelnames, labels, [('le', _format_value(bound))])
+                yield f'{name}_bucket{le} {_format_value(cumulative)}'
+            label_str = _format_labels(self.labelnames, labels)
+            yield f'{name}_sum{label_str} {_format_value(values[-1])}'
+            yield f'{name}_count{label_str} {_format_value(cumulative)}'
+
+
+def multiproc_dir():
+    return settings.METRICS_MULTIPROC_DIR
+
+
+def _serialise(snapshot):
+    return {
+        'counters': [[name, list(labels), value] for (name, labels), value in snapshot['counters'].items()],
+        'histograms': [[name, list(labels), values] for (name, labels), values in snapshot['histograms'].items()],
+    }
+
+
+def _read(path):
+    """A process or archive file as a snapshot; empty if it is missing or half-written"""
+    try:
+        with open(path) as f:
+            data = json.load(f)
+    except (OSError, ValueError):
+        return {'counters': {}, 'histograms': {}}
+    return {
+        'counters': {(name, tuple(labels)): value for name, labels, value in data['counters']},
+        'histograms': {(name, tuple(labels)): values for name, labels, values in data['histograms']},
+    }
+
+
+def _write(path, data):
+    tmp_path = f'{path}.{os.getpid()}.{threading.get_ident()}.tmp'
+    with open(tmp_path, 'w') as f:
+        json.dump(data, f)
+    os.replace(tmp_path, path)
+
+
+def _add_shard(counters, histograms, shard):
+    # list() copies: the owning thread may add keys while this runs
+    for key, value in list(shard.counters.items()):
+        counters[key] = counters.get(key, 0.0) + value
+    for key, values in list(shard.histograms.items()):
+        merged = histograms.get(key)
+        histograms[key] = list(values) if merged is None else [a + b for a, b in zip(merged, values)]
+
+
+def _add(totals, snapshot):
+    counters = totals['counters']
+    histograms = totals['histograms']
+    for key, value in snapshot['counters'].items():
+        counters[key] = counters.get(key, 0.0) + value
+    for key, values in snapshot['histograms'].items():
+        merged = histograms.get(key)
+        histograms[key] = list(values) if merged is None else [a + b for a, b in zip(merged, values)]
+
+
+def _pid_alive(pid):
+    if pid == os.getpid():
+        return True
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass  # exists, owned by someone else
+    return True
+
+
+@contextmanager
+def _archive_lock(directory):
+    try:
+        import fcntl
+    except ImportError:  # no multi-process servers without fcntl anyway
+        yield
+        return
+    with open(os.path.join(directory, '.archive.lock'), 'w') as lock:
+        fcntl.flock(lock, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock, fcntl.LOCK_UN)
+
+
+def archive_processes(pids, directory=None):
+    """Add the files of exited processes into the archive and remove them"""
+    directory = directory or multiproc_dir()
+    if not directory:
+        return
+    pids = set(pids)
+    with _archive_lock(directory):
+        filenames = [
+            filename for filename in os.listdir(directory)
+            if (match := PROCESS_FILE_RE.fullmatch(filename)) and int(match.group(1)) in pids
+        ]
+        if not filenames:
+            return
+        archive_path = os.path.join(directory, ARCHIVE_FILENAME)
+        totals = _read(archive_path)
+        for filename in filenames:
+            _add(totals, _read(os.path.join(directory, filename)))
+        _write(archive_path, _serialise(totals))
+        for filename in filenames:
+            os.remove(os.path.join(directory, filename))
+
+
+registry = Registry()
+
+request_duration = registry.histogram(
+    'farm_http_request_duration_seconds', 'Request latency by URL name', ['view', 'method'],
+)
+requests_total = registry.counter(
+    'farm_http_requests_total', 'Requests by URL name and status class', ['view', 'status'],
+)
+db_queries_total = registry.counter(
+    'farm_db_queries_total', 'Database queries issued by sampled requests', ['view'],
+)
+db_query_seconds_total = registry.counter(
+    'farm_db_query_seconds_total', 'Time spent in SQL by sampled requests', ['view'],
+)
+chatbot_upstream_duration = registry.histogram(
+    'farm_chatbot_upstream_duration_seconds', 'Latency of upstream LLM calls', ['outcome'],
+    buckets=(0.1, 0.25, 0.5, 1.0, 2.0, 4.0, 8.0, 16.0, 32.0),
+)
+chatbot_errors_total = registry.counter(
+    'farm_chatbot_errors_total', 'Failed chatbot requests', ['reason'],
+)
+chatbot_retrieval_duration = registry.histogram(
+    'farm_chatbot_retrieval_duration_seconds', 'Time to select farm records for a chatbot prompt', [],
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25),
+)
+chatbot_prompt_tokens = registry.histogram(
+    'farm_chatbot_prompt_tokens', 'Estimated size of chatbot prompts in tokens', [],
+    buckets=(250, 500, 1000, 1500, 2000, 3000, 4000, 8000),
+)
+chatbot_routed_total = registry.counter(
+    'farm_chatbot_routed_total', 'Chatbot questions by intent route ("llm" when none answered)', ['route'],
+)
+chatbot_route_duration = registry.histogram(
+    'farm_chatbot_route_duration_seconds', 'Time to route and, for local routes, answer a chatbot question', ['route'],
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25),
+)
+chatbot_rejected_total = registry.counter(
+    'farm_chatbot_rejected_total', 'Chatbot requests refused with 429', ['reason'],
+)
+first_request_duration = registry.histogram(
+    'farm_first_request_duration_seconds', 'Latency of the first request each process serves', ['view', 'warm'],
+)
+jobs_total = registry.counter(
+    'farm_jobs_total', 'Background job attempts by outcome', ['kind', 'outcome'],
+)
+job_duration = registry.histogram(
+    'farm_job_duration_seconds', 'Background job run time', ['kind'],
+    buckets=(0.1, 0.5, 1.0, 5.0, 15.0, 60.0, 300.0, 900.0),
+)
+cache_requests_total = registry.counter(
+    'farm_cache_requests_total', 'Application cache lookups', ['result'],
+)
+
+
+os.register_at_fork(after_in_child=registry.reset)
+
+
+@atexit.register
+def _flush_at_exit():
+    directory = multiproc_dir()
+    if directory:
+        try:
+            registry.flush(directory)
+        except OSError:
+            pass
@@ -0,0 +1,337 @@
+import json
+import logging
+import mimetypes
+import os
+import random
+import threading
+import time
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.middleware.gzip import GZipMiddleware
+from django.db import DatabaseError, connection
+from django.http import FileResponse, HttpResponse, HttpResponseNotModified
+from django.urls import reverse
+from django.utils.cache import has_vary_header, patch_vary_headers
+from django.utils.http import http_date
+from django.utils.regex_helper import _lazy_re_compile
+
+try:
+    import brotli
+except ImportError:  # optional: CompressionMiddleware falls back to gzip
+    brotli = None
+
+from . import metrics, perf, slowlog
+
+perf_logger = logging.getLogger('home.perf')
+
+re_accepts_brotli = _lazy_re_compile(r'\bbr\b')
+
+# Media types that are compressed already; recompressing them only costs CPU
+INCOMPRESSIBLE_TYPES = (
+    'image/png', 'image/jpeg', 'image/gif', 'image/webp', 'image/avif',
+    'audio/', 'video/', 'font/woff', 'application/zip', 'application/gzip', 'application/pdf',
+)
+
+
+class PerformanceMiddleware:
+    """
+    Record query count, SQL time, template time and cache hits per request.
+
+    Sampled requests get a Server-Timing header and a structured log line on
+    the 'home.perf' logger; requests over PERF_QUERY_BUDGET queries or
+    PERF_LATENCY_BUDGET_MS milliseconds are logged as warnings. Every request,
+    sampled or not, feeds the latency histograms in home.metrics, and any
+    statement slower than SLOW_QUERY_THRESHOLD_MS is saved by home.slowlog.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.sample_rate = getattr(settings, 'PERF_SAMPLE_RATE', 1.0)
+        self.query_budget = getattr(settings, 'PERF_QUERY_BUDGET', 50)
+        self.latency_budget = getattr(settings, 'PERF_LATENCY_BUDGET_MS', 500) / 1000
+        self.slow_query_threshold = getattr(settings, 'SLOW_QUERY_THRESHOLD_MS', 0)
+        # Per process: with --preload the middleware is built in the master and
+        # every forked worker starts with its own copy of this flag
+        self.first_request_pending = True
+
+    def __call__(self, request):
+        recorder = slowlog.SlowQueryRecorder(self.slow_query_threshold) if self.slow_query_threshold else None
+        with ExitStack() as stack:
+            if recorder is not None:
+                stack.enter_context(connection.execute_wrapper(recorder))
+            response = self.measure(request)
+
+        if recorder is not None and recorder.queries:
+            match = getattr(request, 'resolver_match', None)
+            try:
+                slowlog.save(recorder.queries, match.view_name if match else '', request.path)
+            except DatabaseError:
+                perf_logger.exception('Could not save slow queries')
+        return response
+
+    def measure(self, request):
+        if self.sample_rate < 1.0 and random.random() >= self.sample_rate:
+            start = time.perf_counter()
+            response = self.get_response(request)
+            self.observe(request, response, time.perf_counter() - start)
+            return response
+
+        stats = perf.RequestStats()
+        token = perf.activate(stats)
+        start = time.perf_counter()
+        try:
+            with connection.execute_wrapper(stats.db_wrapper):
+                response = self.get_response(request)
+        finally:
+            perf.deactivate(token)
+        total = time.perf_counter() - start
+
+        match = getattr(request, 'resolver_match', None)
+        stats.view_name = match.view_name if match else None
+
+        response['Server-Timing'] = stats.server_timing(total)
+        self.log(request, response, stats, total)
+        view = self.observe(request, response, total)
+        metrics.db_queries_total.inc(view, amount=stats.queries)
+        metrics.db_query_seconds_total.inc(view, amount=stats.sql_time)
+        return response
+
+    def observe(self, request, response, total):
+        """Feed the aggregate metrics (every request, sampled or not); returns the URL name"""
+        match = getattr(request, 'resolver_match', None)
+        view = (match.url_name or match.view_name) if match else 'unmatched'
+        metrics.request_duration.observe(total, view, request.method)
+        metrics.requests_total.inc(view, f'{response.status_code // 100}xx')
+        if self.first_request_pending:
+            self.first_request_pending = False
+            warm = '1' if settings.WARM_START else '0'
+            metrics.first_request_duration.observe(total, view, warm)
+            perf_logger.info(json.dumps({
+                'event': 'first_request', 'pid': os.getpid(), 'view': view, 'warm': warm,
+                'duration_ms': round(total * 1000, 1),
+            }))
+        return view
+
+    def log(self, request, response, stats, total):
+        record = stats.as_dict(total)
+        record.update(method=request.method, path=request.path, status=response.status_code)
+
+        over_budget = []
+        if stats.queries > self.query_budget:
+            over_budget.append('queries')
+        if total > self.latency_budget:
+            over_budget.append('latency')
+
+        if over_budget:
+            record['over_budget'] = over_budget
+            perf_logger.warning(json.dumps(record))
+        else:
+            perf_logger.info(json.dumps(record))
+
+
+class ProfilingMiddleware:
+    """
+    Run the sampling profiler (home.profiling) for one request on demand.
+
+    Only staff can trigger it, with an `X-Profile: 1` header, a `_profile=1`
+    query parameter or the "profile my requests" switch on the captures page
+    (stored in the session, and flagged by SWITCH_COOKIE). Sits after
+    AuthenticationMiddleware so that request.user is known; everything below
+    it, views and templates included, is sampled.
+
+    request.user and the session are only loaded for requests that carry one
+    of those flags, so ordinary and anonymous traffic pays nothing here.
+    """
+
+    # Only says the switch may be on; the session and is_staff still decide
+    SWITCH_COOKIE = 'profile_requests'
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if not self.should_profile(request):
+            return self.get_response(request)
+
+        from . import profiling
+
+        profiler = profiling.SamplingProfiler(threading.get_ident(), settings.PROFILE_INTERVAL_MS / 1000)
+        profiler.start()
+        start = time.perf_counter()
+        try:
+            response = self.get_response(request)
+        finally:
+            profiler.stop()
+        duration = time.perf_counter() - start
+
+        name = profiling.save_capture(profiler, request, response.status_code, duration)
+        response['X-Profile-Capture'] = name
+        return response
+
+    def should_profile(self, request):
+        requested = request.headers.get('X-Profile') == '1' or request.GET.get('_profile') == '1'
+        if not requested and self.SWITCH_COOKIE not in request.COOKIES:
+            return False
+        user = getattr(request, 'user', None)
+        if user is None or not user.is_staff:
+            return False
+        if request.path.startswith(reverse('profile_index')):
+            return False
+        return requested or request.session.get('profile_requests', False)
+
+
+class StaticFile:
+    """One file under STATIC_ROOT and its precompressed copies"""
+
+    def __init__(self, path, immutable):
+        stat = os.stat(path)
+        self.path = path
+        self.size = stat.st_size
+        self.last_modified = http_date(stat.st_mtime)
+        self.etag = f'"{stat.st_size:x}-{int(stat.st_mtime):x}"'
+        self.content_type = mimetypes.guess_type(path)[0] or 'application/octet-stream'
+        self.immutable = immutable
+        # Accept-Encoding token -> file, best first
+        self.encodings = {
+            encoding: path + suffix
+            for encoding, suffix in (('br', '.br'), ('gzip', '.gz'))
+            if os.path.exists(path + suffix)
+        }
+
+
+class StaticFilesMiddleware:
+    """
+    Serve STATIC_ROOT from the application, without a separate web server or CDN.
+
+    The files written by collectstatic (see home.storage and the build_static
+    command) are indexed once at startup. Content-hashed names listed in the
+    staticfiles manifest are served with a one-year immutable Cache-Control,
+    anything else with STATIC_UNHASHED_MAX_AGE. Precompressed .br/.gz copies
+    are picked by Accept-Encoding. Not used when STATIC_ROOT has not been
+    built; runserver serves static files itself in development.
+    """
+
+    IMMUTABLE_CACHE_CONTROL = 'public, max-age=31536000, immutable'
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.prefix = settings.STATIC_URL if settings.STATIC_URL.startswith('/') else '/' + settings.STATIC_URL
+        self.files = self.index(settings.STATIC_ROOT) if settings.STATIC_ROOT else {}
+        if not self.files:
+            raise MiddlewareNotUsed
+        self.unhashed_cache_control = f'public, max-age={settings.STATIC_UNHASHED_MAX_AGE}'
+
+    def index(self, root):
+        if not os.path.isdir(root):
+            return {}
+        manifest = os.path.join(root, 'staticfiles.json')
+        hashed = set()
+        if os.path.exists(manifest):
+            with open(manifest) as handle:
+                hashed = set(json.load(handle).get('paths', {}).values())
+
+        files = {}
+        for directory, _, names in os.walk(root):
+            for name in names:
+                if name.endswith(('.gz', '.br')):
+                    continue
+                path = os.path.join(directory, name)
+                relative = os.path.relpath(path, root).replace(os.sep, '/')
+                files[self.prefix + relative] = StaticFile(path, relative in hashed)
+        return files
+
+    def __call__(self, request):
+        static_file = self.files.get(request.path_info) if request.method in ('GET', 'HEAD') else None
+        if static_file is None:
+            return self.get_response(request)
+        return self.serve(request, static_file)
+
+    def serve(self, request, static_file):
+        accepted = request.headers.get('Accept-Encoding', '')
+        encoding = next((name for name in static_file.encodings if name in accepted), None)
+        path = static_file.encodings[encoding] if encoding else static_file.path
+        etag = f'{static_file.etag[:-1]}-{encoding}"' if encoding else static_file.etag
+
+        if request.headers.get('If-None-Match') == etag:
+            response = HttpResponseNotModified()
+        elif request.method == 'HEAD':
+            response = HttpResponse(content_type=static_file.content_type)
+            response['Content-Length'] = os.path.getsize(path)
+        else:
+            response = FileResponse(open(path, 'rb'), content_type=static_file.content_type)
+            response.headers.pop('Content-Disposition', None)
+        if encoding and response.status_code == 200:
+            response['Content-Encoding'] = encoding
+        response['ETag'] = etag
+        response['Last-Modified'] = static_file.last_modified
+        response['Cache-Control'] = self.IMMUTABLE_CACHE_CONTROL if static_file.immutable else self.unhashed_cache_control
+        if static_file.encodings:
+            patch_vary_headers(response, ['Accept-Encoding'])
+        return response
+
+
+class CompressionMiddleware(GZipMiddleware):
+    """
+    GZipMiddleware that answers with Brotli when the client accepts it and
+    the optional brotli package is installed.
+
+    Streaming responses are compressed chunk by chunk, never buffered.
+    Responses that already carry a Content-Encoding, such as the precompressed
+    files from StaticFilesMiddleware, and already-compressed media types are
+    left alone.
+
+    Brotli has no equivalent of the random-length gzip filename that
+    GZipMiddleware adds against BREACH (max_random_bytes). Responses that set
+    the CSRF cookie or vary on Cookie may hold the CSRF token or the user's
+    data, so they get GZipMiddleware's padded gzip instead.
+    """
+
+    def process_response(self, request, response):
+        if response.get('Content-Type', '').startswith(INCOMPRESSIBLE_TYPES):
+            return response
+        accepts_brotli = re_accepts_brotli.search(request.META.get('HTTP_ACCEPT_ENCODING', ''))
+        if (
+            brotli is None or not accepts_brotli or (response.streaming and response.is_async)
+            or self.may_hold_secrets(response)
+        ):
+            return super().process_response(request, response)
+        if not response.streaming and len(response.content) < 200:
+            return response
+        if response.has_header('Content-Encoding'):
+            return response
+
+        patch_vary_headers(response, ('Accept-Encoding',))
+        if response.streaming:
+            response.streaming_content = self.compress_sequence(response.streaming_content)
+            del response.headers['Content-Length']
+        else:
+            compressed = brotli.compress(response.content)
+            if len(compressed) >= len(response.content):
+                return response
+            response.content = compressed
+            response.headers['Content-Length'] = str(len(response.content))
+
+        # The body differs from the uncompressed one, so a strong ETag must become weak
+        etag = response.get('ETag')
+        if etag and etag.startswith('"'):
+            response.headers['ETag'] = 'W/' + etag
+        response.headers['Content-Encoding'] = 'br'
+        return response
+
+    @staticmethod
+    def may_hold_secrets(response):
+        return settings.CSRF_COOKIE_NAME in response.cookies or has_vary_header(response, 'Cookie')
+
+    @staticmethod
+    def compress_sequence(sequence):
+        compressor = brotli.Compressor()
+        for chunk in sequence:
+            data = compressor.process(chunk)
+            if data:
+                yield data
+            data = compressor.flush()
+            if data:
+                yield data
+        yield compressor.finish()
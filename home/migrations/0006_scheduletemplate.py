@@ -0,0 +1,59 @@
+# Generated by Django 4.2.30 on 2026-10-19 12:02
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('home', '0005_cropcalendar_cropstage'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ScheduleTemplate',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=200)),
+                ('crop_type', models.CharField(db_index=True, help_text='Crop type this schedule is written for', max_length=200)),
+                ('description', models.TextField(blank=True, null=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name_plural': 'Schedule Templates',
+                'ordering': ['crop_type', 'name'],
+            },
+        ),
+        migrations.CreateModel(
+            name='ScheduleTemplateStage',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('stage_name', models.CharField(choices=[('preparation', 'Land Preparation'), ('planting', 'Planting'), ('germination', 'Germination'), ('vegetative', 'Vegetative Growth'), ('flowering', 'Flowering'), ('fruiting', 'Fruiting'), ('maturation', 'Maturation'), ('harvesting', 'Harvesting'), ('post_harvest', 'Post-Harvest')], max_length=50)),
+                ('offset_days', models.PositiveIntegerField(default=0, help_text='Days after the farm start date')),
+                ('duration_days', models.PositiveIntegerField(blank=True, help_text='Leave empty for an open-ended stage', null=True)),
+                ('notes', models.TextField(blank=True, null=True)),
+                ('template', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='stages', to='home.scheduletemplate')),
+            ],
+            options={
+                'ordering': ['offset_days', 'id'],
+            },
+        ),
+        migrations.CreateModel(
+            name='ScheduleTemplateEvent',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('event_type', models.CharField(choices=[('watering', 'Watering'), ('fertilizing', 'Fertilizing'), ('pest_control', 'Pest Control'), ('weeding', 'Weeding'), ('pruning', 'Pruning'), ('harvesting', 'Harvesting'), ('soil_test', 'Soil Test'), ('irrigation', 'Irrigation'), ('planting', 'Planting'), ('transplanting', 'Transplanting'), ('other', 'Other')], max_length=50)),
+                ('offset_days', models.PositiveIntegerField(default=0, help_text='Days after the farm start date')),
+                ('repeat_every_days', models.PositiveIntegerField(default=0, help_text='Repeat interval in days (0 = one-off event)')),
+                ('occurrences', models.PositiveIntegerField(default=1, help_text='Number of events to create when repeating')),
+                ('reminder_days', models.IntegerField(default=0, help_text='Days before event to send reminder (0 = no reminder)')),
+                ('description', models.TextField(blank=True, null=True)),
+                ('template', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='events', to='home.scheduletemplate')),
+            ],
+            options={
+                'ordering': ['offset_days', 'id'],
+            },
+        ),
+    ]
@@ -0,0 +1,50 @@
+from django.db import migrations, models
+
+
+PRIORITY_RANKS = {'low': 1, 'medium': 2, 'high': 3}
+
+
+def priority_to_rank(apps, schema_editor):
+    TodoList = apps.get_model('home', 'TodoList')
+    for slug, rank in PRIORITY_RANKS.items():
+        TodoList.objects.filter(priority=slug).update(priority_rank=rank)
+
+
+def rank_to_priority(apps, schema_editor):
+    TodoList = apps.get_model('home', 'TodoList')
+    for slug, rank in PRIORITY_RANKS.items():
+        TodoList.objects.filter(priority_rank=rank).update(priority=slug)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('home', '0006_scheduletemplate'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='todolist',
+            name='priority_rank',
+            field=models.PositiveSmallIntegerField(default=2),
+        ),
+        migrations.RunPython(priority_to_rank, rank_to_priority),
+        migrations.RemoveField(
+            model_name='todolist',
+            name='priority',
+        ),
+        migrations.RenameField(
+            model_name='todolist',
+            old_name='priority_rank',
+            new_name='priority',
+        ),
+        migrations.AlterField(
+            model_name='todolist',
+            name='priority',
+            field=models.PositiveSmallIntegerField(choices=[(1, 'Low'), (2, 'Medium'), (3, 'High')], default=2),
+        ),
+        migrations.AddIndex(
+            model_name='todolist',
+            index=models.Index(fields=['user', 'completed', '-priority', 'due_date'], name='home_todo_user_order_idx'),
+        ),
+    ]
@@ -0,0 +1,25 @@
+# Generated by Django 4.2.30 on 2026-10-19 12:06
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('home', '0007_todolist_priority_rank'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='cropcalendar',
+            index=models.Index(condition=models.Q(('completed', False)), fields=['user', 'date'], name='home_event_open_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='cropstage',
+            index=models.Index(condition=models.Q(('completed', False)), fields=['user', 'end_date'], name='home_stage_open_end_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='todolist',
+            index=models.Index(condition=models.Q(('completed', False)), fields=['user', 'due_date'], name='home_todo_open_due_idx'),
+        ),
+    ]
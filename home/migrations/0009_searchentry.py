@@ -0,0 +1,89 @@
+# Generated by Django 4.2.30 on 2026-10-19 12:06
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+SQLITE_FTS_FORWARD = [
+    # FTS5 reads its content through this view, so the owner token never has to be stored twice
+    """CREATE VIEW home_searchentry_fts_source AS
+       SELECT id, title, body, 'u' || user_id AS owner FROM home_searchentry""",
+    """CREATE VIRTUAL TABLE home_searchentry_fts USING fts5(
+       title, body, owner,
+       content='home_searchentry_fts_source', content_rowid='id',
+       tokenize='unicode61 remove_diacritics 2')""",
+    """CREATE TRIGGER home_searchentry_fts_ai AFTER INSERT ON home_searchentry BEGIN
+       INSERT INTO home_searchentry_fts(rowid, title, body, owner)
+       VALUES (new.id, new.title, new.body, 'u' || new.user_id);
+       END""",
+    """CREATE TRIGGER home_searchentry_fts_ad AFTER DELETE ON home_searchentry BEGIN
+       INSERT INTO home_searchentry_fts(home_searchentry_fts, rowid, title, body, owner)
+       VALUES ('delete', old.id, old.title, old.body, 'u' || old.user_id);
+       END""",
+    """CREATE TRIGGER home_searchentry_fts_au AFTER UPDATE ON home_searchentry BEGIN
+       INSERT INTO home_searchentry_fts(home_searchentry_fts, rowid, title, body, owner)
+       VALUES ('delete', old.id, old.title, old.body, 'u' || old.user_id);
+       INSERT INTO home_searchentry_fts(rowid, title, body, owner)
+       VALUES (new.id, new.title, new.body, 'u' || new.user_id);
+       END""",
+]
+
+SQLITE_FTS_REVERSE = [
+    'DROP TRIGGER IF EXISTS home_searchentry_fts_au',
+    'DROP TRIGGER IF EXISTS home_searchentry_fts_ad',
+    'DROP TRIGGER IF EXISTS home_searchentry_fts_ai',
+    'DROP TABLE IF EXISTS home_searchentry_fts',
+    'DROP VIEW IF EXISTS home_searchentry_fts_source',
+]
+
+POSTGRES_FTS_FORWARD = [
+    # Must match the expression used by home.search.PostgresSearchBackend
+    """CREATE INDEX home_searchentry_tsv_idx ON home_searchentry
+       USING GIN (to_tsvector('simple', title || ' ' || body))""",
+]
+
+POSTGRES_FTS_REVERSE = [
+    'DROP INDEX IF EXISTS home_searchentry_tsv_idx',
+]
+
+
+def run_for_vendor(statements):
+    def run(apps, schema_editor):
+        for statement in statements.get(schema_editor.connection.vendor, []):
+            schema_editor.execute(statement)
+    return run
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('home', '0008_attention_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SearchEntry',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('farm', 'Farm'), ('todo', 'Task'), ('expense', 'Expense'), ('income', 'Income'), ('stage', 'Crop Stage'), ('event', 'Calendar Event')], max_length=20)),
+                ('object_id', models.PositiveBigIntegerField()),
+                ('title', models.CharField(max_length=300)),
+                ('body', models.TextField(blank=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='search_entries', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name_plural': 'Search Entries',
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='searchentry',
+            constraint=models.UniqueConstraint(fields=('kind', 'object_id'), name='home_searchentry_unique_object'),
+        ),
+        migrations.RunPython(
+            run_for_vendor({'sqlite': SQLITE_FTS_FORWARD, 'postgresql': POSTGRES_FTS_FORWARD}),
+            run_for_vendor({'sqlite': SQLITE_FTS_REVERSE, 'postgresql': POSTGRES_FTS_REVERSE}),
+        ),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 4.2.30 on 2026-10-19 12:20
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('home', '0010_slowquery'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='budget',
+            index=models.Index(fields=['start_date', 'created_at'], name='home_budget_start_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='cropcalendar',
+            index=models.Index(fields=['date', 'event_type'], name='home_event_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='cropstage',
+            index=models.Index(fields=['start_date', 'stage_name'], name='home_stage_start_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='expense',
+            index=models.Index(fields=['date', 'created_at'], name='home_expense_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='income',
+            index=models.Index(fields=['date', 'created_at'], name='home_income_date_idx'),
+        ),
+    ]
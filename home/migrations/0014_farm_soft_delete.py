@@ -0,0 +1,18 @@
+# Generated by Django 4.2.30 on 2026-10-19 13:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('home', '0013_job'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='farm',
+            name='deleted_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
@@ -0,0 +1,19 @@
+from django.db import migrations
+
+
+def redact_params(apps, schema_editor):
+    # Rows logged before home.slowlog stopped storing bound values
+    SlowQuery = apps.get_model('home', 'SlowQuery')
+    SlowQuery.objects.filter(sql__regex=r'(django_session|auth_user)([^_]|$)').delete()
+    SlowQuery.objects.exclude(params='').update(params='')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('home', '0014_farm_soft_delete'),
+    ]
+
+    operations = [
+        migrations.RunPython(redact_params, migrations.RunPython.noop),
+    ]
@@ -1,5 +1,6 @@
 from django.db import models
 from django.contrib.auth.models import User
+from django.utils import timezone
 
 class UserProfile(models.Model):
     """Additional user details stored separately from auth User."""
@@ -11,6 +12,13 @@ class UserProfile(models.Model):
     def __str__(self):
         return f"Profile of {self.user.username}"
 
+class LiveFarmManager(models.Manager):
+    """Farms that have not been deleted; Farm.all_objects also sees the ones awaiting purge"""
+
+    def get_queryset(self):
+        return super().get_queryset().filter(deleted_at__isnull=True)
+
+
 class Farm(models.Model):
     """Farm model for managing farm information"""
     user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='farms')
@@ -23,6 +31,11 @@ class Farm(models.Model):
     end_date = models.TextField(help_text="Expected harvest or end date")
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
+    # Set when the farm is deleted; home.purge removes it and its records in the background
+    deleted_at = models.DateTimeField(blank=True, null=True)
+
+    objects = LiveFarmManager()
+    all_objects = models.Manager()
     
     class Meta:
         ordering = ['-created_at']
@@ -33,25 +46,55 @@ class Farm(models.Model):
 
 class TodoList(models.Model):
     """TodoList model for farm tasks"""
+    PRIORITY_LOW = 1
+    PRIORITY_MEDIUM = 2
+    PRIORITY_HIGH = 3
+    PRIORITY_CHOICES = [
+        (PRIORITY_LOW, 'Low'),
+        (PRIORITY_MEDIUM, 'Medium'),
+        (PRIORITY_HIGH, 'High'),
+    ]
+    # Slugs used by forms, CSS classes and the JSON API
+    PRIORITY_SLUGS = {
+        PRIORITY_LOW: 'low',
+        PRIORITY_MEDIUM: 'medium',
+        PRIORITY_HIGH: 'high',
+    }
+    
     user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='todos')
     farm = models.ForeignKey(Farm, on_delete=models.CASCADE, related_name='todos')
     task = models.CharField(max_length=300)
     description = models.TextField(blank=True, null=True)
     completed = models.BooleanField(default=False)
-    priority = models.CharField(
-        max_length=20, 
-        choices=[('low', 'Low'), ('medium', 'Medium'), ('high', 'High')], 
-        default='medium'
-    )
+    priority = models.PositiveSmallIntegerField(choices=PRIORITY_CHOICES, default=PRIORITY_MEDIUM)
     due_date = models.DateField(blank=True, null=True)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     
     class Meta:
         ordering = ['completed', '-priority', 'due_date']
+        indexes = [
+            # Serves the dashboard list (filtered by user, in Meta.ordering order) straight from the index
+            models.Index(fields=['user', 'completed', '-priority', 'due_date'], name='home_todo_user_order_idx'),
+            # Overdue range scans (open todos, due_date < today) for the attention digest
+            models.Index(fields=['user', 'due_date'], condition=models.Q(completed=False), name='home_todo_open_due_idx'),
+        ]
     
     def __str__(self):
         return f"{self.farm.farm_name} - {self.task}"
+    
+    @property
+    def priority_slug(self):
+        """Priority as 'low' / 'medium' / 'high'"""
+        return self.PRIORITY_SLUGS.get(self.priority, 'medium')
+    
+    @classmethod
+    def priority_from_slug(cls, value, default=PRIORITY_MEDIUM):
+        """Convert a priority slug ('high') or rank ('3') to its stored rank"""
+        for rank, slug in cls.PRIORITY_SLUGS.items():
+            if value == slug or str(value) == str(rank):
+                return rank
+        return default
 
 
 class Expense(models.Model):
@@ -83,6 +126,10 @@ class Expense(models.Model):
     class Meta:
         ordering = ['-date', '-created_at']
         verbose_name_plural = 'Expenses'
+        indexes = [
+            # Default ordering and date-range / date-hierarchy scans (admin changelist)
+            models.Index(fields=['date', 'created_at'], name='home_expense_date_idx'),
+        ]
     
     def __str__(self):
         return f"{self.farm.farm_name} - {self.category} - ₹{self.amount}"
@@ -111,6 +158,9 @@ class Income(models.Model):
     class Meta:
         ordering = ['-date', '-created_at']
         verbose_name_plural = 'Incomes'
+        indexes = [
+            models.Index(fields=['date', 'created_at'], name='home_income_date_idx'),
+        ]
     
     def __str__(self):
         return f"{self.farm.farm_name} - {self.category} - ₹{self.amount}"
@@ -154,6 +204,9 @@ class Budget(models.Model):
     class Meta:
         ordering = ['-start_date', '-created_at']
         verbose_name_plural = 'Budgets'
+        indexes = [
+            models.Index(fields=['start_date', 'created_at'], name='home_budget_start_idx'),
+        ]
     
     def __str__(self):
         return f"{self.farm.farm_name} - {self.category} - ₹{self.allocated_amount}"
@@ -206,6 +259,10 @@ class CropStage(models.Model):
     class Meta:
         ordering = ['start_date', 'stage_name']
         verbose_name_plural = 'Crop Stages'
+        indexes = [
+            models.Index(fields=['user', 'end_date'], condition=models.Q(completed=False), name='home_stage_open_end_idx'),
+            models.Index(fields=['start_date', 'stage_name'], name='home_stage_start_idx'),
+        ]
     
     def __str__(self):
         return f"{self.farm.farm_name} - {self.get_stage_name_display()} ({self.start_date})"
@@ -246,6 +303,10 @@ class CropCalendar(models.Model):
     class Meta:
         ordering = ['date', 'event_type']
         verbose_name_plural = 'Crop Calendar Events'
+        indexes = [
+            models.Index(fields=['user', 'date'], condition=models.Q(completed=False), name='home_event_open_date_idx'),
+            models.Index(fields=['date', 'event_type'], name='home_event_date_idx'),
+        ]
     
     def __str__(self):
         return f"{self.farm.farm_name} - {self.get_event_type_display()} ({self.date})"
@@ -262,4 +323,211 @@ class CropCalendar(models.Model):
         from datetime import date, timedelta
         today = date.today()
         days_until = (self.date - today).days
-        return 0 <= days_until <= days and not self.completed
\ No newline at end of file
+        return 0 <= days_until <= days and not self.completed
+
+class ScheduleTemplate(models.Model):
+    """Reusable crop schedule (stages and care events) for a crop type"""
+    name = models.CharField(max_length=200)
+    crop_type = models.CharField(max_length=200, db_index=True, help_text="Crop type this schedule is written for")
+    description = models.TextField(blank=True, null=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        ordering = ['crop_type', 'name']
+        verbose_name_plural = 'Schedule Templates'
+    
+    def __str__(self):
+        return f"{self.name} ({self.crop_type})"
+
+
+class ScheduleTemplateStage(models.Model):
+    """Crop stage generated by a schedule template, offset from the farm start date"""
+    template = models.ForeignKey(ScheduleTemplate, on_delete=models.CASCADE, related_name='stages')
+    stage_name = models.CharField(max_length=50, choices=CropStage.STAGE_CHOICES)
+    offset_days = models.PositiveIntegerField(default=0, help_text="Days after the farm start date")
+    duration_days = models.PositiveIntegerField(blank=True, null=True, help_text="Leave empty for an open-ended stage")
+    notes = models.TextField(blank=True, null=True)
+    
+    class Meta:
+        ordering = ['offset_days', 'id']
+    
+    def __str__(self):
+        return f"{self.template.name} - {self.get_stage_name_display()} (+{self.offset_days}d)"
+
+
+class ScheduleTemplateEvent(models.Model):
+    """Calendar event generated by a schedule template, optionally recurring"""
+    template = models.ForeignKey(ScheduleTemplate, on_delete=models.CASCADE, related_name='events')
+    event_type = models.CharField(max_length=50, choices=CropCalendar.EVENT_TYPE_CHOICES)
+    offset_days = models.PositiveIntegerField(default=0, help_text="Days after the farm start date")
+    repeat_every_days = models.PositiveIntegerField(default=0, help_text="Repeat interval in days (0 = one-off event)")
+    occurrences = models.PositiveIntegerField(default=1, help_text="Number of events to create when repeating")
+    reminder_days = models.IntegerField(default=0, help_text="Days before event to send reminder (0 = no reminder)")
+    description = models.TextField(blank=True, null=True)
+    
+    class Meta:
+        ordering = ['offset_days', 'id']
+    
+    def __str__(self):
+        return f"{self.template.name} - {self.get_event_type_display()} (+{self.offset_days}d)"
+    
+    def get_offsets(self):
+        """Day offsets (from the farm start date) of every event this entry generates"""
+        if self.repeat_every_days <= 0:
+            return [self.offset_days]
+        return [self.offset_days + i * self.repeat_every_days for i in range(max(self.occurrences, 1))]
+
+
+class SearchEntry(models.Model):
+    """
+    Denormalised searchable text for one record, maintained by home.search.
+
+    On SQLite the table is mirrored into an FTS5 index by triggers created in
+    migration 0009; on PostgreSQL it carries a GIN tsvector index instead.
+    """
+    KIND_CHOICES = [
+        ('farm', 'Farm'),
+        ('todo', 'Task'),
+        ('expense', 'Expense'),
+        ('income', 'Income'),
+        ('stage', 'Crop Stage'),
+        ('event', 'Calendar Event'),
+    ]
+    
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='search_entries')
+    kind = models.CharField(max_length=20, choices=KIND_CHOICES)
+    object_id = models.PositiveBigIntegerField()
+    title = models.CharField(max_length=300)
+    body = models.TextField(blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        verbose_name_plural = 'Search Entries'
+        constraints = [
+            models.UniqueConstraint(fields=['kind', 'object_id'], name='home_searchentry_unique_object'),
+        ]
+    
+    def __str__(self):
+        return f"{self.get_kind_display()} #{self.object_id}: {self.title}"
+
+
+class SlowQuery(models.Model):
+    """
+    A SQL statement that exceeded SLOW_QUERY_THRESHOLD_MS, recorded by
+    home.slowlog. The table is a bounded ring buffer (SLOW_QUERY_LOG_SIZE rows);
+    `plan` holds the EXPLAIN output captured once per query fingerprint.
+    """
+    fingerprint = models.CharField(max_length=40, db_index=True)
+    view_name = models.CharField(max_length=200, blank=True)
+    path = models.CharField(max_length=500, blank=True)
+    sql = models.TextField()
+    params = models.TextField(blank=True)
+    duration_ms = models.FloatField()
+    plan = models.TextField(blank=True)
+    recorded_at = models.DateTimeField(auto_now_add=True)
+    
+    class Meta:
+        ordering = ['-id']
+        verbose_name_plural = 'Slow Queries'
+    
+    def __str__(self):
+        return f"{self.view_name or 'unknown'}: {self.duration_ms:.1f} ms"
+
+
+class Conversation(models.Model):
+    """
+    A chatbot conversation, maintained by home.conversations. `summary` is a
+    rolling digest of every message up to `summarized_through`; only the
+    messages after it are replayed into prompts.
+    """
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='conversations')
+    summary = models.TextField(blank=True)
+    summarized_through = models.BigIntegerField(default=0, help_text="Id of the last message folded into the summary")
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        ordering = ['-updated_at']
+        indexes = [
+            models.Index(fields=['user', '-updated_at'], name='home_conv_user_recent_idx'),
+        ]
+    
+    def __str__(self):
+        return f"Conversation #{self.id} ({self.user.username})"
+
+
+class ChatMessage(models.Model):
+    """One turn of a Conversation, with its estimated prompt size in tokens"""
+    ROLE_CHOICES = [
+        ('user', 'User'),
+        ('assistant', 'Assistant'),
+    ]
+    
+    conversation = models.ForeignKey(Conversation, on_delete=models.CASCADE, related_name='messages', db_index=False)
+    role = models.CharField(max_length=10, choices=ROLE_CHOICES)
+    content = models.TextField()
+    tokens = models.PositiveIntegerField()
+    created_at = models.DateTimeField(auto_now_add=True)
+    
+    class Meta:
+        ordering = ['id']
+        indexes = [
+            # Newest messages after the summary boundary: one range scan per prompt (also serves the FK)
+            models.Index(fields=['conversation', '-id'], name='home_chatmsg_conv_recent_idx'),
+        ]
+    
+    def __str__(self):
+        return f"{self.get_role_display()}: {self.content[:50]}"
+
+
+class Job(models.Model):
+    """
+    A unit of background work, queued by home.jobs.enqueue() and run by the
+    run_jobs worker. Workers claim the highest-priority due job with a
+    conditional UPDATE, so no broker or row locking is needed.
+    """
+    STATUS_QUEUED = 'queued'
+    STATUS_RUNNING = 'running'
+    STATUS_SUCCEEDED = 'succeeded'
+    STATUS_FAILED = 'failed'
+    STATUS_CHOICES = [
+        (STATUS_QUEUED, 'Queued'),
+        (STATUS_RUNNING, 'Running'),
+        (STATUS_SUCCEEDED, 'Succeeded'),
+        (STATUS_FAILED, 'Failed'),
+    ]
+    PRIORITY_LOW = -10
+    PRIORITY_NORMAL = 0
+    PRIORITY_HIGH = 10
+    
+    kind = models.CharField(max_length=50)
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='jobs', blank=True, null=True)
+    params = models.JSONField(default=dict, blank=True)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=STATUS_QUEUED)
+    priority = models.SmallIntegerField(default=PRIORITY_NORMAL, help_text="Higher runs first")
+    attempts = models.PositiveSmallIntegerField(default=0)
+    max_attempts = models.PositiveSmallIntegerField(default=3)
+    run_after = models.DateTimeField(default=timezone.now, help_text="Not claimed before this time (retry backoff)")
+    locked_by = models.CharField(max_length=100, blank=True)
+    locked_at = models.DateTimeField(blank=True, null=True)
+    result = models.JSONField(blank=True, null=True)
+    error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    finished_at = models.DateTimeField(blank=True, null=True)
+    
+    class Meta:
+        ordering = ['-id']
+        indexes = [
+            # The claim query: due queued jobs, highest priority first, then oldest
+            models.Index(
+                fields=['-priority', 'run_after', 'id'],
+                condition=models.Q(status='queued'),
+                name='home_job_queue_idx',
+            ),
+            # Stale-lock sweep over running jobs
+            models.Index(fields=['locked_at'], condition=models.Q(status='running'), name='home_job_running_idx'),
+        ]
+    
+    def __str__(self):
+        return f"{self.kind} #{self.id} ({self.status})"
@@ -0,0 +1,89 @@
+"""
+Per-request performance statistics.
+
+PerformanceMiddleware (home/middleware.py) creates a RequestStats for each
+sampled request and makes it current for the duration of the request. The
+DB execute wrapper, the timed template backend (home/templating.py) and
+cache helpers record into it through the functions below, which are no-ops
+for unsampled requests (cache lookups are still counted in home.metrics).
+"""
+
+import time
+from contextvars import ContextVar
+
+from . import metrics
+
+_current_stats = ContextVar('home_request_stats', default=None)
+
+
+class RequestStats:
+    """Query, template and cache counters for one request"""
+
+    def __init__(self):
+        self.view_name = None
+        self.queries = 0
+        self.sql_time = 0.0
+        self.template_time = 0.0
+        self.templates = 0
+        self.cache_hits = 0
+        self.cache_misses = 0
+
+    def db_wrapper(self, execute, sql, params, many, context):
+        """connection.execute_wrapper() hook timing every statement"""
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.queries += 1
+            self.sql_time += time.perf_counter() - start
+
+    def server_timing(self, total):
+        """Server-Timing header value (durations in milliseconds)"""
+        return ', '.join([
+            f'db;dur={self.sql_time * 1000:.1f};desc="{self.queries} queries"',
+            f'tpl;dur={self.template_time * 1000:.1f};desc="{self.templates} templates"',
+            f'cache;desc="{self.cache_hits} hits, {self.cache_misses} misses"',
+            f'total;dur={total * 1000:.1f}',
+        ])
+
+    def as_dict(self, total):
+        return {
+            'view': self.view_name,
+            'total_ms': round(total * 1000, 2),
+            'queries': self.queries,
+            'sql_ms': round(self.sql_time * 1000, 2),
+            'templates': self.templates,
+            'template_ms': round(self.template_time * 1000, 2),
+            'cache_hits': self.cache_hits,
+            'cache_misses': self.cache_misses,
+        }
+
+
+def current_stats():
+    """The RequestStats of the request being handled, or None when not sampled"""
+    return _current_stats.get()
+
+
+def activate(stats):
+    return _current_stats.set(stats)
+
+
+def deactivate(token):
+    _current_stats.reset(token)
+
+
+def record_template(duration):
+    stats = _current_stats.get()
+    if stats is not None:
+        stats.templates += 1
+        stats.template_time += duration
+
+
+def record_cache(hit):
+    metrics.cache_requests_total.inc('hit' if hit else 'miss')
+    stats = _current_stats.get()
+    if stats is not None:
+        if hit:
+            stats.cache_hits += 1
+        else:
+            stats.cache_misses += 1
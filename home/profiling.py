@@ -0,0 +1,137 @@
+"""
+On-demand sampling profiler for single requests.
+
+A background thread samples the request thread's stack with
+sys._current_frames() every PROFILE_INTERVAL_MS and counts identical stacks.
+Captures are written to PROFILE_DIR in the "collapsed stack" format
+(`frame;frame;frame count` per line) read by flamegraph.pl, speedscope and
+inferno. Template renders are labelled with the template name so slow
+templates show up next to the Python frames of home/views.py.
+"""
+
+import json
+import os
+import re
+import sys
+import threading
+import time
+from collections import Counter
+from datetime import datetime
+from pathlib import Path
+
+from django.conf import settings
+
+CAPTURE_NAME_RE = re.compile(r'^[\w.-]+\.collapsed$')
+
+
+class SamplingProfiler:
+    """Samples one thread's call stack until stopped"""
+
+    def __init__(self, thread_id, interval):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.stacks = Counter()
+        self.samples = 0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name='request-profiler', daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is None:
+                continue
+            labels = []
+            while frame is not None:
+                labels.append(frame_label(frame))
+                frame = frame.f_back
+            self.stacks[';'.join(reversed(labels))] += 1
+            self.samples += 1
+
+    def collapsed(self):
+        return ''.join(f'{stack} {count}\n' for stack, count in self.stacks.most_common())
+
+
+def frame_label(frame):
+    code = frame.f_code
+    filename = code.co_filename
+    base_dir = str(settings.BASE_DIR)
+    if filename.startswith(base_dir):
+        filename = os.path.relpath(filename, base_dir)
+    else:
+        filename = os.path.basename(filename)
+
+    label = f'{code.co_name} ({filename}:{code.co_firstlineno})'
+    if code.co_name == 'render' and filename == 'base.py':
+        template_name = getattr(getattr(frame.f_locals.get('self'), 'origin', None), 'template_name', None)
+        if template_name:
+            label = f'template {template_name}'
+    return label.replace(';', ':')
+
+
+def profile_dir():
+    return Path(settings.PROFILE_DIR)
+
+
+def save_capture(profiler, request, status, duration):
+    """Write the capture to PROFILE_DIR and prune to PROFILE_MAX_CAPTURES files"""
+    directory = profile_dir()
+    directory.mkdir(parents=True, exist_ok=True)
+
+    match = getattr(request, 'resolver_match', None)
+    view = re.sub(r'[^\w-]', '_', match.url_name or match.view_name) if match else 'unmatched'
+    now = time.time()
+    stem = f'{time.strftime("%Y%m%d-%H%M%S", time.localtime(now))}.{int(now * 1000) % 1000:03d}-{view}-{int(duration * 1000)}ms'
+    (directory / f'{stem}.collapsed').write_text(profiler.collapsed())
+    # Request details live in a sidecar so the capture stays plain collapsed-stack text
+    (directory / f'{stem}.json').write_text(json.dumps({
+        'method': request.method,
+        'path': request.get_full_path(),
+        'user': request.user.username,
+        'status': status,
+        'duration_ms': round(duration * 1000, 1),
+        'samples': profiler.samples,
+        'interval_ms': profiler.interval * 1000,
+    }))
+
+    captures = sorted(directory.glob('*.collapsed'), key=lambda p: p.stat().st_mtime, reverse=True)
+    for old in captures[settings.PROFILE_MAX_CAPTURES:]:
+        old.unlink(missing_ok=True)
+        old.with_suffix('.json').unlink(missing_ok=True)
+    return f'{stem}.collapsed'
+
+
+def list_captures():
+    """Recent captures, newest first, with the request details from their sidecar"""
+    directory = profile_dir()
+    if not directory.is_dir():
+        return []
+
+    captures = []
+    for path in sorted(directory.glob('*.collapsed'), key=lambda p: p.stat().st_mtime, reverse=True):
+        try:
+            details = json.loads(path.with_suffix('.json').read_text())
+        except (OSError, ValueError):
+            details = {}
+        stat = path.stat()
+        captures.append({
+            'name': path.name,
+            'size': stat.st_size,
+            'modified': datetime.fromtimestamp(stat.st_mtime),
+            **details,
+        })
+    return captures
+
+
+def capture_path(name):
+    """Path of a capture file, or None if the name is not a capture in PROFILE_DIR"""
+    if not CAPTURE_NAME_RE.match(name):
+        return None
+    path = profile_dir() / name
+    return path if path.is_file() else None
@@ -0,0 +1,129 @@
+"""
+Fast deletion of farms and whole accounts.
+
+Model.delete() runs Django's collector, which loads every related row to
+send signals. For a farm with years of records that takes minutes, and it
+holds the SQLite write lock the whole time. Deletion is split in two
+instead:
+
+- soft_delete_farms() / soft_delete_account() run in the request. They set
+  Farm.deleted_at with a single UPDATE, which hides the farms through their
+  default manager and their records through the farm registry's
+  live_records() filter (home/farms.py). They also drop the caches that the
+  skipped signals would have cleared, and queue a purge job.
+- purge_farms() / purge_account() run on a job worker (home/jobs.py). They
+  delete records in primary-key batches of PURGE_BATCH_SIZE with raw DELETEs,
+  each batch in its own short transaction. Memory use stays bounded by the
+  batch size however much data there is, and other writers get the lock
+  between batches.
+
+A purge only deletes what it finds, so an interrupted job can simply be
+retried.
+"""
+
+import time
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.db import router, transaction
+from django.utils import timezone
+
+from .auth import forget_user
+from .caching import bump_user_version
+from .farms import forget_farms
+from .models import (
+    Budget, ChatMessage, Conversation, CropCalendar, CropStage, Expense, Farm, Income, Job, SearchEntry,
+    TodoList, UserProfile,
+)
+from .retrieval import forget_index
+from .search import KIND_BY_MODEL
+
+FARM_RECORD_MODELS = (TodoList, Expense, Income, Budget, CropStage, CropCalendar)
+
+
+def _forget_user_data(user_id):
+    bump_user_version(user_id)
+    forget_farms(user_id)
+    forget_index(user_id)
+
+
+def soft_delete_farms(user, farms):
+    """Hide the user's farms (and their records) now and queue their purge; returns the purge Job"""
+    from .jobs import enqueue
+
+    farm_ids = [farm.pk for farm in farms]
+    Farm.all_objects.filter(user=user, pk__in=farm_ids, deleted_at__isnull=True).update(deleted_at=timezone.now())
+    SearchEntry.objects.filter(kind=KIND_BY_MODEL[Farm], object_id__in=farm_ids).delete()
+    _forget_user_data(user.pk)
+    return enqueue('purge_farms', {'farm_ids': farm_ids}, user=user, priority=Job.PRIORITY_HIGH)
+
+
+def soft_delete_account(user):
+    """Deactivate the user, hide all their farms and queue the account purge; returns the purge Job"""
+    from .jobs import enqueue
+
+    with transaction.atomic():
+        User.objects.filter(pk=user.pk).update(is_active=False)
+        Farm.all_objects.filter(user=user, deleted_at__isnull=True).update(deleted_at=timezone.now())
+    forget_user(user.pk)
+    _forget_user_data(user.pk)
+    # Not owned by the user, or deleting the account would cascade to the job running it
+    return enqueue('purge_account', {'user_id': user.pk}, priority=Job.PRIORITY_HIGH)
+
+
+def _purge_batches(queryset, search_kind=None, batch_size=None):
+    """Delete the rows of queryset in pk batches without loading them; returns how many"""
+    batch_size = batch_size or settings.PURGE_BATCH_SIZE
+    model = queryset.model
+    using = router.db_for_write(model)
+    deleted = 0
+    while True:
+        pks = list(queryset.order_by('pk').values_list('pk', flat=True)[:batch_size])
+        if not pks:
+            return deleted
+        with transaction.atomic(using=using):
+            # _raw_delete() is the collector's own fast path: one DELETE, no signals, no cascade
+            deleted += model._base_manager.filter(pk__in=pks)._raw_delete(using)
+            if search_kind:
+                SearchEntry.objects.filter(kind=search_kind, object_id__in=pks)._raw_delete(using)
+        if settings.PURGE_BATCH_PAUSE:
+            time.sleep(settings.PURGE_BATCH_PAUSE)
+
+
+def purge_farms(farm_ids, batch_size=None):
+    """Delete soft-deleted farms and all their records; returns deleted row counts by model"""
+    farms = Farm.all_objects.filter(pk__in=farm_ids, deleted_at__isnull=False)
+    farm_ids, user_ids = [], set()
+    for farm_id, user_id in farms.values_list('pk', 'user_id'):
+        farm_ids.append(farm_id)
+        user_ids.add(user_id)
+    counts = {}
+    for model in FARM_RECORD_MODELS:
+        counts[model._meta.model_name] = _purge_batches(
+            model.objects.filter(farm_id__in=farm_ids), KIND_BY_MODEL.get(model), batch_size,
+        )
+    counts['farm'] = _purge_batches(farms, KIND_BY_MODEL[Farm], batch_size)
+    for user_id in user_ids:
+        # The snapshot lists the purged farms as awaiting purge; queries can stop excluding them
+        forget_farms(user_id)
+    return counts
+
+
+def purge_account(user_id, batch_size=None):
+    """Delete a soft-deleted account: farms, records, search entries, chats, jobs, then the user"""
+    user = User.objects.filter(pk=user_id, is_active=False).first()
+    if user is None:
+        return {}
+    counts = purge_farms(Farm.all_objects.filter(user=user).values_list('pk', flat=True), batch_size)
+    for name, queryset in (
+        ('searchentry', SearchEntry.objects.filter(user=user)),
+        ('chatmessage', ChatMessage.objects.filter(conversation__user=user)),
+        ('conversation', Conversation.objects.filter(user=user)),
+        ('job', Job.objects.filter(user=user)),
+        ('userprofile', UserProfile.objects.filter(user=user)),
+    ):
+        counts[name] = _purge_batches(queryset, batch_size=batch_size)
+    # Nothing is left to cascade to, so the collector has only the user row to load
+    user.delete()
+    counts['user'] = 1
+    return counts
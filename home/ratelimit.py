@@ -0,0 +1,99 @@
+"""
+Cache-backed rate and concurrency limits.
+
+State lives in the default cache. The limits are therefore per process
+with LocMemCache; gunicorn.conf.py refuses to start several workers on it,
+since they would multiply every limit. The file-based default is shared by
+the workers of one host, but its add() is not atomic between processes, so
+concurrent requests may be over-admitted by a few; use Redis (atomic add,
+shared across hosts) where the limits must be exact.
+
+TokenBucket refills `rate` tokens per second up to `burst`; each call to
+take() spends one or reports how long until the next token. Read-modify-write
+of a bucket is serialised with a short cache.add() lock; if the lock cannot
+be had within a few milliseconds the update goes ahead unlocked, so
+contention can only over-admit slightly, never stall a request.
+
+ConcurrencyLimit is a semaphore of `limit` slot keys claimed with the atomic
+cache.add(). Slots expire after `timeout` seconds, so a worker that dies
+mid-call cannot leak one for good.
+"""
+
+import re
+import time
+from contextlib import contextmanager
+
+from django.core.cache import cache
+
+LOCK_TIMEOUT = 1  # seconds; far longer than the critical section
+LOCK_ATTEMPTS = 5
+LOCK_WAIT = 0.002  # seconds between attempts
+
+RATE_UNITS = {'s': 1, 'm': 60, 'h': 3600}
+
+
+def parse_rate(rate):
+    """'30/m' -> 0.5 tokens per second"""
+    match = re.fullmatch(r'\s*(\d+(?:\.\d+)?)\s*/\s*([smh])\s*', rate)
+    if not match:
+        raise ValueError(f'Invalid rate {rate!r} (expected e.g. "30/m")')
+    return float(match.group(1)) / RATE_UNITS[match.group(2)]
+
+
+@contextmanager
+def _locked(key):
+    lock_key = f'{key}:lock'
+    for _ in range(LOCK_ATTEMPTS):
+        if cache.add(lock_key, 1, LOCK_TIMEOUT):
+            try:
+                yield
+            finally:
+                cache.delete(lock_key)
+            return
+        time.sleep(LOCK_WAIT)
+    yield
+
+
+class TokenBucket:
+
+    def __init__(self, name, rate, burst):
+        self.name = name
+        self.rate = parse_rate(rate) if isinstance(rate, str) else rate
+        self.burst = burst
+
+    def take(self, key=''):
+        """Spend one token; returns 0 when allowed, else seconds until a token is available"""
+        cache_key = f'home:bucket:{self.name}:{key}'
+        with _locked(cache_key):
+            now = time.time()
+            tokens, updated = cache.get(cache_key, (self.burst, now))
+            tokens = min(self.burst, tokens + (now - updated) * self.rate)
+            if tokens < 1:
+                cache.set(cache_key, (tokens, now), self.ttl)
+                return (1 - tokens) / self.rate
+            cache.set(cache_key, (tokens - 1, now), self.ttl)
+            return 0.0
+
+    @property
+    def ttl(self):
+        # An untouched bucket is full again after this long; no need to keep it
+        return int(self.burst / self.rate) + 1
+
+
+class ConcurrencyLimit:
+
+    def __init__(self, name, limit, timeout):
+        self.name = name
+        self.limit = limit
+        self.timeout = timeout
+
+    def acquire(self):
+        """Claim a free slot; returns its key, or None when all `limit` slots are taken"""
+        for number in range(self.limit):
+            slot = f'home:slot:{self.name}:{number}'
+            if cache.add(slot, 1, self.timeout):
+                return slot
+        return None
+
+    def release(self, slot):
+        cache.delete(slot)
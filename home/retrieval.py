@@ -0,0 +1,367 @@
+"""
+Per-user BM25 index of farm records, used to ground the chatbot's prompts.
+
+Each of a user's farms, crop stages, calendar events and tasks becomes one
+short snippet of text. Each farm also gets one snippet per recent month
+summarising its income and expenses. The snippets are tokenised into a
+postings list held in NumPy arrays (term id, document slot, term frequency)
+in this process's memory, so a query scores every snippet with a few
+vectorised operations and no database access.
+
+Indexes are kept up to date incrementally: a save replaces the record's
+snippet, and a delete tombstones its slot (see home/signals.py). Slots are
+compacted once half of them are dead. Other worker processes notice a change
+through the per-user cache version (home/caching.py) and rebuild on the next
+query; every index is also rebuilt after CHATBOT_INDEX_MAX_AGE, which rolls
+the finance months forward. Only the CHATBOT_INDEX_MAX_USERS most recently
+queried indexes are kept.
+"""
+
+import re
+import threading
+import time
+from collections import Counter, OrderedDict
+from datetime import date
+
+import numpy as np
+from django.conf import settings
+from django.db.models import Sum
+from django.db.models.functions import TruncMonth
+
+from .caching import get_user_version, last_bump
+from .farms import FarmRegistry
+from .models import CropCalendar, CropStage, Expense, Farm, Income, TodoList
+
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+TOKEN_RE = re.compile(r'\w+', re.UNICODE)
+STOPWORDS = frozenset(
+    'a an and are as at be by can do does for from has have how i in is it my of on or should '
+    'the there this to was what when where which will with you your'.split()
+)
+
+
+SUFFIXES = ('ing', 'ed', 'es', 's')
+
+
+def _stem(token):
+    # Just enough to match "harvest" with "harvesting" and "task" with "tasks"
+    for suffix in SUFFIXES:
+        if token.endswith(suffix) and len(token) - len(suffix) >= 4:
+            return token[:-len(suffix)]
+    return token
+
+
+def tokenize(text):
+    return [_stem(token) for token in TOKEN_RE.findall(text.lower()) if token not in STOPWORDS]
+
+
+def _label(choices, value):
+    return dict(choices).get(value, value)
+
+
+def _farm_snippet(farm):
+    return (
+        f'Farm "{farm.farm_name}": {farm.crop_type} on {farm.area} {farm.area_unit} at {farm.location}, '
+        f'started {farm.start_date:%d %b %Y}, expected end {farm.end_date}.'
+    )
+
+
+def _stage_snippet(stage):
+    end = f'{stage.end_date:%d %b %Y}' if stage.end_date else 'ongoing'
+    status = 'completed' if stage.completed else 'in progress'
+    notes = f' Notes: {stage.notes}' if stage.notes else ''
+    return (
+        f'{stage.farm.farm_name}: {_label(CropStage.STAGE_CHOICES, stage.stage_name)} stage '
+        f'from {stage.start_date:%d %b %Y} to {end}, {status}.{notes}'
+    )
+
+
+def _event_snippet(event):
+    status = 'done' if event.completed else 'scheduled'
+    description = f' {event.description}' if event.description else ''
+    return (
+        f'{event.farm.farm_name}: {_label(CropCalendar.EVENT_TYPE_CHOICES, event.event_type)} '
+        f'on {event.date:%d %b %Y} ({status}).{description}'
+    )
+
+
+def _todo_snippet(todo):
+    due = f' due {todo.due_date:%d %b %Y}' if todo.due_date else ''
+    status = 'done' if todo.completed else 'open'
+    description = f' {todo.description}' if todo.description else ''
+    return (
+        f'{todo.farm.farm_name}: {_label(TodoList.PRIORITY_CHOICES, todo.priority).lower()} priority task '
+        f'"{todo.task}"{due} ({status}).{description}'
+    )
+
+
+# kind -> (model, snippet builder)
+INDEXED = {
+    'farm': (Farm, _farm_snippet),
+    'stage': (CropStage, _stage_snippet),
+    'event': (CropCalendar, _event_snippet),
+    'todo': (TodoList, _todo_snippet),
+}
+KIND_BY_MODEL = {model: kind for kind, (model, _) in INDEXED.items()}
+FINANCE_MODELS = (Expense, Income)
+
+
+def _months_ago(today, months):
+    month = today.year * 12 + today.month - 1 - months
+    return date(month // 12, month % 12 + 1, 1)
+
+
+def finance_snippets(user_id):
+    """{('finance', 'farm_id:YYYY-MM'): text} for the last CHATBOT_FINANCE_MONTHS months, two queries"""
+    since = _months_ago(date.today(), settings.CHATBOT_FINANCE_MONTHS - 1)
+    farm_names = dict(Farm.objects.filter(user_id=user_id).values_list('id', 'farm_name'))
+    live = FarmRegistry(user_id).live_records()
+    totals = {}
+    for model, side, categories in (
+        (Expense, 'expenses', Expense.EXPENSE_CATEGORIES),
+        (Income, 'income', Income.INCOME_CATEGORIES),
+    ):
+        rows = (
+            model.objects.filter(live, user_id=user_id, date__gte=since)
+            .annotate(month=TruncMonth('date'))
+            .values_list('farm_id', 'month', 'category')
+            .annotate(total=Sum('amount'))
+            .order_by()
+        )
+        for farm_id, month, category, total in rows:
+            entry = totals.setdefault((farm_id, month), {'expenses': {}, 'income': {}})
+            entry[side][_label(categories, category).lower()] = total
+
+    snippets = {}
+    for (farm_id, month), entry in totals.items():
+        income = sum(entry['income'].values(), 0)
+        expenses = sum(entry['expenses'].values(), 0)
+        parts = [f'{farm_names.get(farm_id, "Farm")} finances for {month:%B %Y}: earned {income:.2f} income']
+        if entry['income']:
+            parts.append(' (' + ', '.join(f'{name} {amount:.2f}' for name, amount in entry['income'].items()) + ')')
+        parts.append(f', spent {expenses:.2f} on expenses')
+        if entry['expenses']:
+            parts.append(' (' + ', '.join(f'{name} {amount:.2f}' for name, amount in entry['expenses'].items()) + ')')
+        parts.append(f', net {income - expenses:.2f}.')
+        snippets[('finance', f'{farm_id}:{month:%Y-%m}')] = ''.join(parts)
+    return snippets
+
+
+class UserIndex:
+    """
+    BM25 over one user's snippets.
+
+    Postings are parallel arrays (term id, slot, frequency) that grow by
+    doubling; a snippet occupies one slot, and replacing or removing it marks
+    the old slot dead rather than rewriting the arrays.
+    """
+
+    def __init__(self, version):
+        self.version = version
+        self.built = time.monotonic()
+        self.vocabulary = {}
+        self.slots = {}  # (kind, key) -> slot
+        self.texts = []
+        self.terms = np.empty(256, dtype=np.int32)
+        self.docs = np.empty(256, dtype=np.int32)
+        self.freqs = np.empty(256, dtype=np.float32)
+        self.postings = 0
+        self.lengths = np.zeros(64, dtype=np.float32)
+        self.alive = np.zeros(64, dtype=bool)
+
+    def __len__(self):
+        return len(self.slots)
+
+    def _grow(self, postings):
+        needed = self.postings + postings
+        if needed > len(self.terms):
+            capacity = max(needed, 2 * len(self.terms))
+            for name in ('terms', 'docs', 'freqs'):
+                array = getattr(self, name)
+                grown = np.empty(capacity, dtype=array.dtype)
+                grown[:self.postings] = array[:self.postings]
+                setattr(self, name, grown)
+        if len(self.texts) >= len(self.alive):
+            capacity = 2 * len(self.alive)
+            self.lengths = np.concatenate([self.lengths, np.zeros(capacity - len(self.lengths), dtype=np.float32)])
+            self.alive = np.concatenate([self.alive, np.zeros(capacity - len(self.alive), dtype=bool)])
+
+    def upsert(self, kind, key, text):
+        self.remove(kind, key)
+        counts = Counter(tokenize(text))
+        self._grow(len(counts))
+        slot = len(self.texts)
+        self.texts.append(text)
+        self.slots[(kind, key)] = slot
+        self.lengths[slot] = sum(counts.values())
+        self.alive[slot] = True
+        end = self.postings + len(counts)
+        self.terms[self.postings:end] = [self.vocabulary.setdefault(term, len(self.vocabulary)) for term in counts]
+        self.docs[self.postings:end] = slot
+        self.freqs[self.postings:end] = list(counts.values())
+        self.postings = end
+
+    def remove(self, kind, key):
+        slot = self.slots.pop((kind, key), None)
+        if slot is None:
+            return
+        self.alive[slot] = False
+        self.texts[slot] = None
+        if len(self.texts) > 64 and len(self.slots) < len(self.texts) // 2:
+            self.compact()
+
+    def remove_kind(self, kind):
+        for kind_, key in [slot_key for slot_key in self.slots if slot_key[0] == kind]:
+            self.remove(kind_, key)
+
+    def compact(self):
+        """Drop dead slots and their postings, renumbering the live slots"""
+        live = np.flatnonzero(self.alive[:len(self.texts)])
+        renumber = np.full(len(self.texts), -1, dtype=np.int32)
+        renumber[live] = np.arange(len(live), dtype=np.int32)
+        keep = np.flatnonzero(renumber[self.docs[:self.postings]] >= 0)
+        self.postings = len(keep)
+        self.terms[:self.postings] = self.terms[keep]
+        self.docs[:self.postings] = renumber[self.docs[keep]]
+        self.freqs[:self.postings] = self.freqs[keep]
+        self.lengths[:len(live)] = self.lengths[live]
+        self.alive[:] = False
+        self.alive[:len(live)] = True
+        self.texts = [self.texts[slot] for slot in live]
+        self.slots = {slot_key: int(renumber[slot]) for slot_key, slot in self.slots.items()}
+
+    def top_k(self, query, k):
+        """The k best-scoring snippets for `query` as [(score, text)], best first"""
+        query_terms = [self.vocabulary[term] for term in set(tokenize(query)) if term in self.vocabulary]
+        if not query_terms or not self.slots:
+            return []
+        used = len(self.texts)
+        selected = np.isin(self.terms[:self.postings], query_terms)
+        selected &= self.alive[self.docs[:self.postings]]
+        terms = self.terms[:self.postings][selected]
+        docs = self.docs[:self.postings][selected]
+        freqs = self.freqs[:self.postings][selected]
+        if not len(docs):
+            return []
+
+        documents = len(self.slots)
+        frequency = np.bincount(terms)[terms].astype(np.float32)
+        idf = np.log1p((documents - frequency + 0.5) / (frequency + 0.5))
+        average_length = self.lengths[:used][self.alive[:used]].mean()
+        norm = BM25_K1 * (1 - BM25_B + BM25_B * self.lengths[docs] / average_length)
+        scores = np.bincount(docs, weights=idf * freqs * (BM25_K1 + 1) / (freqs + norm), minlength=used)
+
+        k = min(k, np.count_nonzero(scores))
+        best = np.argpartition(-scores, k - 1)[:k]
+        best = best[np.argsort(-scores[best])]
+        return [(float(scores[slot]), self.texts[slot]) for slot in best]
+
+
+def build_index(user_id):
+    """Full index for a user from the database: one query per kind plus the finance summaries"""
+    index = UserIndex(get_user_version(user_id))
+    live = FarmRegistry(user_id).live_records()
+    for kind, (model, snippet) in INDEXED.items():
+        objects = model.objects.filter(user_id=user_id)
+        if model is not Farm:
+            objects = objects.filter(live).select_related('farm')
+        for instance in objects.order_by():
+            index.upsert(kind, instance.pk, snippet(instance))
+    for (kind, key), text in finance_snippets(user_id).items():
+        index.upsert(kind, key, text)
+    return index
+
+
+_indexes = OrderedDict()
+_lock = threading.Lock()
+
+
+def _cached(user_id):
+    with _lock:
+        index = _indexes.get(user_id)
+        if index is not None:
+            _indexes.move_to_end(user_id)
+        return index
+
+
+def get_index(user_id):
+    """This process's index for a user, rebuilt when another process has changed their data"""
+    index = _cached(user_id)
+    if (
+        index is None
+        or index.version != get_user_version(user_id)
+        or time.monotonic() - index.built > settings.CHATBOT_INDEX_MAX_AGE
+    ):
+        index = build_index(user_id)
+        with _lock:
+            _indexes[user_id] = index
+            while len(_indexes) > settings.CHATBOT_INDEX_MAX_USERS:
+                _indexes.popitem(last=False)
+    return index
+
+
+def forget_index(user_id):
+    with _lock:
+        _indexes.pop(user_id, None)
+
+
+def _apply(user_id, change):
+    """
+    Apply this process's change to a loaded index and adopt the version it
+    bumped to. If any other change came in between (the index did not hold
+    the version before the bump, or the version has moved on since), the
+    index is dropped and rebuilt on the next query instead.
+    """
+    index = _cached(user_id)
+    if index is None:
+        return
+    before, bumped = last_bump(user_id)
+    with _lock:
+        # index.version == bumped: an earlier handler for the same write already applied its part
+        if bumped is not None and index.version in (before, bumped) and get_user_version(user_id) == bumped:
+            change(index)
+            index.version = bumped
+            return
+    forget_index(user_id)
+
+
+def record_saved(instance):
+    if type(instance) is Farm:
+        # Every child snippet names the farm; rebuild on the next query rather than patch them all
+        forget_index(instance.user_id)
+        return
+    if _cached(instance.user_id) is None:
+        return
+    kind = KIND_BY_MODEL[type(instance)]
+    text = INDEXED[kind][1](instance)
+    _apply(instance.user_id, lambda index: index.upsert(kind, instance.pk, text))
+
+
+def record_deleted(instance):
+    if type(instance) is Farm:
+        forget_index(instance.user_id)
+        return
+    kind = KIND_BY_MODEL[type(instance)]
+    _apply(instance.user_id, lambda index: index.remove(kind, instance.pk))
+
+
+def finances_changed(user_id):
+    if _cached(user_id) is None:
+        return
+    snippets = finance_snippets(user_id)
+
+    def replace(index):
+        index.remove_kind('finance')
+        for (kind, key), text in snippets.items():
+            index.upsert(kind, key, text)
+    _apply(user_id, replace)
+
+
+def relevant_snippets(user_id, query, k=None):
+    """Texts of the user's k records most relevant to `query` (CHATBOT_CONTEXT_SNIPPETS by default)"""
+    k = settings.CHATBOT_CONTEXT_SNIPPETS if k is None else k
+    index = get_index(user_id)
+    with _lock:
+        return [text for _, text in index.top_k(query, k)]
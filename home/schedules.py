@@ -0,0 +1,79 @@
+"""
+Crop schedule templates: generate CropStage and CropCalendar rows for farms
+in bulk instead of adding them one POST at a time.
+"""
+
+from datetime import timedelta
+
+from django.db import transaction
+
+from .caching import bump_user_version
+from .models import CropCalendar, CropStage, Farm, ScheduleTemplate
+from .search import index_objects
+
+
+def templates_for_crop(crop_type):
+    """Schedule templates matching a farm crop type (case-insensitive)"""
+    return ScheduleTemplate.objects.filter(crop_type__iexact=(crop_type or '').strip())
+
+
+def build_schedule(farm, stages, events):
+    """Build (unsaved) CropStage and CropCalendar objects for one farm"""
+    start = farm.start_date
+    new_stages = [
+        CropStage(
+            user_id=farm.user_id,
+            farm=farm,
+            stage_name=stage.stage_name,
+            start_date=start + timedelta(days=stage.offset_days),
+            end_date=(
+                start + timedelta(days=stage.offset_days + stage.duration_days)
+                if stage.duration_days is not None else None
+            ),
+            notes=stage.notes,
+        )
+        for stage in stages
+    ]
+    new_events = [
+        CropCalendar(
+            user_id=farm.user_id,
+            farm=farm,
+            event_type=event.event_type,
+            date=start + timedelta(days=offset),
+            description=event.description,
+            reminder_days=event.reminder_days,
+        )
+        for event in events
+        for offset in event.get_offsets()
+    ]
+    return new_stages, new_events
+
+
+def apply_template(template, farms, batch_size=1000):
+    """
+    Apply a schedule template to one farm or many farms at once.
+
+    All stages and events are inserted with bulk_create inside a single
+    transaction, so a co-op season is onboarded in a handful of queries
+    no matter how many farms it covers. Returns (stages_created, events_created).
+    """
+    if isinstance(farms, Farm):
+        farms = [farms]
+    stages = list(template.stages.all())
+    events = list(template.events.all())
+
+    new_stages = []
+    new_events = []
+    for farm in farms:
+        farm_stages, farm_events = build_schedule(farm, stages, events)
+        new_stages.extend(farm_stages)
+        new_events.extend(farm_events)
+
+    with transaction.atomic():
+        CropStage.objects.bulk_create(new_stages, batch_size=batch_size)
+        CropCalendar.objects.bulk_create(new_events, batch_size=batch_size)
+        # bulk_create sends no post_save signals
+        index_objects(new_stages + new_events, batch_size=batch_size)
+    bump_user_version(*(farm.user_id for farm in farms))
+
+    return len(new_stages), len(new_events)
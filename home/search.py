@@ -0,0 +1,267 @@
+"""
+Full-text search over a user's farms, tasks, transactions and crop notes.
+
+Searchable records are copied into SearchEntry rows as they are saved and
+deleted (see home/signals.py). The entries are indexed by SQLite FTS5 or a
+PostgreSQL tsvector GIN index (migration 0009), and queried with ranking
+through the backend matching the active database.
+"""
+
+import re
+import threading
+
+from django.db import connection, transaction
+from django.db.models import Q
+from django.urls import reverse
+
+from .farms import FarmRegistry
+from .models import CropCalendar, CropStage, Expense, Farm, Income, SearchEntry, TodoList
+
+SEARCH_RESULT_LIMIT = 50
+REBUILD_BATCH_SIZE = 2000
+REMOVAL_BATCH_SIZE = 500
+
+TOKEN_RE = re.compile(r'\w+', re.UNICODE)
+
+
+def _join(*parts):
+    return ' '.join(part for part in parts if part)
+
+
+def _farm_document(farm):
+    return farm.farm_name, _join(farm.location, farm.crop_type)
+
+
+def _todo_document(todo):
+    return todo.task, todo.description or ''
+
+
+def _expense_document(expense):
+    return f"Expense: {dict(Expense.EXPENSE_CATEGORIES).get(expense.category, expense.category)}", expense.description or ''
+
+
+def _income_document(income):
+    return f"Income: {dict(Income.INCOME_CATEGORIES).get(income.category, income.category)}", income.description or ''
+
+
+def _stage_document(stage):
+    return dict(CropStage.STAGE_CHOICES).get(stage.stage_name, stage.stage_name), stage.notes or ''
+
+
+def _event_document(event):
+    return dict(CropCalendar.EVENT_TYPE_CHOICES).get(event.event_type, event.event_type), event.description or ''
+
+
+# kind -> (model, document builder, url name taking the object id or None)
+SEARCHABLE = {
+    'farm': (Farm, _farm_document, 'edit_farm'),
+    'todo': (TodoList, _todo_document, None),
+    'expense': (Expense, _expense_document, 'edit_expense'),
+    'income': (Income, _income_document, 'edit_income'),
+    'stage': (CropStage, _stage_document, 'edit_crop_stage'),
+    'event': (CropCalendar, _event_document, 'edit_calendar_event'),
+}
+KIND_BY_MODEL = {model: kind for kind, (model, _, _) in SEARCHABLE.items()}
+
+
+def build_entry(instance):
+    """Unsaved SearchEntry for a searchable model instance"""
+    kind = KIND_BY_MODEL[type(instance)]
+    title, body = SEARCHABLE[kind][1](instance)
+    return SearchEntry(user_id=instance.user_id, kind=kind, object_id=instance.pk, title=title[:300], body=body)
+
+
+def index_objects(instances, batch_size=REBUILD_BATCH_SIZE):
+    """Insert or refresh the search entries for saved instances in one upsert per batch"""
+    entries = [build_entry(instance) for instance in instances]
+    SearchEntry.objects.bulk_create(
+        entries,
+        batch_size=batch_size,
+        update_conflicts=True,
+        unique_fields=['kind', 'object_id'],
+        update_fields=['user', 'title', 'body', 'updated_at'],
+    )
+
+
+_pending = threading.local()
+
+
+def _flush_removals():
+    removals = _pending.removals
+    _pending.removals = None
+    for kind, object_ids in removals.items():
+        object_ids = sorted(object_ids)
+        for start in range(0, len(object_ids), REMOVAL_BATCH_SIZE):
+            SearchEntry.objects.filter(kind=kind, object_id__in=object_ids[start:start + REMOVAL_BATCH_SIZE]).delete()
+
+
+def _flush_queued():
+    # The callback is dropped if the transaction rolls back; start over then
+    return any(func is _flush_removals for _, func, *_ in connection.run_on_commit)
+
+
+def unindex_object(instance):
+    """
+    Drop the search entry for a deleted instance.
+
+    Inside a transaction (which includes every cascading delete) removals are
+    collected until commit, so deleting thousands of rows costs one DELETE
+    per kind rather than one per row.
+    """
+    kind = KIND_BY_MODEL[type(instance)]
+    if not connection.in_atomic_block:
+        SearchEntry.objects.filter(kind=kind, object_id=instance.pk).delete()
+        return
+    if getattr(_pending, 'removals', None) is None or not _flush_queued():
+        _pending.removals = {}
+        transaction.on_commit(_flush_removals)
+    _pending.removals.setdefault(kind, set()).add(instance.pk)
+
+
+def rebuild_index(batch_size=REBUILD_BATCH_SIZE, stdout=None):
+    """Recreate every search entry from the source tables"""
+    with transaction.atomic():
+        SearchEntry.objects.all().delete()
+        for kind, (model, _, _) in SEARCHABLE.items():
+            batch = []
+            count = 0
+            for instance in model.objects.order_by('pk').iterator(chunk_size=batch_size):
+                batch.append(instance)
+                if len(batch) >= batch_size:
+                    index_objects(batch, batch_size)
+                    count += len(batch)
+                    batch = []
+            if batch:
+                index_objects(batch, batch_size)
+                count += len(batch)
+            if stdout is not None:
+                stdout.write(f'Indexed {count} {kind} record(s)')
+    if connection.vendor == 'sqlite':
+        with connection.cursor() as cursor:
+            cursor.execute("INSERT INTO home_searchentry_fts(home_searchentry_fts) VALUES('optimize')")
+
+
+def result_url(kind, object_id):
+    url_name = SEARCHABLE[kind][2]
+    if url_name is None:
+        return reverse('dashboard')
+    return reverse(url_name, args=[object_id])
+
+
+class SearchBackend:
+    """Fallback for databases without a full-text index: unranked LIKE matching"""
+
+    def search(self, user, terms, kinds, limit):
+        entries = SearchEntry.objects.filter(user=user)
+        if kinds:
+            entries = entries.filter(kind__in=kinds)
+        for term in terms:
+            entries = entries.filter(Q(title__icontains=term) | Q(body__icontains=term))
+        return [
+            (kind, object_id, title, body[:160], 0.0)
+            for kind, object_id, title, body in entries.values_list('kind', 'object_id', 'title', 'body')[:limit]
+        ]
+
+
+class SQLiteSearchBackend(SearchBackend):
+    """FTS5 MATCH ranked by bm25, with the owner token matched inside the index"""
+
+    def search(self, user, terms, kinds, limit):
+        terms_expr = ' AND '.join('"{}"*'.format(term.replace('"', '')) for term in terms)
+        match = f'owner:"u{int(user.id)}" AND {{title body}}: ({terms_expr})'
+        sql = (
+            "SELECT e.kind, e.object_id, e.title, "
+            "snippet(home_searchentry_fts, 1, '', '', '...', 16), "
+            "bm25(home_searchentry_fts, 2.0, 1.0, 0.0) AS rank "
+            "FROM home_searchentry_fts JOIN home_searchentry e ON e.id = home_searchentry_fts.rowid "
+            "WHERE home_searchentry_fts MATCH %s"
+        )
+        params = [match]
+        if kinds:
+            sql += " AND e.kind IN ({})".format(', '.join(['%s'] * len(kinds)))
+            params.extend(kinds)
+        sql += " ORDER BY rank LIMIT %s"
+        params.append(limit)
+        with connection.cursor() as cursor:
+            cursor.execute(sql, params)
+            return [(kind, object_id, title, snippet, -rank) for kind, object_id, title, snippet, rank in cursor.fetchall()]
+
+
+class PostgresSearchBackend(SearchBackend):
+    """tsvector @@ tsquery against the GIN expression index, ranked by ts_rank"""
+
+    def search(self, user, terms, kinds, limit):
+        tsquery = ' & '.join(f'{term}:*' for term in terms)
+        sql = (
+            "SELECT kind, object_id, title, left(body, 160), "
+            "ts_rank(to_tsvector('simple', title || ' ' || body), to_tsquery('simple', %s)) AS rank "
+            "FROM home_searchentry "
+            "WHERE user_id = %s AND to_tsvector('simple', title || ' ' || body) @@ to_tsquery('simple', %s)"
+        )
+        params = [tsquery, user.id, tsquery]
+        if kinds:
+            sql += " AND kind IN ({})".format(', '.join(['%s'] * len(kinds)))
+            params.extend(kinds)
+        sql += " ORDER BY rank DESC LIMIT %s"
+        params.append(limit)
+        with connection.cursor() as cursor:
+            cursor.execute(sql, params)
+            return cursor.fetchall()
+
+
+BACKENDS = {
+    'sqlite': SQLiteSearchBackend,
+    'postgresql': PostgresSearchBackend,
+}
+
+
+def get_backend():
+    return BACKENDS.get(connection.vendor, SearchBackend)()
+
+
+def _live_ids(model, object_ids, deleted_farm_ids):
+    objects = model.objects.filter(pk__in=object_ids)
+    if model is Farm:
+        return objects.values_list('pk', flat=True)
+    return objects.exclude(farm_id__in=deleted_farm_ids).values_list('pk', flat=True)
+
+
+def _drop_purged(user, hits):
+    """
+    Drop hits for records of farms awaiting purge (home/purge.py); their
+    entries stay in the index until the purge job reaches them.
+    """
+    deleted = FarmRegistry(user.id).deleted_ids
+    if not hits or not deleted:
+        return hits
+    ids_by_kind = {}
+    for kind, object_id, *_ in hits:
+        ids_by_kind.setdefault(kind, []).append(object_id)
+    live = {
+        (kind, object_id)
+        for kind, object_ids in ids_by_kind.items()
+        for object_id in _live_ids(SEARCHABLE[kind][0], object_ids, deleted)
+    }
+    return [hit for hit in hits if (hit[0], hit[1]) in live]
+
+
+def search(user, query, kinds=None, limit=SEARCH_RESULT_LIMIT):
+    """Ranked search results for a user as a list of dicts"""
+    terms = TOKEN_RE.findall(query or '')[:10]
+    if not terms:
+        return []
+    kinds = [kind for kind in (kinds or []) if kind in SEARCHABLE]
+    labels = dict(SearchEntry.KIND_CHOICES)
+    hits = _drop_purged(user, get_backend().search(user, terms, kinds, limit))
+    return [
+        {
+            'kind': kind,
+            'kind_label': labels[kind],
+            'id': object_id,
+            'title': title,
+            'snippet': snippet,
+            'score': round(float(score), 4),
+            'url': result_url(kind, object_id),
+        }
+        for kind, object_id, title, snippet, score in hits
+    ]
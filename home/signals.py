@@ -0,0 +1,80 @@
+"""
+Model signal handlers that keep derived data (caches, search and retrieval
+indexes) in step with writes.
+
+Queryset update()/bulk_create() calls do not send these signals, so code
+using them must call bump_user_version() / search.index_objects() itself.
+"""
+
+from django.contrib.auth.models import User
+from django.db.models.signals import post_delete, post_save
+
+from .auth import forget_user
+from .caching import bump_user_version
+from .farms import forget_farms
+from .models import Budget, CropCalendar, CropStage, Expense, Farm, Income, TodoList, UserProfile
+from .retrieval import FINANCE_MODELS, INDEXED, finances_changed, record_deleted, record_saved
+from .search import SEARCHABLE, index_objects, unindex_object
+
+USER_DATA_MODELS = (Farm, TodoList, Expense, Income, Budget, CropStage, CropCalendar)
+
+
+def user_data_changed(sender, instance, **kwargs):
+    bump_user_version(instance.user_id)
+
+
+def farm_changed(sender, instance, **kwargs):
+    forget_farms(instance.user_id)
+
+
+def user_changed(sender, instance, **kwargs):
+    forget_user(instance.pk)
+
+
+def profile_changed(sender, instance, **kwargs):
+    forget_user(instance.user_id)
+
+
+def searchable_saved(sender, instance, raw=False, **kwargs):
+    if not raw:
+        index_objects([instance])
+
+
+def searchable_deleted(sender, instance, **kwargs):
+    unindex_object(instance)
+
+
+def retrieval_saved(sender, instance, raw=False, **kwargs):
+    if not raw:
+        record_saved(instance)
+
+
+def retrieval_deleted(sender, instance, **kwargs):
+    record_deleted(instance)
+
+
+def finance_changed(sender, instance, raw=False, **kwargs):
+    if not raw:
+        finances_changed(instance.user_id)
+
+
+def connect_signals():
+    for model in USER_DATA_MODELS:
+        post_save.connect(user_data_changed, sender=model, dispatch_uid=f'user_data_saved_{model.__name__}')
+        post_delete.connect(user_data_changed, sender=model, dispatch_uid=f'user_data_deleted_{model.__name__}')
+    post_save.connect(farm_changed, sender=Farm, dispatch_uid='farm_registry_saved')
+    post_delete.connect(farm_changed, sender=Farm, dispatch_uid='farm_registry_deleted')
+    post_save.connect(user_changed, sender=User, dispatch_uid='auth_user_saved')
+    post_delete.connect(user_changed, sender=User, dispatch_uid='auth_user_deleted')
+    post_save.connect(profile_changed, sender=UserProfile, dispatch_uid='auth_profile_saved')
+    post_delete.connect(profile_changed, sender=UserProfile, dispatch_uid='auth_profile_deleted')
+    for model, _, _ in SEARCHABLE.values():
+        post_save.connect(searchable_saved, sender=model, dispatch_uid=f'search_saved_{model.__name__}')
+        post_delete.connect(searchable_deleted, sender=model, dispatch_uid=f'search_deleted_{model.__name__}')
+    # After user_data_changed, so the retrieval index adopts the bumped version
+    for model, _ in INDEXED.values():
+        post_save.connect(retrieval_saved, sender=model, dispatch_uid=f'retrieval_saved_{model.__name__}')
+        post_delete.connect(retrieval_deleted, sender=model, dispatch_uid=f'retrieval_deleted_{model.__name__}')
+    for model in FINANCE_MODELS:
+        post_save.connect(finance_changed, sender=model, dispatch_uid=f'retrieval_finance_saved_{model.__name__}')
+        post_delete.connect(finance_changed, sender=model, dispatch_uid=f'retrieval_finance_deleted_{model.__name__}')
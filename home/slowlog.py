@@ -0,0 +1,143 @@
+"""
+Slow-query log.
+
+SlowQueryRecorder is installed as a connection execute wrapper by
+PerformanceMiddleware. Statements slower than SLOW_QUERY_THRESHOLD_MS are
+collected during the request and saved to SlowQuery once the response has
+been produced, outside the wrapper. Each distinct query shape (the SQL with
+literals and IN-lists collapsed) is EXPLAINed once; later occurrences reuse
+the stored plan. The table is pruned to the newest SLOW_QUERY_LOG_SIZE rows.
+
+Bound values are never stored: `params` only records their types, since the
+admin shows the log and the values include usernames, emails and session
+keys. Statements on the session and user tables, which carry password
+hashes and session data, are not recorded at all.
+"""
+
+import hashlib
+import logging
+import re
+import time
+
+from django.conf import settings
+from django.db import DatabaseError, connection, transaction
+
+logger = logging.getLogger('home.perf')
+
+MAX_PARAMS_LENGTH = 2000
+UNRECORDED_TABLES_RE = re.compile(r'\b(?:django_session|auth_user)\b')
+EXPLAINABLE = ('select', 'with', 'insert', 'update', 'delete')
+
+_IN_LIST_RE = re.compile(r'\bIN \((?:%s, )*%s\)', re.IGNORECASE)
+_NUMBER_RE = re.compile(r'\b\d+\b')
+_STRING_RE = re.compile(r"'(?:[^']|'')*'")
+
+# Fingerprints this process has already tried to EXPLAIN
+_explained = set()
+
+
+def fingerprint(sql):
+    """Stable hash of the query shape, ignoring literal values and IN-list lengths"""
+    shape = _IN_LIST_RE.sub('IN (...)', sql)
+    shape = _STRING_RE.sub("'?'", shape)
+    shape = _NUMBER_RE.sub('?', shape)
+    return hashlib.sha1(shape.encode()).hexdigest()
+
+
+class SlowQueryRecorder:
+    """connection.execute_wrapper() hook collecting statements over the threshold"""
+
+    def __init__(self, threshold_ms):
+        self.threshold = threshold_ms / 1000
+        self.queries = []
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            duration = time.perf_counter() - start
+            if duration >= self.threshold and not UNRECORDED_TABLES_RE.search(sql):
+                self.queries.append((sql, params, many, duration))
+
+
+def describe_params(params, many=False):
+    """The shape of a statement's parameters without their values, e.g. '(int, str, NoneType)'"""
+    if params is None:
+        return ''
+    if many:
+        params = list(params)
+        return f'{len(params)} rows of {describe_params(params[0]) if params else "()"}'
+    if isinstance(params, dict):
+        return '{' + ', '.join(f'{key}: {type(value).__name__}' for key, value in params.items()) + '}'
+    return '(' + ', '.join(type(value).__name__ for value in params) + ')'
+
+
+def explain(sql, params):
+    """EXPLAIN output for one statement, or '' when it cannot be explained"""
+    if not sql.lstrip().lower().startswith(EXPLAINABLE):
+        return ''
+
+    if connection.vendor == 'sqlite':
+        prefix = 'EXPLAIN QUERY PLAN '
+    elif connection.vendor == 'postgresql' and sql.lstrip().lower().startswith('select'):
+        # ANALYZE executes the statement, so it is only used for reads
+        prefix = 'EXPLAIN (ANALYZE, BUFFERS) '
+    else:
+        prefix = 'EXPLAIN '
+
+    try:
+        with transaction.atomic():
+            with connection.cursor() as cursor:
+                cursor.execute(prefix + sql, params)
+                rows = cursor.fetchall()
+    except DatabaseError:
+        logger.exception('EXPLAIN failed for slow query')
+        return ''
+
+    if connection.vendor == 'sqlite':
+        # (id, parent, notused, detail)
+        return '\n'.join(str(row[-1]) for row in rows)
+    return '\n'.join(' '.join(str(column) for column in row) for row in rows)
+
+
+def save(queries, view_name='', path=''):
+    """Persist recorded slow queries, explaining each new shape once, then prune"""
+    from .models import SlowQuery
+
+    if not queries:
+        return
+
+    entries = []
+    for sql, params, many, duration in queries:
+        fp = fingerprint(sql)
+        plan = (
+            SlowQuery.objects.filter(fingerprint=fp).exclude(plan='')
+            .values_list('plan', flat=True).first()
+        )
+        if not plan and not many and fp not in _explained:
+            plan = explain(sql, params)
+            _explained.add(fp)
+
+        entries.append(SlowQuery(
+            fingerprint=fp,
+            view_name=view_name or '',
+            path=path[:500],
+            sql=sql,
+            params=describe_params(params, many)[:MAX_PARAMS_LENGTH],
+            duration_ms=round(duration * 1000, 2),
+            plan=plan or '',
+        ))
+
+    SlowQuery.objects.bulk_create(entries)
+    prune()
+
+
+def prune(size=None):
+    """Keep only the newest `size` rows (SLOW_QUERY_LOG_SIZE by default)"""
+    from .models import SlowQuery
+
+    size = settings.SLOW_QUERY_LOG_SIZE if size is None else size
+    cutoff = list(SlowQuery.objects.order_by('-id').values_list('id', flat=True)[size:size + 1])
+    if cutoff:
+        SlowQuery.objects.filter(id__lte=cutoff[0]).delete()
@@ -0,0 +1,118 @@
+"""
+Static files build: content hashing, responsive image variants, precompression.
+
+CompressedManifestStaticFilesStorage runs inside collectstatic (see the
+build_static command). On top of Django's ManifestStaticFilesStorage it
+
+* renders each image listed in STATIC_IMAGE_VARIANTS at the configured widths
+  in every format of STATIC_IMAGE_FORMATS that this Pillow build can write
+  (images/farm-hero.png -> images/farm-hero-960w.webp, ...). The variants are
+  hashed and recorded in the manifest like any other file, so the {% picture %}
+  tag can find them and the serving middleware marks them immutable;
+* writes a .gz copy (and a .br copy when the brotli package is installed) next
+  to every compressible file, for StaticFilesMiddleware to serve by
+  Accept-Encoding.
+"""
+
+import gzip
+import os
+from io import BytesIO
+
+from django.conf import settings
+from django.contrib.staticfiles.storage import ManifestStaticFilesStorage
+from django.core.files.base import ContentFile
+
+try:
+    import brotli
+except ImportError:  # optional: only gzip copies are written without it
+    brotli = None
+
+COMPRESSIBLE_EXTENSIONS = {'.css', '.js', '.svg', '.txt', '.html', '.json', '.map', '.xml', '.ico'}
+MIN_COMPRESS_SIZE = 256  # bytes; smaller files are not worth a second request path
+MIN_COMPRESS_RATIO = 0.95  # keep a compressed copy only when it saves at least 5%
+
+# Pillow format name, file extension and encoder options per output format
+IMAGE_FORMATS = {
+    'avif': ('AVIF', '.avif', {'quality': 55}),
+    'webp': ('WEBP', '.webp', {'quality': 80, 'method': 6}),
+}
+
+
+def image_formats():
+    """STATIC_IMAGE_FORMATS that this Pillow build can encode, best first"""
+    from PIL import features
+
+    return [name for name in settings.STATIC_IMAGE_FORMATS if name in IMAGE_FORMATS and features.check(name)]
+
+
+def variant_name(name, width, image_format):
+    """Unhashed static path of one variant: images/farm-hero.png -> images/farm-hero-960w.webp"""
+    root, _ = os.path.splitext(name)
+    return f'{root}-{width}w{IMAGE_FORMATS[image_format][1]}'
+
+
+def render_variants(content, widths, formats):
+    """Yield (width, format, bytes) for every width not larger than the source image"""
+    from PIL import Image
+
+    with Image.open(content) as source:
+        source.load()
+        for width in sorted(set(widths)):
+            if width > source.width:
+                continue
+            height = round(source.height * width / source.width)
+            resized = source.resize((width, height), Image.LANCZOS) if width != source.width else source
+            for image_format in formats:
+                pillow_format, _, options = IMAGE_FORMATS[image_format]
+                buffer = BytesIO()
+                resized.save(buffer, pillow_format, **options)
+                yield width, image_format, buffer.getvalue()
+
+
+def compress(data):
+    """{'.gz': bytes, '.br': bytes} for the encodings worth keeping"""
+    encoded = {'.gz': gzip.compress(data, compresslevel=9, mtime=0)}
+    if brotli is not None:
+        encoded['.br'] = brotli.compress(data)
+    return {suffix: body for suffix, body in encoded.items() if len(body) < len(data) * MIN_COMPRESS_RATIO}
+
+
+class CompressedManifestStaticFilesStorage(ManifestStaticFilesStorage):
+
+    def post_process(self, paths, dry_run=False, **options):
+        yield from super().post_process(paths, dry_run=dry_run, **options)
+        if dry_run:
+            return
+
+        yield from self.create_image_variants(paths)
+        self.save_manifest()
+
+        for name in self.compressible_files(paths):
+            with self.open(name) as handle:
+                data = handle.read()
+            if len(data) < MIN_COMPRESS_SIZE:
+                continue
+            for suffix, body in compress(data).items():
+                self._save(name + suffix, ContentFile(body))
+
+    def create_image_variants(self, paths):
+        formats = image_formats()
+        for name, widths in settings.STATIC_IMAGE_VARIANTS.items():
+            if name not in paths or not formats:
+                continue
+            with self.open(name) as handle:
+                source = BytesIO(handle.read())
+            for width, image_format, body in render_variants(source, widths, formats):
+                unhashed = variant_name(name, width, image_format)
+                hashed = self.hashed_name(unhashed, ContentFile(body))
+                for target in (unhashed, hashed):
+                    if self.exists(target):
+                        self.delete(target)
+                    self._save(target, ContentFile(body))
+                self.hashed_files[self.hash_key(self.clean_name(unhashed))] = hashed
+                yield unhashed, hashed, True
+
+    def compressible_files(self, paths):
+        """Every collected file, original and hashed copy, with a text-like extension"""
+        names = set(paths) | set(self.hashed_files.values())
+        return sorted(name for name in names if os.path.splitext(name)[1].lower() in COMPRESSIBLE_EXTENSIONS)
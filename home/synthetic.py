@@ -0,0 +1,165 @@
+"""
+Synthetic data generator for benchmarks and load tests.
+
+Creates users with farms and several years of expenses, incomes, budgets,
+crop stages, calendar events and tasks, all through bulk_create. Output is
+deterministic for a given seed. The caller is responsible for running it in
+a database it is allowed to fill (see the generate_synthetic_data and
+benchmark_views commands).
+"""
+
+import random
+from datetime import date, timedelta
+from decimal import Decimal
+
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.db import transaction
+
+from .caching import bump_user_version
+from .models import Budget, CropCalendar, CropStage, Expense, Farm, Income, TodoList
+from .search import index_objects
+
+SYNTHETIC_PASSWORD = 'synthetic'
+
+# Named data scales used by the benchmark suite
+SCALES = {
+    'small': {'users': 2, 'farms_per_user': 3, 'years': 1},
+    'medium': {'users': 5, 'farms_per_user': 10, 'years': 3},
+    'large': {'users': 10, 'farms_per_user': 25, 'years': 5},
+}
+
+CROPS = ['Wheat', 'Rice', 'Maize', 'Cotton', 'Sugarcane', 'Soybean', 'Tomato', 'Potato', 'Groundnut', 'Chilli']
+LOCATIONS = ['Guntur', 'Nashik', 'Ludhiana', 'Coimbatore', 'Indore', 'Nagpur', 'Warangal', 'Mysuru', 'Karnal', 'Anand']
+TASKS = [
+    'Inspect irrigation lines', 'Order fertilizer', 'Hire harvest labour', 'Service the tractor',
+    'Scout for pests', 'Collect soil samples', 'Repair fencing', 'Renew crop insurance',
+    'Clean storage shed', 'Check drip emitters', 'Book mandi slot', 'Calibrate sprayer',
+]
+
+EXPENSES_PER_MONTH = 8
+INCOMES_PER_MONTH = 2
+EVENTS_PER_MONTH = 2
+TODOS_PER_FARM = 30
+
+
+def _amount(rng, low, high):
+    return Decimal(rng.randint(low * 100, high * 100)) / 100
+
+
+def _month_starts(start, years):
+    for offset in range(years * 12):
+        year, month = divmod(start.month - 1 + offset, 12)
+        yield date(start.year + year, month + 1, 1)
+
+
+@transaction.atomic
+def generate(users=2, farms_per_user=3, years=1, seed=0, prefix='synth', batch_size=2000, index=True):
+    """
+    Create `users` users named <prefix>0001... with `farms_per_user` farms each
+    and `years` years of history ending this month. Returns {model name: rows}.
+    """
+    rng = random.Random(seed)
+    today = date.today()
+    history_start = date(today.year - years, today.month, 1) + timedelta(days=32)
+    history_start = history_start.replace(day=1)
+    password = make_password(SYNTHETIC_PASSWORD)
+
+    start_number = User.objects.filter(username__startswith=prefix).count() + 1
+    new_users = User.objects.bulk_create([
+        User(username=f'{prefix}{start_number + i:04d}', email=f'{prefix}{start_number + i:04d}@example.com', password=password)
+        for i in range(users)
+    ], batch_size=batch_size)
+    new_users = list(User.objects.filter(username__in=[user.username for user in new_users]))
+
+    farms = Farm.objects.bulk_create([
+        Farm(
+            user=user,
+            farm_name=f'{rng.choice(LOCATIONS)} Plot {n + 1}',
+            location=f'{rng.choice(LOCATIONS)} District',
+            crop_type=rng.choice(CROPS),
+            area=_amount(rng, 1, 50),
+            area_unit=rng.choice(['acres', 'hectares']),
+            start_date=history_start + timedelta(days=rng.randint(0, 60)),
+            end_date=(history_start + timedelta(days=365 * years)).isoformat(),
+        )
+        for user in new_users
+        for n in range(farms_per_user)
+    ], batch_size=batch_size)
+
+    expense_categories = [value for value, _ in Expense.EXPENSE_CATEGORIES]
+    income_categories = [value for value, _ in Income.INCOME_CATEGORIES]
+    stage_names = [value for value, _ in CropStage.STAGE_CHOICES]
+    event_types = [value for value, _ in CropCalendar.EVENT_TYPE_CHOICES]
+
+    expenses, incomes, budgets, stages, events, todos = [], [], [], [], [], []
+    for farm in farms:
+        for month in _month_starts(history_start, years):
+            for _ in range(EXPENSES_PER_MONTH):
+                expenses.append(Expense(
+                    user_id=farm.user_id, farm=farm, category=rng.choice(expense_categories),
+                    amount=_amount(rng, 100, 20000), description=f'{rng.choice(TASKS)} ({farm.crop_type})',
+                    date=month + timedelta(days=rng.randint(0, 27)),
+                ))
+            for _ in range(INCOMES_PER_MONTH):
+                incomes.append(Income(
+                    user_id=farm.user_id, farm=farm, category=rng.choice(income_categories),
+                    amount=_amount(rng, 1000, 80000), description=f'{farm.crop_type} sale',
+                    date=month + timedelta(days=rng.randint(0, 27)),
+                ))
+            for _ in range(EVENTS_PER_MONTH):
+                event_date = month + timedelta(days=rng.randint(0, 27))
+                events.append(CropCalendar(
+                    user_id=farm.user_id, farm=farm, event_type=rng.choice(event_types), date=event_date,
+                    reminder_days=rng.choice([0, 1, 3]), completed=event_date < today and rng.random() < 0.8,
+                    description=f'{farm.crop_type} {rng.choice(TASKS).lower()}',
+                ))
+            if month.month % 3 == 1:
+                quarter_end = (month + timedelta(days=92)).replace(day=1) - timedelta(days=1)
+                for category in rng.sample(expense_categories, 4):
+                    budgets.append(Budget(
+                        user_id=farm.user_id, farm=farm, category=category,
+                        allocated_amount=_amount(rng, 20000, 150000), period='quarterly',
+                        start_date=month, end_date=quarter_end,
+                    ))
+
+        season_start = farm.start_date
+        while season_start < today:
+            for stage_name in stage_names:
+                end = season_start + timedelta(days=rng.randint(10, 40))
+                stages.append(CropStage(
+                    user_id=farm.user_id, farm=farm, stage_name=stage_name,
+                    start_date=season_start, end_date=end, completed=end < today and rng.random() < 0.9,
+                    notes=f'{farm.crop_type} {stage_name}',
+                ))
+                season_start = end
+            season_start += timedelta(days=rng.randint(5, 30))
+
+        for _ in range(TODOS_PER_FARM):
+            due = today + timedelta(days=rng.randint(-60, 60))
+            todos.append(TodoList(
+                user_id=farm.user_id, farm=farm, task=rng.choice(TASKS),
+                priority=rng.choice([TodoList.PRIORITY_LOW, TodoList.PRIORITY_MEDIUM, TodoList.PRIORITY_HIGH]),
+                due_date=due, completed=due < today and rng.random() < 0.7,
+            ))
+
+    created = {'User': len(new_users), 'Farm': len(farms)}
+    for model, objects in [
+        (Expense, expenses), (Income, incomes), (Budget, budgets),
+        (CropStage, stages), (CropCalendar, events), (TodoList, todos),
+    ]:
+        objects = model.objects.bulk_create(objects, batch_size=batch_size)
+        created[model.__name__] = len(objects)
+        if index and model is not Budget:
+            index_objects(objects, batch_size=batch_size)
+    if index:
+        index_objects(farms, batch_size=batch_size)
+
+    bump_user_version(*[user.id for user in new_users])
+    return created
+
+
+def delete_synthetic_users(prefix='synth'):
+    """Remove every user created by generate() with this prefix (and, by cascade, their data)"""
+    deleted, _ = User.objects.filter(username__startswith=prefix, email__endswith='@example.com').delete()
+    return deleted
@@ -0,0 +1,45 @@
+from django import template
+from django.conf import settings
+from django.contrib.staticfiles.storage import staticfiles_storage
+from django.forms.utils import flatatt
+from django.templatetags.static import static
+from django.utils.html import format_html, format_html_join
+
+from home.storage import IMAGE_FORMATS, variant_name
+
+register = template.Library()
+
+
+@register.simple_tag
+def picture(name, sizes='100vw', **attrs):
+    """
+    <picture> for a static image with the AVIF/WebP variants written by
+    collectstatic (home.storage), falling back to a plain <img> of the
+    original when they have not been built, e.g. under DEBUG.
+
+        {% picture 'images/farm-hero.png' sizes='(min-width: 992px) 50vw, 100vw' alt='...' class='img-fluid' %}
+    """
+    hashed_files = getattr(staticfiles_storage, 'hashed_files', {})
+    sources = []
+    for image_format in IMAGE_FORMATS:
+        srcset = [
+            (static(variant), width)
+            for width in sorted(settings.STATIC_IMAGE_VARIANTS.get(name, []))
+            for variant in [variant_name(name, width, image_format)]
+            if variant in hashed_files
+        ]
+        if srcset:
+            sources.append((
+                f'image/{image_format}',
+                ', '.join(f'{url} {width}w' for url, width in srcset),
+                sizes,
+            ))
+
+    img = format_html('<img src="{}"{}>', static(name), flatatt(attrs))
+    if not sources:
+        return img
+    return format_html(
+        '<picture>{}{}</picture>',
+        format_html_join('', '<source type="{}" srcset="{}" sizes="{}">', sources),
+        img,
+    )
@@ -0,0 +1,33 @@
+"""
+Django template backend that reports render time to home.perf.
+
+Drop-in replacement for django.template.backends.django.DjangoTemplates;
+only the top-level render is timed, so included templates are not counted
+twice.
+"""
+
+import time
+
+from django.template.backends.django import DjangoTemplates, Template
+
+from . import perf
+
+
+class TimedTemplate(Template):
+
+    def render(self, context=None, request=None):
+        start = time.perf_counter()
+        try:
+            return super().render(context, request)
+        finally:
+            perf.record_template(time.perf_counter() - start)
+
+
+class TimedDjangoTemplates(DjangoTemplates):
+
+    def from_string(self, template_code):
+        return TimedTemplate(self.engine.from_string(template_code), self)
+
+    def get_template(self, template_name):
+        template = super().get_template(template_name)
+        return TimedTemplate(template.template, self)
@@ -8,13 +8,25 @@ urlpatterns = [
     path('logout/', views.logout_view, name='logout'),
     path('dashboard/', views.dashboard, name='dashboard'),
     path('profile/', views.edit_profile, name='edit_profile'),
+    path('profile/delete/', views.delete_account, name='delete_account'),
     path('management/', views.management, name='management'),
     path('farm/edit/<int:farm_id>/', views.edit_farm, name='edit_farm'),
     path('farm/delete/<int:farm_id>/', views.delete_farm, name='delete_farm'),
+    path('farm/apply-schedule/', views.apply_schedule_template, name='apply_schedule_template'),
     path('todo/add/', views.add_todo, name='add_todo'),
     path('todo/toggle/<int:todo_id>/', views.toggle_todo, name='toggle_todo'),
     path('todo/delete/<int:todo_id>/', views.delete_todo, name='delete_todo'),
+    path('todo/bulk/', views.bulk_todo_action, name='bulk_todo_action'),
+    path('attention/', views.attention_digest, name='attention_digest'),
+    path('search/', views.search_view, name='search'),
     path('chatbot/query/', views.chatbot_query, name='chatbot_query'),
+    path('metrics/', views.metrics_view, name='metrics'),
+    path('profiles/', views.profile_index, name='profile_index'),
+    path('profiles/<str:name>', views.profile_download, name='profile_download'),
+    path('jobs/report/', views.request_financial_report, name='request_financial_report'),
+    path('jobs/export/', views.request_database_export, name='request_database_export'),
+    path('jobs/<int:job_id>/', views.job_status, name='job_status'),
+    path('jobs/<int:job_id>/download/', views.job_download, name='job_download'),
 
     # Financial Management URLs
     path('financial/', views.financial_overview, name='financial_overview'),
@@ -2,10 +2,15 @@ from django.shortcuts import render, redirect
 from django.contrib.auth import authenticate, login, logout
 from django.contrib.auth.models import User
 from django.contrib import messages
+from django.contrib.admin.views.decorators import staff_member_required
 from django.contrib.auth.decorators import login_required
 from django.http import JsonResponse
 from django.forms import ModelForm
 from .models import UserProfile
+from .attention import annotate_due_soon, get_attention_digest
+from .caching import bump_user_version, get_user_version
+from .conditional import conditional_page
+from .farms import get_farm_registry
 
 def index(request):
     """Landing page view"""
@@ -69,7 +74,10 @@ def logout_view(request):
     messages.success(request, 'You have been logged out successfully.')
     return redirect('index')
 
+DASHBOARD_TODO_LIMIT = 100
+
 @login_required
+@conditional_page
 def dashboard(request):
     """Dashboard view"""
     from . import models
@@ -78,23 +86,27 @@ def dashboard(request):
     from django.utils import timezone
     
     # Get stats for dashboard
-    farms_count = models.Farm.objects.filter(user=request.user).count()
-    
-    # Get all todos for user
-    todos = models.TodoList.objects.filter(user=request.user)
+    user_farms = get_farm_registry(request)
+    farms_count = len(user_farms)
+    
+    # Get the user's todos in Meta.ordering order, served from the
+    # (user, completed, priority, due_date) index and capped for large lists.
+    # The queryset stays lazy: the template renders it inside a {% cache %}
+    # fragment keyed by data_version, so a cache hit skips the query.
+    todos = models.TodoList.objects.filter(user_farms.live_records(), user=request.user)
     todos_count = todos.count()
-    
-    # Get user's farms for the todo form
-    user_farms = models.Farm.objects.filter(user=request.user)
+    todos = todos.select_related('farm')[:DASHBOARD_TODO_LIMIT]
     
     # Financial statistics (last 30 days)
     start_date = timezone.now().date() - timedelta(days=30)
     total_expenses = models.Expense.objects.filter(
+        user_farms.live_records(),
         user=request.user,
         date__gte=start_date
     ).aggregate(Sum('amount'))['amount__sum'] or 0
     
     total_income = models.Income.objects.filter(
+        user_farms.live_records(),
         user=request.user,
         date__gte=start_date
     ).aggregate(Sum('amount'))['amount__sum'] or 0
@@ -102,6 +114,8 @@ def dashboard(request):
     net_profit = total_income - total_expenses
     
     context = {
+        'attention': get_attention_digest(request.user),
+        'data_version': get_user_version(request.user.id),
         'farms_count': farms_count,
         'todos': todos,
         'todos_count': todos_count,
@@ -146,13 +160,29 @@ def edit_profile(request):
         'profile_form': profile_form,
     })
 
+@login_required
+def delete_account(request):
+    """Close the user's account after a password check; their data is purged in the background"""
+    from .purge import soft_delete_account
+
+    if request.method != 'POST':
+        return redirect('edit_profile')
+    if not request.user.check_password(request.POST.get('password', '')):
+        messages.error(request, 'Incorrect password. Your account was not deleted.')
+        return redirect('edit_profile')
+
+    soft_delete_account(request.user)
+    logout(request)
+    messages.success(request, 'Your account has been deleted.')
+    return redirect('index')
+
 @login_required
 def management(request):
     """Management page view with farm CRUD operations"""
     from . import models
     
     # Get all farms for the logged-in user
-    farms = models.Farm.objects.filter(user=request.user)
+    farms = get_farm_registry(request)
     
     # Handle farm creation
     if request.method == 'POST' and 'add_farm' in request.POST:
@@ -183,6 +213,7 @@ def management(request):
     
     context = {
         'farms': farms,
+        'schedule_templates': models.ScheduleTemplate.objects.all(),
     }
     return render(request, 'home/management.html', context)
 
@@ -192,7 +223,7 @@ def edit_farm(request, farm_id):
     from . import models
     
     try:
-        farm = models.Farm.objects.get(id=farm_id, user=request.user)
+        farm = get_farm_registry(request).get(farm_id)
     except models.Farm.DoesNotExist:
         messages.error(request, 'Farm not found.')
         return redirect('management')
@@ -216,25 +247,55 @@ def edit_farm(request, farm_id):
     
     context = {
         'farm': farm,
-        'farms': models.Farm.objects.filter(user=request.user),
+        'farms': get_farm_registry(request),
+        'schedule_templates': models.ScheduleTemplate.objects.all(),
     }
     return render(request, 'home/management.html', context)
 
 @login_required
 def delete_farm(request, farm_id):
-    """Delete farm view"""
+    """Delete farm view; the farm disappears now and its records are purged in the background"""
     from . import models
+    from .purge import soft_delete_farms
     
     try:
-        farm = models.Farm.objects.get(id=farm_id, user=request.user)
+        farm = get_farm_registry(request).get(farm_id)
         farm_name = farm.farm_name
-        farm.delete()
+        soft_delete_farms(request.user, [farm])
         messages.success(request, f'Farm "{farm_name}" deleted successfully!')
     except models.Farm.DoesNotExist:
         messages.error(request, 'Farm not found.')
     
     return redirect('management')
 
+@login_required
+def apply_schedule_template(request):
+    """Apply a crop schedule template to one or more of the user's farms"""
+    from . import models
+    from .schedules import apply_template
+
+    if request.method == 'POST':
+        farm_ids = request.POST.getlist('farms')
+
+        try:
+            template = models.ScheduleTemplate.objects.get(id=request.POST.get('template'))
+            farms = get_farm_registry(request).filter(farm_ids)
+            if not farms:
+                messages.error(request, 'Please select at least one farm.')
+                return redirect('management')
+            stages_created, events_created = apply_template(template, farms)
+            messages.success(
+                request,
+                f'Schedule "{template.name}" applied to {len(farms)} farm(s): '
+                f'{stages_created} stages and {events_created} events created.'
+            )
+        except (models.ScheduleTemplate.DoesNotExist, ValueError):
+            messages.error(request, 'Schedule template not found.')
+        except Exception as e:
+            messages.error(request, f'Error applying schedule: {str(e)}')
+
+    return redirect('management')
+
 @login_required
 def add_todo(request):
     """Add todo view"""
@@ -244,11 +305,11 @@ def add_todo(request):
         farm_id = request.POST.get('farm')
         task = request.POST.get('task')
         description = request.POST.get('description', '')
-        priority = request.POST.get('priority', 'medium')
+        priority = models.TodoList.priority_from_slug(request.POST.get('priority', 'medium'))
         due_date = request.POST.get('due_date')
         
         try:
-            farm = models.Farm.objects.get(id=farm_id, user=request.user)
+            farm = get_farm_registry(request).get(farm_id)
             models.TodoList.objects.create(
                 user=request.user,
                 farm=farm,
@@ -270,15 +331,23 @@ def toggle_todo(request, todo_id):
     """Toggle todo completion status"""
     from . import models
     
-    try:
-        todo = models.TodoList.objects.get(id=todo_id, user=request.user)
-        todo.completed = not todo.completed
-        todo.save()
-        status = "completed" if todo.completed else "reopened"
+    from django.db.models import Case, When, Value
+    from django.utils import timezone
+
+    # Flip the flag in the database so concurrent toggles never lose updates
+    todos = models.TodoList.objects.filter(get_farm_registry(request).live_records(), id=todo_id, user=request.user)
+    updated = todos.update(
+        completed=Case(When(completed=True, then=Value(False)), default=Value(True)),
+        updated_at=timezone.now(),
+    )
+    if updated:
+        bump_user_version(request.user.id)
+        completed = todos.values_list('completed', flat=True).first()
+        status = "completed" if completed else "reopened"
         messages.success(request, f'Todo {status} successfully!')
-    except models.TodoList.DoesNotExist:
+    else:
         messages.error(request, 'Todo not found.')
-    
+
     return redirect('dashboard')
 
 @login_required
@@ -287,40 +356,209 @@ def delete_todo(request, todo_id):
     from . import models
     
     try:
-        todo = models.TodoList.objects.get(id=todo_id, user=request.user)
+        todo = models.TodoList.objects.get(get_farm_registry(request).live_records(), id=todo_id, user=request.user)
         todo.delete()
         messages.success(request, 'Todo deleted successfully!')
     except models.TodoList.DoesNotExist:
         messages.error(request, 'Todo not found.')
-    
+
     return redirect('dashboard')
 
 
+BULK_TODO_ACTIONS = ('complete', 'reopen', 'toggle', 'prioritize', 'delete')
+
+@login_required
+def bulk_todo_action(request):
+    """Complete, reopen, toggle, reprioritise or delete a set of todos in one statement"""
+    import json
+    from . import models
+    from django.db.models import Case, When, Value
+    from django.utils import timezone
+
+    if request.method != 'POST':
+        return JsonResponse({'error': 'Invalid request method'}, status=405)
+
+    try:
+        data = json.loads(request.body)
+        action = data.get('action')
+        ids = data.get('ids', [])
+        # A string would be iterated digit by digit ("12" -> todos 1 and 2)
+        if not isinstance(ids, list):
+            return JsonResponse({'error': 'ids must be a list'}, status=400)
+        ids = [int(todo_id) for todo_id in ids]
+    except (ValueError, TypeError, AttributeError):
+        return JsonResponse({'error': 'Invalid request body'}, status=400)
+
+    if action not in BULK_TODO_ACTIONS:
+        return JsonResponse({'error': f'Unknown action: {action}'}, status=400)
+    if not ids:
+        return JsonResponse({'error': 'No todos selected'}, status=400)
+
+    # Owner scoping is part of the WHERE clause, so foreign ids are silently ignored
+    todos = models.TodoList.objects.filter(get_farm_registry(request).live_records(), user=request.user, id__in=ids)
+    now = timezone.now()
+
+    if action == 'delete':
+        # Through the collector, so the post_delete handlers keep search, retrieval and caches in step
+        deleted_ids = list(todos.values_list('id', flat=True))
+        affected, _ = models.TodoList.objects.filter(user=request.user, id__in=deleted_ids).delete()
+        return JsonResponse({'action': action, 'affected': affected, 'ids': deleted_ids})
+
+    if action == 'complete':
+        affected = todos.update(completed=True, updated_at=now)
+    elif action == 'reopen':
+        affected = todos.update(completed=False, updated_at=now)
+    elif action == 'toggle':
+        affected = todos.update(
+            completed=Case(When(completed=True, then=Value(False)), default=Value(True)),
+            updated_at=now,
+        )
+    else:
+        priority = models.TodoList.priority_from_slug(data.get('priority'), default=None)
+        if priority is None:
+            return JsonResponse({'error': f"Unknown priority: {data.get('priority')}"}, status=400)
+        affected = todos.update(priority=priority, updated_at=now)
+
+    if affected:
+        bump_user_version(request.user.id)
+
+    return JsonResponse({
+        'action': action,
+        'affected': affected,
+        'todos': [
+            {'id': todo_id, 'completed': completed, 'priority': models.TodoList.PRIORITY_SLUGS.get(priority)}
+            for todo_id, completed, priority in todos.values_list('id', 'completed', 'priority')
+        ],
+    })
+
+
+@login_required
+@conditional_page
+def attention_digest(request):
+    """JSON feed of overdue todos, due-soon events and stalled crop stages"""
+    return JsonResponse(get_attention_digest(request.user))
+
+
+@login_required
+def search_view(request):
+    """Full-text search across the user's farms, tasks, transactions and crop notes"""
+    from . import models
+    from .search import search
+
+    query = request.GET.get('q', '').strip()
+    kind_filter = request.GET.get('kind', '')
+    results = search(request.user, query, kinds=[kind_filter] if kind_filter else None)
+
+    if request.GET.get('format') == 'json':
+        return JsonResponse({'query': query, 'results': results})
+
+    context = {
+        'query': query,
+        'kind_filter': kind_filter,
+        'kind_choices': models.SearchEntry.KIND_CHOICES,
+        'results': results,
+    }
+    return render(request, 'home/search_results.html', context)
+
+
+def _chatbot_busy(reason, retry_after):
+    """Fast 429 for a chatbot request over a rate or concurrency limit"""
+    import math
+    from . import metrics
+
+    metrics.chatbot_rejected_total.inc(reason)
+    seconds = max(1, math.ceil(retry_after))
+    response = JsonResponse({
+        'response': f'The assistant is busy. Please try again in {seconds} second{"s" if seconds != 1 else ""}.',
+        'retry_after': seconds,
+    }, status=429)
+    response['Retry-After'] = str(seconds)
+    return response
+
+
+def _chatbot_local_answer(request):
+    """JSON answer for a question the intent router (home/intents.py) handles, else None"""
+    import json
+    import time
+    from django.conf import settings
+    from . import conversations, metrics
+    from .intents import route
+
+    try:
+        data = json.loads(request.body)
+        question = str(data.get('message', ''))[:settings.CHATBOT_MAX_MESSAGE_CHARS]
+    except (ValueError, AttributeError):
+        return None  # chatbot_query reports malformed requests
+
+    start = time.perf_counter()
+    name, answer = route(request.user, question)
+    metrics.chatbot_route_duration.observe(time.perf_counter() - start, name or 'llm')
+    metrics.chatbot_routed_total.inc(name or 'llm')
+    if answer is None:
+        return None
+
+    conversation, _ = conversations.get_or_start(request.user, data.get('conversation'))
+    conversations.record_turn(conversation.id, question, answer)
+    return JsonResponse({
+        'response': answer,
+        'conversation': conversation.id,
+        'route': name,
+    })
+
+
 @login_required
 def chatbot_query(request):
-    """Handle chatbot queries using Gemini API"""
+    """Handle chatbot queries through the configured LLM backend (home/llm.py)"""
+    import json
+    import time
+    from django.conf import settings
+    from django.http import JsonResponse
+    from . import conversations, llm, metrics
+    from .ratelimit import ConcurrencyLimit, TokenBucket
+    from .retrieval import relevant_snippets
+
     if request.method == 'POST':
-        import json
-        import google.generativeai as genai
-        from django.conf import settings
-        from django.http import JsonResponse
+        # Per-user and global token buckets, then a cap on upstream calls in flight
+        retry_after = TokenBucket('chatbot-user', settings.CHATBOT_USER_RATE, settings.CHATBOT_USER_BURST).take(request.user.id)
+        if retry_after:
+            return _chatbot_busy('user_rate', retry_after)
+        
+        # Lookups in the user's own records are answered here, without spending upstream quota
+        if settings.CHATBOT_LOCAL_ANSWERS:
+            response = _chatbot_local_answer(request)
+            if response is not None:
+                return response
         
+        retry_after = TokenBucket('chatbot-global', settings.CHATBOT_GLOBAL_RATE, settings.CHATBOT_GLOBAL_BURST).take()
+        if retry_after:
+            return _chatbot_busy('global_rate', retry_after)
+        in_flight = ConcurrencyLimit('chatbot-upstream', settings.CHATBOT_MAX_CONCURRENT, settings.CHATBOT_SLOT_TIMEOUT)
+        slot = in_flight.acquire()
+        if slot is None:
+            return _chatbot_busy('concurrency', settings.CHATBOT_BUSY_RETRY_AFTER)
+
         try:
             # Get the user's message
             data = json.loads(request.body)
-            user_message = data.get('message', '')
+            user_message = str(data.get('message', ''))[:settings.CHATBOT_MAX_MESSAGE_CHARS]
             
-            # Configure Gemini API (you'll need to set GOOGLE_API_KEY in settings)
-            api_key = getattr(settings, 'GOOGLE_API_KEY', None)
-            if not api_key:
+            try:
+                client = llm.get_client()
+            except llm.LLMNotConfigured:
+                metrics.chatbot_errors_total.inc('not_configured')
                 return JsonResponse({
                     'response': 'API key not configured. Please contact the administrator.'
                 })
             
-            genai.configure(api_key=api_key)
+            # Only the user's records most relevant to the question, not all of their data
+            retrieval_start = time.perf_counter()
+            snippets = relevant_snippets(request.user.id, user_message)
+            metrics.chatbot_retrieval_duration.observe(time.perf_counter() - retrieval_start)
+            farm_context = '\n'.join(f'- {snippet}' for snippet in snippets) or '- (no matching records)'
             
-            # Use a known working model from the available list
-            model = genai.GenerativeModel('models/gemini-2.0-flash')
+            # Rolling summary plus the newest turns that fit the token budget
+            conversation, history = conversations.get_or_start(request.user, data.get('conversation'))
+            history_text = conversations.history_prompt(conversation, history) or '(new conversation)'
             
             # Create a prompt that's specific to farming with better structure
             prompt = f"""
@@ -331,28 +569,185 @@ def chatbot_query(request):
             3. When asked about weather, acknowledge you don't have real-time data but suggest specific resources
             4. For soil health, crop care, and farming practices, provide detailed, evidence-based recommendations
             5. Structure responses with clear headings or bullet points when appropriate
+            6. Use the user's farm records below when they bear on the question; do not invent records
+            
+            The user's farm records most relevant to the question:
+            {farm_context}
+            
+            Conversation so far:
+            {history_text}
             
             User question: {user_message}
             
             Response:
             """
+            metrics.chatbot_prompt_tokens.observe(conversations.estimate_tokens(prompt))
             
             # Generate response
-            response = model.generate_content(prompt)
+            upstream_start = time.perf_counter()
+            try:
+                response_text = client.generate(prompt)
+            except Exception as e:
+                metrics.chatbot_upstream_duration.observe(time.perf_counter() - upstream_start, 'error')
+                metrics.chatbot_errors_total.inc('upstream')
+                return JsonResponse({
+                    'response': f"Sorry, I encountered an error: {str(e)}"
+                })
+            metrics.chatbot_upstream_duration.observe(time.perf_counter() - upstream_start, 'ok')
+            conversations.record_turn(conversation.id, user_message, response_text)
             
             return JsonResponse({
-                'response': response.text
+                'response': response_text,
+                'conversation': conversation.id,
             })
         except Exception as e:
+            metrics.chatbot_errors_total.inc('internal')
             return JsonResponse({
                 'response': f"Sorry, I encountered an error: {str(e)}"
             })
-    
-        return JsonResponse({'response': 'Invalid request method'})
+        finally:
+            in_flight.release(slot)
+    
+    return JsonResponse({'response': 'Invalid request method'})
+
+def metrics_view(request):
+    """Prometheus text exposition of the portal metrics (staff or bearer token)"""
+    from django.conf import settings
+    from django.http import HttpResponse
+    from django.utils.crypto import constant_time_compare
+    from . import metrics
+
+    token = settings.METRICS_TOKEN
+    authorization = request.headers.get('Authorization', '')
+    allowed = request.user.is_authenticated and request.user.is_staff
+    if not allowed and token and authorization.startswith('Bearer '):
+        allowed = constant_time_compare(authorization[len('Bearer '):], token)
+    if not allowed:
+        return HttpResponse('Forbidden', status=403, content_type='text/plain')
+
+    return HttpResponse(metrics.registry.render(), content_type='text/plain; version=0.0.4; charset=utf-8')
+
+@staff_member_required
+def profile_index(request):
+    """List recent profiler captures and toggle profiling of this session's requests"""
+    from .middleware import ProfilingMiddleware
+    from .profiling import list_captures
+
+    if request.method == 'POST':
+        enabled = request.POST.get('profile_requests') == 'on'
+        request.session['profile_requests'] = enabled
+        messages.success(request, f'Request profiling {"enabled" if enabled else "disabled"} for your session.')
+        response = redirect('profile_index')
+        if enabled:
+            response.set_cookie(ProfilingMiddleware.SWITCH_COOKIE, '1', httponly=True, samesite='Lax')
+        else:
+            response.delete_cookie(ProfilingMiddleware.SWITCH_COOKIE, samesite='Lax')
+        return response
+
+    return render(request, 'home/profiles.html', {
+        'captures': list_captures(),
+        'profile_requests': request.session.get('profile_requests', False),
+    })
+
+@staff_member_required
+def profile_download(request, name):
+    """Serve one capture as plain collapsed-stack text"""
+    from django.http import FileResponse, Http404
+    from .profiling import capture_path
+
+    path = capture_path(name)
+    if path is None:
+        raise Http404('Unknown profile capture')
+    return FileResponse(path.open('rb'), content_type='text/plain; charset=utf-8', as_attachment=True, filename=name)
+
+# ==================== BACKGROUND JOB VIEWS ====================
+
+def _job_json(job):
+    """Status payload polled by static/js/jobs.js"""
+    from django.urls import reverse
+    from .models import Job
+
+    data = {
+        'id': job.id,
+        'kind': job.kind,
+        'status': job.status,
+        'attempts': job.attempts,
+        'created_at': job.created_at.isoformat(),
+        'finished_at': job.finished_at.isoformat() if job.finished_at else None,
+        'status_url': reverse('job_status', args=[job.id]),
+    }
+    if job.status == Job.STATUS_FAILED:
+        data['error'] = job.error
+    if job.status == Job.STATUS_SUCCEEDED and (job.result or {}).get('file'):
+        data['download_url'] = reverse('job_download', args=[job.id])
+    return data
+
+def _visible_job(request, job_id):
+    """The job if it is the user's own (staff see every job), else 404"""
+    from django.shortcuts import get_object_or_404
+    from .models import Job
+
+    jobs = Job.objects.all() if request.user.is_staff else Job.objects.filter(user=request.user)
+    return get_object_or_404(jobs, pk=job_id)
+
+@login_required
+def request_financial_report(request):
+    """Queue a CSV report of the user's income and expenses for a financial overview period"""
+    from datetime import timedelta
+    from django.utils import timezone
+    from .jobs import enqueue
+    from .models import Job
+
+    if request.method != 'POST':
+        return JsonResponse({'error': 'Invalid request method'}, status=405)
+
+    period_days = {'7': 7, '30': 30, '90': 90, '365': 365}
+    period = request.POST.get('period', '30')
+    params = {}
+    if period != 'all':
+        today = timezone.localdate()
+        params = {'start': (today - timedelta(days=period_days.get(period, 30))).isoformat(), 'end': today.isoformat()}
+    # Someone is waiting on the page for this one
+    job = enqueue('financial_report', params=params, user=request.user, priority=Job.PRIORITY_HIGH)
+    return JsonResponse(_job_json(job), status=202)
+
+@staff_member_required
+def request_database_export(request):
+    """Queue the full JSON export (the job behind export_database.py)"""
+    from .jobs import enqueue
+    from .models import Job
+
+    if request.method != 'POST':
+        return JsonResponse({'error': 'Invalid request method'}, status=405)
+    job = enqueue('export_database', user=request.user, priority=Job.PRIORITY_LOW)
+    return JsonResponse(_job_json(job), status=202)
+
+@login_required
+def job_status(request, job_id):
+    """Poll a background job"""
+    return JsonResponse(_job_json(_visible_job(request, job_id)))
+
+@login_required
+def job_download(request, job_id):
+    """The file written by a finished job"""
+    import os
+    from django.conf import settings
+    from django.http import FileResponse, Http404
+    from .models import Job
+
+    job = _visible_job(request, job_id)
+    filename = (job.result or {}).get('file')
+    if job.status != Job.STATUS_SUCCEEDED or not filename:
+        raise Http404('No output for this job')
+    path = os.path.join(settings.JOB_OUTPUT_DIR, os.path.basename(filename))
+    if not os.path.isfile(path):
+        raise Http404('Job output has been removed')
+    return FileResponse(open(path, 'rb'), as_attachment=True, filename=os.path.basename(filename))
 
 # ==================== FINANCIAL MANAGEMENT VIEWS ====================
 
 @login_required
+@conditional_page
 def financial_overview(request):
     """Financial overview dashboard"""
     from . import models
@@ -361,7 +756,7 @@ def financial_overview(request):
     from django.utils import timezone
     
     # Get user's farms
-    user_farms = models.Farm.objects.filter(user=request.user)
+    user_farms = get_farm_registry(request)
     
     # Date filters (default to last 30 days)
     date_filter = request.GET.get('period', '30')
@@ -382,8 +777,8 @@ def financial_overview(request):
         end_date = timezone.now().date()
     
     # Filter expenses and incomes
-    expense_filter = Q(user=request.user)
-    income_filter = Q(user=request.user)
+    expense_filter = Q(user=request.user) & user_farms.live_records()
+    income_filter = Q(user=request.user) & user_farms.live_records()
     
     if start_date and end_date:
         expense_filter &= Q(date__gte=start_date, date__lte=end_date)
@@ -410,11 +805,12 @@ def financial_overview(request):
     ).order_by('-total')
     
     # Recent transactions
-    recent_expenses = models.Expense.objects.filter(user=request.user).order_by('-date')[:10]
-    recent_incomes = models.Income.objects.filter(user=request.user).order_by('-date')[:10]
+    recent_expenses = models.Expense.objects.filter(user_farms.live_records(), user=request.user).order_by('-date')[:10]
+    recent_incomes = models.Income.objects.filter(user_farms.live_records(), user=request.user).order_by('-date')[:10]
     
     # Budget status
     active_budgets = models.Budget.objects.filter(
+        user_farms.live_records(),
         user=request.user,
         start_date__lte=timezone.now().date(),
         end_date__gte=timezone.now().date()
@@ -439,12 +835,13 @@ def financial_overview(request):
 
 
 @login_required
+@conditional_page
 def expense_list(request):
     """List all expenses"""
     from . import models
     
-    expenses = models.Expense.objects.filter(user=request.user).order_by('-date')
-    user_farms = models.Farm.objects.filter(user=request.user)
+    user_farms = get_farm_registry(request)
+    expenses = models.Expense.objects.filter(user_farms.live_records(), user=request.user).order_by('-date')
     
     # Filtering
     farm_filter = request.GET.get('farm')
@@ -488,7 +885,7 @@ def add_expense(request):
         date = request.POST.get('date')
         
         try:
-            farm = models.Farm.objects.get(id=farm_id, user=request.user)
+            farm = get_farm_registry(request).get(farm_id)
             models.Expense.objects.create(
                 user=request.user,
                 farm=farm,
@@ -505,7 +902,7 @@ def add_expense(request):
         
         return redirect('expense_list')
     
-    user_farms = models.Farm.objects.filter(user=request.user)
+    user_farms = get_farm_registry(request)
     return render(request, 'home/add_expense.html', {'user_farms': user_farms})
 
 
@@ -515,13 +912,13 @@ def edit_expense(request, expense_id):
     from . import models
     
     try:
-        expense = models.Expense.objects.get(id=expense_id, user=request.user)
+        expense = models.Expense.objects.get(get_farm_registry(request).live_records(), id=expense_id, user=request.user)
     except models.Expense.DoesNotExist:
         messages.error(request, 'Expense not found.')
         return redirect('expense_list')
     
     if request.method == 'POST':
-        expense.farm = models.Farm.objects.get(id=request.POST.get('farm'), user=request.user)
+        expense.farm = get_farm_registry(request).get(request.POST.get('farm'))
         expense.category = request.POST.get('category')
         expense.amount = request.POST.get('amount')
         expense.description = request.POST.get('description', '')
@@ -530,7 +927,7 @@ def edit_expense(request, expense_id):
         messages.success(request, 'Expense updated successfully!')
         return redirect('expense_list')
     
-    user_farms = models.Farm.objects.filter(user=request.user)
+    user_farms = get_farm_registry(request)
     context = {
         'expense': expense,
         'user_farms': user_farms,
@@ -544,7 +941,7 @@ def delete_expense(request, expense_id):
     from . import models
     
     try:
-        expense = models.Expense.objects.get(id=expense_id, user=request.user)
+        expense = models.Expense.objects.get(get_farm_registry(request).live_records(), id=expense_id, user=request.user)
         expense.delete()
         messages.success(request, 'Expense deleted successfully!')
     except models.Expense.DoesNotExist:
@@ -554,12 +951,13 @@ def delete_expense(request, expense_id):
 
 
 @login_required
+@conditional_page
 def income_list(request):
     """List all incomes"""
     from . import models
     
-    incomes = models.Income.objects.filter(user=request.user).order_by('-date')
-    user_farms = models.Farm.objects.filter(user=request.user)
+    user_farms = get_farm_registry(request)
+    incomes = models.Income.objects.filter(user_farms.live_records(), user=request.user).order_by('-date')
     
     # Filtering
     farm_filter = request.GET.get('farm')
@@ -603,7 +1001,7 @@ def add_income(request):
         date = request.POST.get('date')
         
         try:
-            farm = models.Farm.objects.get(id=farm_id, user=request.user)
+            farm = get_farm_registry(request).get(farm_id)
             models.Income.objects.create(
                 user=request.user,
                 farm=farm,
@@ -620,7 +1018,7 @@ def add_income(request):
         
         return redirect('income_list')
     
-    user_farms = models.Farm.objects.filter(user=request.user)
+    user_farms = get_farm_registry(request)
     return render(request, 'home/add_income.html', {'user_farms': user_farms})
 
 
@@ -630,13 +1028,13 @@ def edit_income(request, income_id):
     from . import models
     
     try:
-        income = models.Income.objects.get(id=income_id, user=request.user)
+        income = models.Income.objects.get(get_farm_registry(request).live_records(), id=income_id, user=request.user)
     except models.Income.DoesNotExist:
         messages.error(request, 'Income not found.')
         return redirect('income_list')
     
     if request.method == 'POST':
-        income.farm = models.Farm.objects.get(id=request.POST.get('farm'), user=request.user)
+        income.farm = get_farm_registry(request).get(request.POST.get('farm'))
         income.category = request.POST.get('category')
         income.amount = request.POST.get('amount')
         income.description = request.POST.get('description', '')
@@ -645,7 +1043,7 @@ def edit_income(request, income_id):
         messages.success(request, 'Income updated successfully!')
         return redirect('income_list')
     
-    user_farms = models.Farm.objects.filter(user=request.user)
+    user_farms = get_farm_registry(request)
     context = {
         'income': income,
         'user_farms': user_farms,
@@ -659,7 +1057,7 @@ def delete_income(request, income_id):
     from . import models
     
     try:
-        income = models.Income.objects.get(id=income_id, user=request.user)
+        income = models.Income.objects.get(get_farm_registry(request).live_records(), id=income_id, user=request.user)
         income.delete()
         messages.success(request, 'Income deleted successfully!')
     except models.Income.DoesNotExist:
@@ -669,12 +1067,13 @@ def delete_income(request, income_id):
 
 
 @login_required
+@conditional_page
 def budget_list(request):
     """List all budgets"""
     from . import models
     
-    budgets = models.Budget.objects.filter(user=request.user).order_by('-start_date')
-    user_farms = models.Farm.objects.filter(user=request.user)
+    user_farms = get_farm_registry(request)
+    budgets = models.Budget.objects.filter(user_farms.live_records(), user=request.user).order_by('-start_date')
     
     # Filtering
     farm_filter = request.GET.get('farm')
@@ -709,7 +1108,7 @@ def add_budget(request):
         description = request.POST.get('description', '')
         
         try:
-            farm = models.Farm.objects.get(id=farm_id, user=request.user)
+            farm = get_farm_registry(request).get(farm_id)
             models.Budget.objects.create(
                 user=request.user,
                 farm=farm,
@@ -728,7 +1127,7 @@ def add_budget(request):
         
         return redirect('budget_list')
     
-    user_farms = models.Farm.objects.filter(user=request.user)
+    user_farms = get_farm_registry(request)
     return render(request, 'home/add_budget.html', {'user_farms': user_farms})
 
 
@@ -738,13 +1137,13 @@ def edit_budget(request, budget_id):
     from . import models
     
     try:
-        budget = models.Budget.objects.get(id=budget_id, user=request.user)
+        budget = models.Budget.objects.get(get_farm_registry(request).live_records(), id=budget_id, user=request.user)
     except models.Budget.DoesNotExist:
         messages.error(request, 'Budget not found.')
         return redirect('budget_list')
     
     if request.method == 'POST':
-        budget.farm = models.Farm.objects.get(id=request.POST.get('farm'), user=request.user)
+        budget.farm = get_farm_registry(request).get(request.POST.get('farm'))
         budget.category = request.POST.get('category')
         budget.allocated_amount = request.POST.get('allocated_amount')
         budget.period = request.POST.get('period')
@@ -755,7 +1154,7 @@ def edit_budget(request, budget_id):
         messages.success(request, 'Budget updated successfully!')
         return redirect('budget_list')
     
-    user_farms = models.Farm.objects.filter(user=request.user)
+    user_farms = get_farm_registry(request)
     context = {
         'budget': budget,
         'user_farms': user_farms,
@@ -769,7 +1168,7 @@ def delete_budget(request, budget_id):
     from . import models
     
     try:
-        budget = models.Budget.objects.get(id=budget_id, user=request.user)
+        budget = models.Budget.objects.get(get_farm_registry(request).live_records(), id=budget_id, user=request.user)
         budget.delete()
         messages.success(request, 'Budget deleted successfully!')
     except models.Budget.DoesNotExist:
@@ -781,6 +1180,7 @@ def delete_budget(request, budget_id):
 # ==================== CROP CALENDAR & SCHEDULING VIEWS ====================
 
 @login_required
+@conditional_page
 def crop_calendar(request):
     """Main crop calendar view with calendar display"""
     from . import models
@@ -788,7 +1188,7 @@ def crop_calendar(request):
     from calendar import monthrange
     
     # Get user's farms
-    user_farms = models.Farm.objects.filter(user=request.user)
+    user_farms = get_farm_registry(request)
     
     # Get month/year from query params (default to current month)
     today = date.today()
@@ -802,6 +1202,7 @@ def crop_calendar(request):
     
     # Get all calendar events for the month
     calendar_events = models.CropCalendar.objects.filter(
+        user_farms.live_records(),
         user=request.user,
         date__gte=first_day,
         date__lte=last_day
@@ -809,17 +1210,19 @@ def crop_calendar(request):
     
     # Get all crop stages
     crop_stages = models.CropStage.objects.filter(
+        user_farms.live_records(),
         user=request.user
     ).order_by('start_date')
     
     # Get upcoming events (next 7 days)
     upcoming_date = today + timedelta(days=7)
-    upcoming_events = models.CropCalendar.objects.filter(
+    upcoming_events = annotate_due_soon(models.CropCalendar.objects.filter(
+        user_farms.live_records(),
         user=request.user,
         date__gte=today,
         date__lte=upcoming_date,
         completed=False
-    ).order_by('date')[:10]
+    ).select_related('farm').order_by('date'), today)[:10]
     
     # Group events by date for calendar display
     events_by_date = {}
@@ -890,12 +1293,13 @@ def crop_calendar(request):
 
 
 @login_required
+@conditional_page
 def crop_stages_list(request):
     """List all crop stages"""
     from . import models
     
-    crop_stages = models.CropStage.objects.filter(user=request.user).order_by('-start_date')
-    user_farms = models.Farm.objects.filter(user=request.user)
+    user_farms = get_farm_registry(request)
+    crop_stages = models.CropStage.objects.filter(user_farms.live_records(), user=request.user).order_by('-start_date')
     
     # Filtering
     farm_filter = request.GET.get('farm')
@@ -935,7 +1339,7 @@ def add_crop_stage(request):
         completed = request.POST.get('completed') == 'on'
         
         try:
-            farm = models.Farm.objects.get(id=farm_id, user=request.user)
+            farm = get_farm_registry(request).get(farm_id)
             models.CropStage.objects.create(
                 user=request.user,
                 farm=farm,
@@ -953,7 +1357,7 @@ def add_crop_stage(request):
         
         return redirect('crop_stages_list')
     
-    user_farms = models.Farm.objects.filter(user=request.user)
+    user_farms = get_farm_registry(request)
     return render(request, 'home/add_crop_stage.html', {'user_farms': user_farms})
 
 
@@ -963,13 +1367,13 @@ def edit_crop_stage(request, stage_id):
     from . import models
     
     try:
-        stage = models.CropStage.objects.get(id=stage_id, user=request.user)
+        stage = models.CropStage.objects.get(get_farm_registry(request).live_records(), id=stage_id, user=request.user)
     except models.CropStage.DoesNotExist:
         messages.error(request, 'Crop stage not found.')
         return redirect('crop_stages_list')
     
     if request.method == 'POST':
-        stage.farm = models.Farm.objects.get(id=request.POST.get('farm'), user=request.user)
+        stage.farm = get_farm_registry(request).get(request.POST.get('farm'))
         stage.stage_name = request.POST.get('stage_name')
         stage.start_date = request.POST.get('start_date')
         stage.end_date = request.POST.get('end_date') or None
@@ -979,7 +1383,7 @@ def edit_crop_stage(request, stage_id):
         messages.success(request, 'Crop stage updated successfully!')
         return redirect('crop_stages_list')
     
-    user_farms = models.Farm.objects.filter(user=request.user)
+    user_farms = get_farm_registry(request)
     context = {
         'stage': stage,
         'user_farms': user_farms,
@@ -993,7 +1397,7 @@ def delete_crop_stage(request, stage_id):
     from . import models
     
     try:
-        stage = models.CropStage.objects.get(id=stage_id, user=request.user)
+        stage = models.CropStage.objects.get(get_farm_registry(request).live_records(), id=stage_id, user=request.user)
         stage.delete()
         messages.success(request, 'Crop stage deleted successfully!')
     except models.CropStage.DoesNotExist:
@@ -1003,12 +1407,16 @@ def delete_crop_stage(request, stage_id):
 
 
 @login_required
+@conditional_page
 def calendar_events_list(request):
     """List all calendar events"""
     from . import models
     
-    events = models.CropCalendar.objects.filter(user=request.user).order_by('date')
-    user_farms = models.Farm.objects.filter(user=request.user)
+    user_farms = get_farm_registry(request)
+    events = annotate_due_soon(
+        models.CropCalendar.objects.filter(user_farms.live_records(), user=request.user)
+        .select_related('farm').order_by('date')
+    )
     
     # Filtering
     farm_filter = request.GET.get('farm')
@@ -1056,7 +1464,7 @@ def add_calendar_event(request):
         completed = request.POST.get('completed') == 'on'
         
         try:
-            farm = models.Farm.objects.get(id=farm_id, user=request.user)
+            farm = get_farm_registry(request).get(farm_id)
             models.CropCalendar.objects.create(
                 user=request.user,
                 farm=farm,
@@ -1074,7 +1482,7 @@ def add_calendar_event(request):
         
         return redirect('calendar_events_list')
     
-    user_farms = models.Farm.objects.filter(user=request.user)
+    user_farms = get_farm_registry(request)
     return render(request, 'home/add_calendar_event.html', {'user_farms': user_farms})
 
 
@@ -1084,13 +1492,13 @@ def edit_calendar_event(request, event_id):
     from . import models
     
     try:
-        event = models.CropCalendar.objects.get(id=event_id, user=request.user)
+        event = models.CropCalendar.objects.get(get_farm_registry(request).live_records(), id=event_id, user=request.user)
     except models.CropCalendar.DoesNotExist:
         messages.error(request, 'Calendar event not found.')
         return redirect('calendar_events_list')
     
     if request.method == 'POST':
-        event.farm = models.Farm.objects.get(id=request.POST.get('farm'), user=request.user)
+        event.farm = get_farm_registry(request).get(request.POST.get('farm'))
         event.event_type = request.POST.get('event_type')
         event.date = request.POST.get('date')
         event.description = request.POST.get('description', '')
@@ -1100,7 +1508,7 @@ def edit_calendar_event(request, event_id):
         messages.success(request, 'Calendar event updated successfully!')
         return redirect('calendar_events_list')
     
-    user_farms = models.Farm.objects.filter(user=request.user)
+    user_farms = get_farm_registry(request)
     context = {
         'event': event,
         'user_farms': user_farms,
@@ -1114,7 +1522,7 @@ def delete_calendar_event(request, event_id):
     from . import models
     
     try:
-        event = models.CropCalendar.objects.get(id=event_id, user=request.user)
+        event = models.CropCalendar.objects.get(get_farm_registry(request).live_records(), id=event_id, user=request.user)
         event.delete()
         messages.success(request, 'Calendar event deleted successfully!')
     except models.CropCalendar.DoesNotExist:
@@ -1129,7 +1537,7 @@ def toggle_calendar_event(request, event_id):
     from . import models
     
     try:
-        event = models.CropCalendar.objects.get(id=event_id, user=request.user)
+        event = models.CropCalendar.objects.get(get_farm_registry(request).live_records(), id=event_id, user=request.user)
         event.completed = not event.completed
         event.save()
         status = "completed" if event.completed else "reopened"
@@ -0,0 +1,131 @@
+"""
+Warm start: do the one-off work of a worker's first requests at boot.
+
+Views import their dependencies inside the function, URL patterns compile
+their regexes on first match, the cached template loader compiles each
+template on first render and the chatbot imports google-generativeai on its
+first call. warm_up() does all of that up front. With gunicorn's --preload
+(see gunicorn.conf.py) farm_portal/wsgi.py runs it once in the master, so
+every forked worker starts with it done and shares the memory copy-on-write.
+
+Each phase's duration is logged as one "startup" record on home.perf.
+"""
+
+import ast
+import importlib
+import importlib.util
+import inspect
+import json
+import logging
+import os
+import time
+
+from django.conf import settings
+from django.db import connections
+from django.template import engines
+from django.urls import URLResolver, get_resolver
+
+perf_logger = logging.getLogger('home.perf')
+
+
+def _function_imports(module):
+    """Absolute names of the modules imported inside functions of `module`"""
+    tree = ast.parse(inspect.getsource(module))
+    names = set()
+    for function in ast.walk(tree):
+        if not isinstance(function, (ast.FunctionDef, ast.AsyncFunctionDef)):
+            continue
+        for node in ast.walk(function):
+            if isinstance(node, ast.Import):
+                names.update(alias.name for alias in node.names)
+            elif isinstance(node, ast.ImportFrom):
+                base = importlib.util.resolve_name('.' * node.level + (node.module or ''), module.__package__)
+                names.add(base)
+                # "from . import models" names a submodule, "from x import func" does not
+                names.update(f'{base}.{alias.name}' for alias in node.names)
+    return names
+
+
+def import_modules():
+    """Import WARM_START_MODULES and everything their functions import lazily"""
+    imported = 0
+    for module_name in settings.WARM_START_MODULES:
+        module = importlib.import_module(module_name)
+        for name in sorted(_function_imports(module)):
+            try:
+                importlib.import_module(name)
+                imported += 1
+            except ImportError:
+                continue  # "from x import func": not a module
+    return f'{imported} modules'
+
+
+def _compile_patterns(resolver):
+    count = 0
+    for pattern in resolver.url_patterns:
+        pattern.pattern.regex  # compiled lazily on first access
+        count += 1
+        if isinstance(pattern, URLResolver):
+            count += _compile_patterns(pattern)
+    return count
+
+
+def resolve_urls():
+    """Populate the URL resolver's reverse index and compile every pattern"""
+    resolver = get_resolver()
+    resolver.reverse_dict
+    return f'{_compile_patterns(resolver)} patterns'
+
+
+def compile_templates():
+    """Load every template under the TEMPLATES DIRS through the (cached) loaders"""
+    compiled = 0
+    for engine in engines.all():
+        for directory in engine.dirs:
+            for root, _, filenames in os.walk(directory):
+                for filename in filenames:
+                    if not filename.endswith(('.html', '.txt')):
+                        continue
+                    name = os.path.relpath(os.path.join(root, filename), directory).replace(os.sep, '/')
+                    engine.get_template(name)
+                    compiled += 1
+    return f'{compiled} templates'
+
+
+def create_llm_client():
+    """Import the LLM SDK and build the process-wide client; no connection is opened"""
+    from . import llm
+
+    try:
+        client = llm.get_client()
+    except (llm.LLMNotConfigured, ImportError) as e:
+        return f'skipped: {e}'
+    return type(client).__name__
+
+
+PHASES = [
+    ('imports', import_modules),
+    ('urls', resolve_urls),
+    ('templates', compile_templates),
+    ('llm_client', create_llm_client),
+]
+
+
+def warm_up():
+    """Run every phase; returns [(phase, seconds, detail)] and logs them as one record"""
+    results = []
+    for name, phase in PHASES:
+        start = time.perf_counter()
+        detail = phase()
+        results.append((name, time.perf_counter() - start, detail))
+
+    # Nothing opened here may be inherited by forked workers
+    connections.close_all()
+
+    perf_logger.info(json.dumps({
+        'event': 'startup',
+        'pid': os.getpid(),
+        'phases': {name: {'ms': round(seconds * 1000, 1), 'detail': detail} for name, seconds, detail in results},
+        'total_ms': round(sum(seconds for _, seconds, _ in results) * 1000, 1),
+    }))
+    return results
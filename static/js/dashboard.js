@@ -0,0 +1,204 @@
+// Dashboard behaviour: Farm Assistant chatbot and bulk todo actions.
+// Server-side URLs come from data-url attributes on the page.
+document.addEventListener('DOMContentLoaded', function() {
+    const chatbotContainer = document.getElementById('chatbot-container');
+    const chatbotToggle = document.getElementById('chatbot-toggle');
+    const chatbotWindow = document.getElementById('chatbot-window');
+    const chatbotClose = document.getElementById('chatbot-close');
+    const chatbotInput = document.getElementById('chatbot-input');
+    const chatbotSend = document.getElementById('chatbot-send');
+    const chatbotMessages = document.getElementById('chatbot-messages');
+    const suggestionButtons = document.querySelectorAll('.suggestion-btn');
+    // Set from the first reply so follow-up questions keep their context
+    let conversationId = null;
+    
+    // Toggle chatbot window
+    chatbotToggle.addEventListener('click', function() {
+        chatbotWindow.classList.toggle('active');
+    });
+    
+    // Close chatbot window
+    chatbotClose.addEventListener('click', function() {
+        chatbotWindow.classList.remove('active');
+    });
+    
+    // Send message on button click
+    chatbotSend.addEventListener('click', sendMessage);
+    
+    // Send message on Enter key
+    chatbotInput.addEventListener('keypress', function(e) {
+        if (e.key === 'Enter') {
+            sendMessage();
+        }
+    });
+    
+    // Handle suggestion buttons
+    suggestionButtons.forEach(button => {
+        button.addEventListener('click', function() {
+            const message = this.getAttribute('data-message');
+            addMessage(message, 'user');
+            processUserMessage(message);
+        });
+    });
+    
+    // Function to send message
+    function sendMessage() {
+        const message = chatbotInput.value.trim();
+        if (message) {
+            addMessage(message, 'user');
+            chatbotInput.value = '';
+            processUserMessage(message);
+        }
+    }
+    
+    // Function to add message to chat
+    function addMessage(text, sender) {
+        const messageDiv = document.createElement('div');
+        messageDiv.classList.add('message');
+        messageDiv.classList.add(sender + '-message');
+        messageDiv.textContent = text;
+        chatbotMessages.appendChild(messageDiv);
+        chatbotMessages.scrollTop = chatbotMessages.scrollHeight;
+    }
+    
+    // Function to process user message and generate response using Gemini API
+    function processUserMessage(message) {
+        // Show typing indicator
+        const typingIndicator = document.createElement('div');
+        typingIndicator.id = 'typing-indicator';
+        typingIndicator.classList.add('message', 'bot-message');
+        typingIndicator.textContent = 'Thinking...';
+        chatbotMessages.appendChild(typingIndicator);
+        chatbotMessages.scrollTop = chatbotMessages.scrollHeight;
+        
+        // Send request to Django backend which will use Gemini API
+        fetch(chatbotContainer.dataset.url, {
+            method: 'POST',
+            headers: {
+                'Content-Type': 'application/json',
+                'X-CSRFToken': getCookie('csrftoken')
+            },
+            body: JSON.stringify({message: message, conversation: conversationId})
+        })
+        .then(response => response.json())
+        .then(data => {
+            // Remove typing indicator
+            const typingIndicatorElement = document.getElementById('typing-indicator');
+            if (typingIndicatorElement) {
+                typingIndicatorElement.remove();
+            }
+            
+            if (data.conversation) {
+                conversationId = data.conversation;
+            }
+            
+            // Add bot response
+            addMessage(data.response, 'bot');
+        })
+        .catch(error => {
+            // Remove typing indicator
+            const typingIndicatorElement = document.getElementById('typing-indicator');
+            if (typingIndicatorElement) {
+                typingIndicatorElement.remove();
+            }
+            
+            // Add error message
+            addMessage("Sorry, I encountered an error. Please try again.", 'bot');
+            console.error('Error:', error);
+        });
+    }
+    
+    // Bulk todo actions: one request, page updated in place
+    const bulkBar = document.getElementById('todo-bulk-bar');
+    if (bulkBar) {
+        const priorityLabels = {high: 'High', medium: 'Med', low: 'Low'};
+        const selectAll = document.getElementById('todo-select-all');
+        const prioritySelect = document.getElementById('todo-bulk-priority');
+
+        function selectedTodoIds() {
+            return Array.from(document.querySelectorAll('.todo-select:checked')).map(box => parseInt(box.value, 10));
+        }
+
+        function applyTodoState(todo) {
+            const column = document.querySelector('[data-todo-id="' + todo.id + '"]');
+            if (!column) {
+                return;
+            }
+            const card = column.querySelector('.todo-card');
+            card.classList.toggle('completed', todo.completed);
+            card.querySelector('.todo-task').classList.toggle('text-decoration-line-through', todo.completed);
+            card.classList.remove('priority-low', 'priority-medium', 'priority-high');
+            card.classList.add('priority-' + todo.priority);
+            const badge = card.querySelector('.priority-badge');
+            badge.className = 'priority-badge badge bg-' + todo.priority;
+            badge.textContent = priorityLabels[todo.priority] || todo.priority;
+        }
+
+        function runBulkAction(action, extra) {
+            const ids = selectedTodoIds();
+            if (!ids.length) {
+                return;
+            }
+            if (action === 'delete' && !confirm('Delete ' + ids.length + ' selected task(s)?')) {
+                return;
+            }
+            fetch(bulkBar.dataset.url, {
+                method: 'POST',
+                headers: {
+                    'Content-Type': 'application/json',
+                    'X-CSRFToken': getCookie('csrftoken')
+                },
+                body: JSON.stringify(Object.assign({action: action, ids: ids}, extra || {}))
+            })
+            .then(response => response.json())
+            .then(data => {
+                if (data.error) {
+                    alert(data.error);
+                } else if (action === 'delete') {
+                    data.ids.forEach(id => {
+                        const column = document.querySelector('[data-todo-id="' + id + '"]');
+                        if (column) {
+                            column.remove();
+                        }
+                    });
+                } else {
+                    data.todos.forEach(applyTodoState);
+                }
+                document.querySelectorAll('.todo-select').forEach(box => { box.checked = false; });
+                selectAll.checked = false;
+            })
+            .catch(error => console.error('Error:', error));
+        }
+
+        selectAll.addEventListener('change', function() {
+            document.querySelectorAll('.todo-select').forEach(box => { box.checked = selectAll.checked; });
+        });
+        bulkBar.querySelectorAll('[data-bulk-action]').forEach(button => {
+            button.addEventListener('click', function() {
+                runBulkAction(this.dataset.bulkAction);
+            });
+        });
+        prioritySelect.addEventListener('change', function() {
+            if (this.value) {
+                runBulkAction('prioritize', {priority: this.value});
+                this.value = '';
+            }
+        });
+    }
+
+    // Function to get CSRF token
+    function getCookie(name) {
+        let cookieValue = null;
+        if (document.cookie && document.cookie !== '') {
+            const cookies = document.cookie.split(';');
+            for (let i = 0; i < cookies.length; i++) {
+                const cookie = cookies[i].trim();
+                if (cookie.substring(0, name.length + 1) === (name + '=')) {
+                    cookieValue = decodeURIComponent(cookie.substring(name.length + 1));
+                    break;
+                }
+            }
+        }
+        return cookieValue;
+    }
+});
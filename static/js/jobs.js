@@ -0,0 +1,71 @@
+// Background jobs: buttons with data-job-url queue a job, poll its status
+// and start the download when it has finished.
+document.addEventListener('DOMContentLoaded', function() {
+    const POLL_INTERVAL_MS = 2000;
+
+    document.querySelectorAll('[data-job-url]').forEach(button => {
+        const statusElement = document.getElementById(button.dataset.jobStatus);
+
+        function showStatus(text) {
+            if (statusElement) {
+                statusElement.textContent = text;
+            }
+        }
+
+        function poll(statusUrl) {
+            fetch(statusUrl, {headers: {'Accept': 'application/json'}})
+            .then(response => response.json())
+            .then(job => {
+                if (job.status === 'succeeded') {
+                    showStatus('Ready.');
+                    button.disabled = false;
+                    if (job.download_url) {
+                        window.location = job.download_url;
+                    }
+                } else if (job.status === 'failed') {
+                    showStatus('Failed: ' + (job.error || 'unknown error'));
+                    button.disabled = false;
+                } else {
+                    showStatus(job.attempts > 1 ? 'Retrying...' : (job.status === 'running' ? 'Generating...' : 'Queued...'));
+                    setTimeout(() => poll(statusUrl), POLL_INTERVAL_MS);
+                }
+            })
+            .catch(() => setTimeout(() => poll(statusUrl), POLL_INTERVAL_MS));
+        }
+
+        button.addEventListener('click', function() {
+            const body = new FormData();
+            if (button.dataset.jobPeriod) {
+                body.append('period', button.dataset.jobPeriod);
+            }
+            button.disabled = true;
+            showStatus('Queued...');
+            fetch(button.dataset.jobUrl, {
+                method: 'POST',
+                headers: {'X-CSRFToken': getCookie('csrftoken')},
+                body: body
+            })
+            .then(response => response.json())
+            .then(job => poll(job.status_url))
+            .catch(() => {
+                showStatus('Could not queue the job. Please try again.');
+                button.disabled = false;
+            });
+        });
+    });
+
+    function getCookie(name) {
+        let cookieValue = null;
+        if (document.cookie && document.cookie !== '') {
+            const cookies = document.cookie.split(';');
+            for (let i = 0; i < cookies.length; i++) {
+                const cookie = cookies[i].trim();
+                if (cookie.substring(0, name.length + 1) === (name + '=')) {
+                    cookieValue = decodeURIComponent(cookie.substring(name.length + 1));
+                    break;
+                }
+            }
+        }
+        return cookieValue;
+    }
+});